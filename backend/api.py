@@ -1,39 +1,218 @@
+import time
+_import_started = time.perf_counter()
+
 import torch
-from torchvision import transforms
 from PIL import Image
 import os
 import sys
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
-import io
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Header, Depends, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+import json
+import asyncio
+import secrets
+import zipfile
+from dotenv import load_dotenv
+
+# Every setting below (and those src/ modules read at import) comes from the
+# environment, so backend/.env is loaded before any of them. Variables already
+# set in the process environment take precedence (src/auth.py loads the same
+# file the same way, for scripts that import it alone).
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(ENV_PATH):
+    load_dotenv(dotenv_path=ENV_PATH)
+    env_status = f"Loaded .env from {ENV_PATH}"
+else:
+    env_status = f"Warning: .env file not found at {ENV_PATH}"
 
 sys.path.insert(0, './src')
 
 from model import ForestFirePredictor
-from data_preprocessing import data_transforms
+from data_preprocessing import data_transforms, load_image, preprocess_image_bytes, preprocess_image_bytes_timed
+from batching import BatchingEngine
+from executor import create_inference_executor
+from batch_inputs import ArchiveError, is_zip_upload, open_zip_images, read_zip_member, chunked
+from prediction_cache import PredictionCache
+from scene import predict_scene
+from raster import open_raster
+from quantization import load_quantized_model
+from optimize import TORCHSCRIPT_FILENAME, fuse_for_inference, load_torchscript, prepare_runtime
+from backends import TorchBackend, OnnxRuntimeBackend
+from weights import CLASS_NAMES, load_state_dict, load_weights
+from log_pipeline import LogPipeline
+from metrics import MetricsRegistry, MetricsMiddleware
+from registry import ModelRegistry, RegistryError, REGISTRY_DIR, file_sha256
+from profiling import ProfileStore, profile_prediction, PROFILE_DIR
+from tracing import TraceRecorder
+from sessions import TokenSigner, TokenError, RevocationList, ACCESS, REFRESH
+from avatars import AvatarStore, AvatarError, AVATAR_DIR, AVATAR_REF, AVATAR_SIZES, DEFAULT_SIZE, decode_data_url
 
 from contextlib import asynccontextmanager
 
+# The serving backend (see src/backends.py), None until a model is loaded.
+# Hot reloads replace it with a single assignment; batches already running
+# keep their reference to the old backend and finish on it.
 model = None
 MODEL_PATH = os.path.join('models', 'forest_fire_model.pth')
 
+# Versioned model registry (see src/registry.py). When its manifest exists the
+# active version is served and the manifest is polled for changes.
+model_registry = ModelRegistry(os.getenv('MODEL_REGISTRY_DIR', REGISTRY_DIR))
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv('MODEL_REGISTRY_POLL_SECONDS', 5))
+
+# Admin endpoints require this token in the X-Admin-Token header; they are
+# disabled when it is unset.
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# MODEL_PRECISION=int8 serves the quantized artifact written by
+# src/quantization.py instead of the fp32 weights.
+MODEL_PRECISION = os.getenv('MODEL_PRECISION', 'fp32').lower()
+
+# Fold BatchNorm into the convolutions at load time (fp32 only).
+MODEL_FUSE = os.getenv('MODEL_FUSE', '1') == '1'
+
+# MODEL_RUNTIME=eager|torchscript|compile. torchscript serves the frozen
+# program exported by src/optimize.py (models/forest_fire_model_ts.pt, or the
+# registry version's copy) and only traces and freezes the weights at load time
+# when there is none; its weights are constants in each process rather than
+# shared memory-mapped pages. compile uses torch.compile. Either way the
+# lifespan hook warms the model up on MODEL_WARMUP_BATCH_SIZES before the app
+# is ready.
+MODEL_RUNTIME = os.getenv('MODEL_RUNTIME', 'eager').lower()
+
+# INFERENCE_BACKEND=torch|onnx. onnx serves models/forest_fire_model.onnx
+# (written by src/onnx_export.py) through ONNX Runtime on CPU.
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch').lower()
+
+# Dynamic batching: concurrent /predict calls are grouped into one forward pass.
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 8))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', 5))
+
+# In-process metrics, served in Prometheus text format by /metrics.
+metrics = MetricsRegistry('forest_fire')
+http_requests = metrics.counter('http_requests', "HTTP requests by route and status.", ('method', 'path', 'status'))
+http_request_seconds = metrics.histogram('http_request_duration_seconds', "HTTP request latency by route.", ('method', 'path'))
+predict_stage_seconds = metrics.histogram(
+    'predict_stage_seconds',
+    "Per-request /predict time by stage: read, decode, transform, queue, forward, serialize.",
+    ('stage',),
+)
+batch_size_histogram = metrics.histogram('batch_size', "Inputs per model forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+
+def run_model_batch(tensors):
+    # Returns (probabilities, model_version, forward seconds, model fingerprint)
+    # per input, all from the one backend that ran the batch.
+    backend = model
+    start = time.perf_counter()
+    probabilities = backend.predict(torch.stack(tensors))
+    forward_seconds = time.perf_counter() - start
+    batch_size_histogram.observe(len(tensors))
+    return [(row, backend.version, forward_seconds, backend.fingerprint) for row in probabilities]
+
+def format_prediction(probabilities, model_version):
+    predicted_class_idx = torch.argmax(probabilities).item()
+    return {
+        "prediction": CLASS_NAMES[predicted_class_idx],
+        "confidence": float(probabilities[predicted_class_idx].item()),
+        "is_fire": CLASS_NAMES[predicted_class_idx] == "Fire",
+        "model_version": model_version
+    }
+
+# Results for identical uploads are reused; PREDICTION_CACHE_SIZE=0 disables it.
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv('PREDICTION_CACHE_SIZE', 1024)),
+    ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', 3600)),
+    disk_dir=os.getenv('PREDICTION_CACHE_DIR') or None,
+)
+
+# Decode, transforms and the forward pass run here instead of on the event loop.
+# INFERENCE_EXECUTOR=thread|process, INFERENCE_WORKERS=<pool size>.
+inference_executor = create_inference_executor()
+
+MODEL_WARMUP_BATCH_SIZES = [int(size) for size in os.getenv('MODEL_WARMUP_BATCH_SIZES', f'1,{BATCH_MAX_SIZE}').split(',') if size.strip()]
+
+# Set once startup (model load and warm-up) has finished; see /health.
+app_ready = False
+
+def warm_up_backend(backend):
+    if not MODEL_WARMUP_BATCH_SIZES:
+        return
+    timings = backend.warm_up(MODEL_WARMUP_BATCH_SIZES)
+    summary = ', '.join(f"batch {size}: {seconds:.2f}s" for size, seconds in timings.items())
+    print(f"Model {backend.version} warm-up complete ({summary})")
+
+batching_engine = BatchingEngine(
+    run_model_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    executor=inference_executor.forward_pool,
+)
+
+# Seconds spent in each startup step; reported by /health.
+startup_timings = {}
+
+def timed_startup_step(name, func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        startup_timings[name] = round(time.perf_counter() - start, 3)
+
+def load_and_warm_up_model():
+    if model is None:
+        timed_startup_step('model_load', load_model_logic, False)
+    # A model pre-loaded by serve.py before forking is warmed up here, so
+    # thread pools and allocator caches belong to this worker.
+    if model is not None:
+        timed_startup_step('model_warm_up', warm_up_backend, model)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    auth.init_db()
-    load_model_logic()
+    global app_ready
+    log_debug("API Script initialized")
+    log_debug(env_status)
+    # The database handshake is network-bound and the model load is mostly
+    # file and native-code work, so they overlap well in threads.
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        loop.run_in_executor(None, timed_startup_step, 'database', auth.init_db),
+        loop.run_in_executor(None, load_and_warm_up_model),
+    )
+    await batching_engine.start()
+    watcher = asyncio.create_task(watch_model_registry())
+    revocation_watcher = asyncio.create_task(watch_revocations())
+    app_ready = True
+    startup_timings['ready'] = round(time.perf_counter() - _import_started, 3)
+    print(f"Startup complete: {startup_timings}")
     yield
+    app_ready = False
+    watcher.cancel()
+    revocation_watcher.cancel()
+    await batching_engine.stop()
+    inference_executor.shutdown(wait=False)
+    auth.close_pool()
+    log_pipeline.flush()
+    if trace_pipeline is not None:
+        trace_pipeline.flush()
 
 app = FastAPI(title="Forest Fire Sentinel API", description="API for detecting forest fires from satellite images.", lifespan=lifespan)
 
-CLASS_NAMES = ["No Fire", "Fire"]
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 CONFIDENCE_THRESHOLD = 0.70
 
-def log_debug(message):
-    with open('backend_log.txt', 'a') as f:
-        f.write(f"{message}\n")
+# Structured JSON-lines log written by a background thread (src/log_pipeline.py).
+log_pipeline = LogPipeline(
+    os.getenv('LOG_PATH', 'backend_log.txt'),
+    max_bytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+    backup_count=int(os.getenv('LOG_BACKUP_COUNT', 5)),
+    rotate_seconds=float(os.getenv('LOG_ROTATE_SECONDS', 0)),
+    flush_interval=float(os.getenv('LOG_FLUSH_MS', 200)) / 1000,
+)
+
+# Fraction of /predict results that are logged; lower it at peak traffic.
+PREDICTION_LOG_SAMPLE_RATE = float(os.getenv('PREDICTION_LOG_SAMPLE_RATE', 1.0))
 
-log_debug("API Script initialized")
+def log_debug(message, **fields):
+    log_pipeline.log(message, **fields)
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -44,10 +223,61 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, requests=http_requests, latency=http_request_seconds)
+
+# Opt-in traffic recording for benchmarks/replay.py: one JSON line per request
+# in TRACE_PATH (see src/tracing.py). TRACE_PAYLOADS=none|hash|sample; with
+# sample, uploaded files are kept in TRACE_SAMPLE_DIR. Set TRACE_SALT so
+# anonymized tokens match across workers and restarts.
+TRACE_PATH = os.getenv('TRACE_PATH')
+trace_pipeline = None
+if TRACE_PATH:
+    trace_pipeline = LogPipeline(
+        TRACE_PATH,
+        max_bytes=int(os.getenv('TRACE_MAX_BYTES', 100 * 1024 * 1024)),
+        backup_count=int(os.getenv('TRACE_BACKUP_COUNT', 5)),
+    )
+    app.add_middleware(
+        TraceRecorder,
+        writer=trace_pipeline,
+        payloads=os.getenv('TRACE_PAYLOADS', 'none').lower(),
+        sample_dir=os.getenv('TRACE_SAMPLE_DIR', 'trace_samples'),
+        sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', 1.0)),
+        salt=os.getenv('TRACE_SALT'),
+    )
+
+metrics.gauge('batch_queue_depth', "Requests waiting for a batch slot.", lambda: batching_engine.queue_depth())
+metrics.gauge(
+    'model_info', "The model being served (always 1).",
+    lambda: {(model.version, MODEL_PRECISION, MODEL_RUNTIME, INFERENCE_BACKEND): 1} if model is not None else None,
+    ('version', 'precision', 'runtime', 'backend'),
+)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 from pydantic import BaseModel, EmailStr
 from src import auth
 
+# Auth queries share a bounded connection pool (src/db_pool.py); see the
+# DB_POOL_* settings in src/auth.py.
+db_pool_wait_seconds = metrics.histogram('db_pool_wait_seconds', "Time auth queries waited for a pooled database connection.")
+auth.pool_wait_observer = db_pool_wait_seconds.observe
+
+def db_pool_connections():
+    stats = auth.pool_stats()
+    if stats is None:
+        return None
+    return {('in_use',): stats['in_use'], ('idle',): stats['idle']}
+
+metrics.gauge('db_pool_connections', "Pooled database connections by state.", db_pool_connections, ('state',))
+
+@app.exception_handler(auth.PoolTimeout)
+async def database_busy(request: Request, exc: auth.PoolTimeout):
+    log_debug(f"Database pool exhausted: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Database busy, try again"}, headers={"Retry-After": "1"})
+
 class UserAuth(BaseModel):
     username: str
     password: str
@@ -59,41 +289,278 @@ class UserRegister(BaseModel):
     email: EmailStr
     phone: str
 
-def load_model_logic():
-    global model
-    
-    # Check possible locations for the model
-    possible_paths = [
-        os.path.join('models', 'forest_fire_model.pth'),
-        os.path.join('..', 'models', 'forest_fire_model.pth'),
-        r"l:\Forest1\models\forest_fire_model.pth"
-    ]
-    
-    found_path = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            found_path = path
-            break
-            
-    if not found_path:
-        print(f"Error: Model file not found in any of the expected locations: {possible_paths}")
-        return
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
-    print(f"Loading model from {found_path}...")
+# Signed session tokens (see src/sessions.py). /login issues a short-lived
+# access token and a refresh token; protected endpoints check the access token
+# with an HMAC and an in-memory revocation list, so they cost no database
+# access. Set SESSION_SECRET to the same value on every worker and node.
+# AUTH_REQUIRED=0 lets requests without a token through (local benchmarks).
+SESSION_SECRET = os.getenv('SESSION_SECRET')
+if not SESSION_SECRET:
+    print("Warning: SESSION_SECRET not set; sessions will not survive a restart or work across workers.")
+    SESSION_SECRET = secrets.token_hex(32)
+AUTH_REQUIRED = os.getenv('AUTH_REQUIRED', '1') == '1'
+token_signer = TokenSigner(
+    SESSION_SECRET,
+    access_ttl=int(os.getenv('SESSION_ACCESS_TTL', 15 * 60)),
+    refresh_ttl=int(os.getenv('SESSION_REFRESH_TTL', 14 * 24 * 3600)),
+)
+# Revocations from other workers and nodes are picked up every
+# REVOCATION_REFRESH_SECONDS.
+revoked_tokens = RevocationList(lambda: auth.revoked_tokens(time.time()))
+REVOCATION_REFRESH_SECONDS = float(os.getenv('REVOCATION_REFRESH_SECONDS', 30))
+session_token_checks = metrics.counter('session_token_checks', "Access token checks by result.", ('result',))
+
+def unauthorized(detail):
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+def verify_token(token, kind):
+    claims = token_signer.verify(token, kind)
+    if claims['jti'] in revoked_tokens:
+        raise TokenError('revoked', "Token revoked")
+    return claims
+
+async def current_session(authorization: str | None = Header(None)):
+    # Claims of the caller's access token; None without one when
+    # AUTH_REQUIRED=0.
+    if not authorization:
+        if not AUTH_REQUIRED:
+            return None
+        session_token_checks.inc('missing')
+        raise unauthorized("Not authenticated")
+    scheme, _, token = authorization.partition(' ')
     try:
-        model_instance = ForestFirePredictor()
-        
-        # Load state dict
-        checkpoint = torch.load(found_path, map_location=DEVICE)
-        model_instance.load_state_dict(checkpoint)
-        
-        model_instance.to(DEVICE)
+        if scheme.lower() != 'bearer':
+            raise TokenError('invalid', "Expected a Bearer token")
+        claims = verify_token(token.strip(), ACCESS)
+    except TokenError as e:
+        session_token_checks.inc(e.reason)
+        raise unauthorized(str(e))
+    session_token_checks.inc('ok')
+    return claims
+
+def issue_session(username, user_id):
+    return {
+        "access_token": token_signer.issue(username, ACCESS, uid=user_id),
+        "refresh_token": token_signer.issue(username, REFRESH, uid=user_id),
+        "token_type": "bearer",
+        "expires_in": token_signer.access_ttl,
+    }
+
+def revoke(claims):
+    revoked_tokens.add(claims['jti'], claims['exp'])
+    return auth.revoke_token(claims['jti'], claims['exp'])
+
+def refresh_revocations():
+    now = time.time()
+    auth.purge_revoked_tokens(now)
+    revoked_tokens.refresh(now)
+
+async def watch_revocations():
+    while True:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, refresh_revocations)
+        except Exception as e:
+            # Keep the last list; local revocations still apply.
+            log_debug(f"Revocation list refresh failed: {e}")
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+
+def model_filenames():
+    # Candidate artifacts for the configured backend, in order of preference.
+    if INFERENCE_BACKEND == 'onnx':
+        return ['forest_fire_model.onnx']
+    if MODEL_PRECISION == 'int8':
+        return ['forest_fire_model_int8.pt']
+    if MODEL_RUNTIME == 'torchscript':
+        return [TORCHSCRIPT_FILENAME, 'forest_fire_model.safetensors', 'forest_fire_model.pth']
+    return ['forest_fire_model.safetensors', 'forest_fire_model.pth']
+
+def registry_artifact(version):
+    # (path, sha256) of the version's artifact for the configured backend,
+    # checked against the hash recorded in the manifest.
+    error = None
+    for filename in model_filenames():
+        try:
+            return model_registry.verified_artifact_path(version, filename)
+        except RegistryError as e:
+            error = error or e
+    raise error
+
+def load_backend(path, version, warm_up=True, fingerprint=None):
+    """Build (and by default warm up) a serving backend for the artifact at ``path``."""
+    print(f"Loading {MODEL_PRECISION} model {version or os.path.basename(path)} from {path} ({INFERENCE_BACKEND} backend)...")
+    if INFERENCE_BACKEND == 'onnx':
+        backend = OnnxRuntimeBackend(path)
+    elif MODEL_PRECISION == 'int8':
+        # Quantized kernels are CPU only.
+        backend = TorchBackend(load_quantized_model(path), 'cpu')
+    elif os.path.basename(path) == TORCHSCRIPT_FILENAME:
+        # Already fused, traced and frozen by src/optimize.py.
+        backend = TorchBackend(load_torchscript(path, DEVICE), DEVICE)
+    else:
+        # Weights are memory-mapped and assigned as-is, so processes serving
+        # the same file share its page-cache pages instead of each holding a
+        # private copy. Building on the meta device skips allocating and
+        # randomly initialising parameters that would be replaced anyway.
+        with torch.device('meta'):
+            model_instance = ForestFirePredictor()
+        if path.endswith('.safetensors'):
+            checkpoint, metadata = load_weights(path)
+            if metadata.get("class_names", CLASS_NAMES) != CLASS_NAMES:
+                raise ValueError(f"Model classes {metadata['class_names']} do not match {CLASS_NAMES}")
+        else:
+            checkpoint = load_state_dict(path)
+        model_instance.load_state_dict(checkpoint, assign=True)
+
         model_instance.eval()
-        model = model_instance
+        if MODEL_FUSE:
+            model_instance = fuse_for_inference(model_instance)
+        model_instance.to(DEVICE)
+        model_instance = prepare_runtime(model_instance, MODEL_RUNTIME)
+        backend = TorchBackend(model_instance, DEVICE)
+
+    backend.fingerprint = fingerprint or file_sha256(path)
+    backend.version = version or f"sha256:{backend.fingerprint[:12]}"
+    if warm_up:
+        warm_up_backend(backend)
+    return backend
+
+def load_model_logic(warm_up=True):
+    global model
+
+    if model_registry.active_version():
+        version = model_registry.active_version()
+        try:
+            found_path, fingerprint = registry_artifact(version)
+        except RegistryError as e:
+            print(f"Error: {e}")
+            return
+    else:
+        # No registry yet: fall back to a bare model file.
+        version = fingerprint = None
+        possible_paths = [
+            os.path.join(directory, filename)
+            for filename in model_filenames()
+            for directory in ('models', os.path.join('..', 'models'))
+        ]
+
+        found_path = None
+        for path in possible_paths:
+            if os.path.exists(path):
+                found_path = path
+                break
+
+        if not found_path:
+            print(f"Error: Model file not found in any of the expected locations: {possible_paths}")
+            return
+
+    try:
+        model = load_backend(found_path, version, warm_up, fingerprint)
         print("Model loaded successfully!")
     except Exception as e:
         print(f"Failed to load model: {e}")
 
+model_reload_lock = asyncio.Lock()
+
+async def activate_model_version(version, commit=None):
+    """Load, verify and warm up a registry version, then swap it in without
+    dropping requests. ``commit`` (e.g. writing the manifest) runs only once
+    the new backend is ready, so a version that fails to load is never
+    recorded as active."""
+    global model
+    async with model_reload_lock:
+        if model is not None and model.version == version:
+            if commit is not None:
+                commit()
+            return model
+        path, fingerprint = registry_artifact(version)
+        loop = asyncio.get_running_loop()
+        backend = await loop.run_in_executor(None, load_backend, path, version, True, fingerprint)
+        if commit is not None:
+            commit()
+        previous = model.version if model is not None else None
+        model = backend
+        log_debug(f"Model swapped: {previous} -> {version}")
+        return backend
+
+async def watch_model_registry():
+    last_mtime = model_registry.manifest_mtime()
+    while True:
+        await asyncio.sleep(MODEL_REGISTRY_POLL_SECONDS)
+        mtime = model_registry.manifest_mtime()
+        if mtime is None or mtime == last_mtime:
+            continue
+        last_mtime = mtime
+        try:
+            active = model_registry.active_version()
+            if active and (model is None or model.version != active):
+                await activate_model_version(active)
+        except Exception as e:
+            # Keep serving the current model; the next manifest change retries.
+            log_debug(f"Model reload failed: {e}")
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def list_model_versions():
+    return {
+        "serving": model.version if model is not None else None,
+        "active": model_registry.active_version(),
+        "versions": model_registry.list_versions(),
+    }
+
+@app.post("/admin/models/{version}/activate", dependencies=[Depends(require_admin)])
+async def activate_model(version: str):
+    try:
+        backend = await activate_model_version(version, commit=lambda: model_registry.activate(version))
+    except RegistryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to activate {version}: {str(e)}")
+    return {"message": f"Model {version} activated", "serving": backend.version}
+
+@app.post("/admin/models/rollback", dependencies=[Depends(require_admin)])
+async def rollback_model():
+    try:
+        version = model_registry.previous_version()
+        backend = await activate_model_version(version, commit=lambda: model_registry.rollback(expected=version))
+    except RegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rollback failed: {str(e)}")
+    return {"message": f"Rolled back to {version}", "serving": backend.version}
+
+@app.post("/admin/profiling", dependencies=[Depends(require_admin)])
+def start_profiling(seconds: float = Query(60, ge=0, le=3600)):
+    # Profile every /predict for the next `seconds`; 0 stops the window.
+    global profiling_until
+    profiling_until = time.monotonic() + seconds if seconds else 0.0
+    return {"profiling": bool(seconds), "seconds": seconds}
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    return {"profiles": profile_store.list()}
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str):
+    summary = profile_store.load(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile {profile_id}")
+    return summary
+
+@app.get("/admin/profiles/{profile_id}/trace", dependencies=[Depends(require_admin)])
+def get_profile_trace(profile_id: str):
+    path = profile_store.path(profile_id, trace=True)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile {profile_id}")
+    return FileResponse(path, media_type='application/json', filename=f"{profile_id}.trace.json")
+
 @app.post("/register")
 def register(user: UserRegister):
     log_debug(f"Registering user: {user.username}")
@@ -110,57 +577,159 @@ def login(user: UserAuth):
     user_data = auth.login_user(user.username, user.password)
     if user_data:
         log_debug("Login successful")
-        # user_data[0] tuple structure: 
-        # (id, username, password, fullname, email, phone, profile_image)
-        # We need to handle potential missing columns if schema wasn't fully updated, 
-        # but we ran fix_db.py so it should be fine.
-        # Let's verify indices safely or just try/except.
-        # Schema from debug output earlier (implied): id, username, password, fullname, email, phone, profile_image
-        
-        row = user_data[0]
-        # Assuming: 0=id, 1=username, 2=password, 3=fullname, 4=email, 5=phone, 6=profile_image
-        # Wait, allow for flexible schema? No, let's assume standard order from INSERT/CREATE.
-        # users(username, password, fullname, email, phone) -> id is auto-inc first.
-        # So: id, username, password, fullname, email, phone.
-        # We added profile_image at the end with ALTER TABLE.
-        
-        user_email = row[4]
-        user_phone = row[5]
-        
-        # Check if profile_image exists (index 6)
-        user_image = None
-        if len(row) > 6:
-            user_image = row[6]
-            
+        # (id, username, fullname, email, phone, profile_image)
+        user_id, _, _, user_email, user_phone, user_image = user_data[0]
+        if user_image and not AVATAR_REF.match(user_image):
+            user_image = migrate_avatar(user.username, user_image)
         return {
             "message": "Login successful", 
             "username": user.username, 
             "email": user_email,
             "phone": user_phone,
-            "profile_image": user_image
+            "profile_image": user_image,
+            **issue_session(user.username, user_id),
         }
     else:
         log_debug("Login failed: Invalid credentials")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+@app.post("/token/refresh")
+def refresh_session(body: RefreshRequest):
+    # Refresh tokens are single use: revoking the old one is recorded in the
+    # database, so a stolen copy replayed after the owner refreshed fails
+    # on every node.
+    try:
+        claims = verify_token(body.refresh_token, REFRESH)
+    except TokenError as e:
+        raise unauthorized(str(e))
+    if not revoke(claims):
+        log_debug(f"Refresh token reused for {claims['sub']}")
+        raise unauthorized("Token revoked")
+    return issue_session(claims['sub'], claims.get('uid'))
+
+@app.post("/logout")
+def logout(body: RefreshRequest | None = None, authorization: str | None = Header(None)):
+    # Revokes whichever of the caller's tokens are still valid, so a client
+    # whose access token already expired can still end its refresh token.
+    scheme, _, token = (authorization or '').partition(' ')
+    tokens = [(token.strip(), ACCESS)] if scheme.lower() == 'bearer' else []
+    if body is not None:
+        tokens.append((body.refresh_token, REFRESH))
+    for token, kind in tokens:
+        try:
+            revoke(verify_token(token, kind))
+        except TokenError:
+            pass
+    return {"message": "Logged out"}
+
+# Profile pictures live in a content-addressed store on disk (see
+# src/avatars.py); the users table and the JSON APIs only carry the 64-char
+# reference, and clients fetch GET /avatars/{ref}?size=64|256|512.
+avatar_store = AvatarStore(
+    os.getenv('AVATAR_DIR', AVATAR_DIR),
+    max_bytes=int(os.getenv('AVATAR_MAX_BYTES', 5 * 1024 * 1024)),
+)
+
+def migrate_avatar(username, value):
+    # Rows written before the avatar store hold a base64 data URL; move it
+    # to the store on first login so later logins read a short reference.
+    # A value that can't be migrated stays in the database untouched and
+    # the client gets no image.
+    try:
+        ref = avatar_store.save(decode_data_url(value))
+    except AvatarError as e:
+        log_debug(f"Keeping unmigrated profile image for {username}: {e}")
+        return None
+    auth.set_profile_image(username, ref)
+    return ref
+
+@app.post("/avatars", dependencies=[Depends(current_session)])
+def upload_avatar(file: UploadFile = File(...)):
+    data = file.file.read(avatar_store.max_bytes + 1)
+    try:
+        ref = avatar_store.save(data)
+    except AvatarError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    log_debug("Avatar stored", ref=ref, bytes=len(data))
+    return {"profile_image": ref, "sizes": list(AVATAR_SIZES)}
+
+@app.get("/avatars/{ref}")
+def get_avatar(ref: str, request: Request, size: str = DEFAULT_SIZE):
+    path = avatar_store.path(ref, size)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Unknown avatar")
+    # A reference always names the same image, so clients may cache it
+    # for good and revalidate with If-None-Match.
+    headers = {"ETag": avatar_store.etag(ref, size), "Cache-Control": "public, max-age=31536000, immutable"}
+    if headers["ETag"] in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type='image/webp', headers=headers)
+
 class UserProfileUpdate(BaseModel):
-    username: str
+    # Ignored when the request carries a session; the token names the user.
+    username: str | None = None
     email: EmailStr
     phone: str
+    # A reference returned by POST /avatars; images themselves are not
+    # accepted here.
     profile_image: str | None = None
 
 @app.put("/update-profile")
-def update_profile(data: UserProfileUpdate):
-    log_debug(f"Updating profile for: {data.username}")
-    if auth.update_user_profile(data.username, data.email, data.phone, data.profile_image):
+def update_profile(data: UserProfileUpdate, session: dict | None = Depends(current_session)):
+    username = session['sub'] if session is not None else data.username
+    if not username:
+        raise unauthorized("Not authenticated")
+    log_debug(f"Updating profile for: {username}")
+    if data.profile_image and not avatar_store.exists(data.profile_image):
+        raise HTTPException(status_code=400, detail="Unknown profile_image; upload it to /avatars first")
+    if auth.update_user_profile(username, data.email, data.phone, data.profile_image):
         log_debug("Profile updated successfully")
         return {"message": "Profile updated successfully"}
     else:
         log_debug("Profile update failed")
         raise HTTPException(status_code=500, detail="Failed to update profile")
 
-@app.post("/predict")
-async def predict_image(file: UploadFile = File(...)):
+# On-demand /predict profiling (see src/profiling.py). A request is profiled
+# when it carries X-Profile: 1 with a valid X-Admin-Token, or while a window
+# opened by POST /admin/profiling is running. Only the newest
+# PROFILE_MAX_FILES profiles are kept in PROFILE_DIR.
+profile_store = ProfileStore(os.getenv('PROFILE_DIR', PROFILE_DIR), max_profiles=int(os.getenv('PROFILE_MAX_FILES', 50)))
+profiling_until = 0.0
+
+def should_profile(request):
+    if profiling_until and time.monotonic() < profiling_until:
+        return True
+    return (request.headers.get('x-profile') == '1' and bool(ADMIN_TOKEN)
+            and request.headers.get('x-admin-token') == ADMIN_TOKEN)
+
+async def profiled_prediction(request, contents):
+    # Bypasses the cache and the batching engine so the trace covers this
+    # request's own decode, transform and forward pass.
+    backend = model
+    read_ms = (time.perf_counter() - request.state.request_started) * 1000
+    probabilities, stages, layers, profiler = await asyncio.get_running_loop().run_in_executor(
+        inference_executor.forward_pool, profile_prediction, backend, contents, load_image, data_transforms)
+    start = time.perf_counter()
+    result = format_prediction(probabilities, backend.version)
+    response = JSONResponse(content=result)
+    stages = {"read": read_ms, **stages, "serialize": (time.perf_counter() - start) * 1000}
+    summary = {
+        "model_version": backend.version,
+        "backend": backend.name,
+        "runtime": MODEL_RUNTIME,
+        "precision": MODEL_PRECISION,
+        "total_ms": (time.perf_counter() - request.state.request_started) * 1000,
+        "stages_ms": stages,
+        "layers_ms": layers,
+        "prediction": result,
+    }
+    profile_id = await asyncio.get_running_loop().run_in_executor(None, profile_store.save, summary, profiler)
+    response.headers['X-Profile-Id'] = profile_id
+    log_debug("Profiled prediction", profile_id=profile_id, total_ms=round(summary['total_ms'], 2))
+    return response
+
+@app.post("/predict", dependencies=[Depends(current_session)])
+async def predict_image(request: Request, file: UploadFile = File(...)):
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded.")
     
@@ -169,62 +738,238 @@ async def predict_image(file: UploadFile = File(...)):
 
     try:
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        
-        input_tensor = data_transforms(image).unsqueeze(0)
-        input_tensor = input_tensor.to(DEVICE)
-
-        with torch.no_grad():
-            outputs = model(input_tensor)
-            probabilities = torch.softmax(outputs, dim=1)
-            predicted_class_idx = torch.argmax(probabilities, dim=1).item()
-            confidence = probabilities[0][predicted_class_idx].item()
-            
+        if should_profile(request):
+            return await profiled_prediction(request, contents)
+        # From arrival, so receiving and parsing the multipart body count too.
+        predict_stage_seconds.observe(time.perf_counter() - request.state.request_started, 'read')
+
+        async def compute():
+            loop = asyncio.get_running_loop()
+            input_tensor, decode_seconds, transform_seconds = await loop.run_in_executor(
+                inference_executor.preprocess_pool, preprocess_image_bytes_timed, contents)
+            predict_stage_seconds.observe(decode_seconds, 'decode')
+            predict_stage_seconds.observe(transform_seconds, 'transform')
+
+            submitted = time.perf_counter()
+            probabilities, model_version, forward_seconds, fingerprint = await batching_engine.submit(input_tensor)
+            predict_stage_seconds.observe(time.perf_counter() - submitted - forward_seconds, 'queue')
+            predict_stage_seconds.observe(forward_seconds, 'forward')
+            result = format_prediction(probabilities, model_version)
+
             # Log prediction details
-            log_debug(f"Prediction: Probs={probabilities.tolist()}, Index={predicted_class_idx}, Class={CLASS_NAMES[predicted_class_idx]}")
-        
-        result = {
-            "prediction": CLASS_NAMES[predicted_class_idx],
-            "confidence": float(confidence),
-            "is_fire": CLASS_NAMES[predicted_class_idx] == "Fire"
-        }
-        return result
+            if log_pipeline.sampled(PREDICTION_LOG_SAMPLE_RATE):
+                log_debug("Prediction", probabilities=probabilities.tolist(), prediction=result['prediction'], model_version=model_version)
+            # Keyed by the model that actually ran, which differs from the
+            # lookup key's if a reload landed while this was queued.
+            return result, PredictionCache.make_key(contents, fingerprint)
+
+        if prediction_cache.max_entries <= 0 and not prediction_cache.disk_dir:
+            result, _ = await compute()
+        else:
+            key = PredictionCache.make_key(contents, model.fingerprint)
+            result = await prediction_cache.get_or_compute(key, compute)
+
+        start = time.perf_counter()
+        response = JSONResponse(content=result)
+        predict_stage_seconds.observe(time.perf_counter() - start, 'serialize')
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+# Images per forward pass for /predict/batch.
+PREDICT_BATCH_SIZE = int(os.getenv('PREDICT_BATCH_SIZE', 32))
+
+# Limits on what ZIP uploads to /predict/batch may inflate to, per image
+# member and per archive.
+ZIP_MAX_MEMBER_BYTES = int(os.getenv('ZIP_MAX_MEMBER_BYTES', 64 * 1024 * 1024))
+ZIP_MAX_TOTAL_BYTES = int(os.getenv('ZIP_MAX_TOTAL_BYTES', 2 * 1024 * 1024 * 1024))
+
+def archive_pool():
+    # Archives are read from the spooled upload in this process, so they
+    # need a thread: the preprocess pool in thread mode, else the loop's
+    # default executor.
+    return inference_executor.preprocess_pool if inference_executor.kind == 'thread' else None
+
+async def open_batch_archives(files):
+    # Reads each ZIP's central directory (off the event loop) and checks its
+    # size limits before any result is streamed.
+    loop = asyncio.get_running_loop()
+    archives = {}
+    try:
+        for index, upload in enumerate(files):
+            if is_zip_upload(upload):
+                # ZipFile needs a seekable file; the spooled upload already is one.
+                archives[index] = await loop.run_in_executor(archive_pool(), open_zip_images, upload.file, ZIP_MAX_TOTAL_BYTES)
+    except (ArchiveError, zipfile.BadZipFile) as e:
+        for archive, _ in archives.values():
+            archive.close()
+        status = 413 if isinstance(e, ArchiveError) else 400
+        raise HTTPException(status_code=status, detail=f"{upload.filename}: {e}")
+    return archives
+
+async def iter_batch_uploads(files, archives):
+    # Yields (name, contents, error) with every ZIP member inflated in a
+    # worker thread.
+    loop = asyncio.get_running_loop()
+    for index, upload in enumerate(files):
+        if index in archives:
+            archive, members = archives[index]
+            with archive:
+                for info in members:
+                    try:
+                        contents = await loop.run_in_executor(archive_pool(), read_zip_member, archive, info, ZIP_MAX_MEMBER_BYTES)
+                    except (ArchiveError, zipfile.BadZipFile) as e:
+                        yield info.filename, None, str(e)
+                        continue
+                    yield info.filename, contents, None
+        else:
+            yield upload.filename, await upload.read(), None
+
+async def stream_batch_predictions(files, archives):
+    loop = asyncio.get_running_loop()
+
+    async def decode(name, contents, error):
+        if error is not None:
+            return name, None, error
+        try:
+            tensor = await loop.run_in_executor(inference_executor.preprocess_pool, preprocess_image_bytes, contents)
+            return name, tensor, None
+        except Exception as e:
+            return name, None, f"Could not decode image: {e}"
+
+    async def predict_chunk(decoded):
+        tensors = [tensor for _, tensor, _ in decoded if tensor is not None]
+        rows = await loop.run_in_executor(inference_executor.forward_pool, run_model_batch, tensors) if tensors else []
+        rows = iter(rows)
+        lines = []
+        for name, tensor, error in decoded:
+            if tensor is None:
+                lines.append({"filename": name, "error": error})
+            else:
+                lines.append({"filename": name, **format_prediction(*next(rows)[:2])})
+        return lines
+
+    # Decode the next chunk while the previous one is in the forward pass.
+    pending = None
+    async for chunk in chunked(iter_batch_uploads(files, archives), PREDICT_BATCH_SIZE):
+        decoded = await asyncio.gather(*(decode(*item) for item in chunk))
+        if pending is not None:
+            for line in await pending:
+                yield line
+        pending = asyncio.ensure_future(predict_chunk(decoded))
+    if pending is not None:
+        for line in await pending:
+            yield line
+
+@app.post("/predict/batch", dependencies=[Depends(current_session)])
+async def predict_batch(files: list[UploadFile] = File(...)):
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded.")
+    archives = await open_batch_archives(files)
+
+    async def ndjson():
+        total = fire = failed = 0
+        try:
+            async for line in stream_batch_predictions(files, archives):
+                total += 1
+                if "error" in line:
+                    failed += 1
+                elif line["is_fire"]:
+                    fire += 1
+                yield json.dumps(line) + "\n"
+        finally:
+            for archive, _ in archives.values():
+                archive.close()
+        log_debug(f"Batch prediction: {total} images, {fire} fire, {failed} failed")
+        yield json.dumps({"done": True, "total": total, "fire": fire, "failed": failed}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+# Full satellite scenes are far above PIL's default decompression-bomb limit.
+# Scene uploads are checked against this instead (PIL's own limit, which every
+# other decode relies on, is left alone).
+SCENE_MAX_PIXELS = int(os.getenv('SCENE_MAX_PIXELS', 400_000_000))
+
+@app.post("/predict/scene", dependencies=[Depends(current_session)])
+async def predict_scene_image(
+    file: UploadFile = File(...),
+    stride: int = Query(112, ge=16, le=224, description="Tile step in pixels; below 224 tiles overlap"),
+    top_k: int = Query(5, ge=0, le=100),
+):
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded.")
+
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File provided is not an image.")
+
+    # Pin the backend so every tile of the scene uses the same model version,
+    # even if a hot reload lands mid-scene.
+    backend = model
+
+    def run():
+        # Uncompressed TIFFs are memory-mapped straight from the spooled
+        # upload; other formats are decoded by PIL.
+        raster = open_raster(file.file, max_pixels=SCENE_MAX_PIXELS)
+        return predict_scene(
+            raster,
+            lambda tensors: list(backend.predict(torch.stack(tensors))),
+            fire_index=CLASS_NAMES.index("Fire"),
+            stride=stride,
+            batch_size=PREDICT_BATCH_SIZE,
+            top_k=top_k,
+        )
+
+    try:
+        # Tiles go straight to the model, so this runs on the forward pool
+        # rather than the (possibly out-of-process) decode pool.
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(inference_executor.forward_pool, run)
+    except Image.DecompressionBombError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scene prediction error: {str(e)}")
+
+    result["model_version"] = backend.version
+    log_debug(f"Scene prediction: {result['width']}x{result['height']}, {result['rows'] * result['cols']} tiles, max fire={result['max_fire_probability']:.3f}")
+    return result
+
+@app.get("/predict/stats")
+def prediction_stats():
+    return {
+        "batching": batching_engine.stats(),
+        "cache": prediction_cache.stats(),
+        "log": log_pipeline.stats(),
+    }
+
 # Email Configuration
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from dotenv import load_dotenv
-import os
+# The mail client (and fastapi_mail itself) is only needed by the email
+# endpoints, so it is created on first use rather than at import.
+mail_client = None
 
-# Robustly load .env file
-current_dir = os.path.dirname(os.path.abspath(__file__))
-env_path = os.path.join(current_dir, '.env')
-if os.path.exists(env_path):
-    load_dotenv(env_path)
-    log_debug(f"Loaded .env from {env_path}")
-else:
-    log_debug(f"Warning: .env file not found at {env_path}")
-    # Fallback to default load_dotenv which looks in current and parent dirs
-    load_dotenv()
-
-# Log loaded configuration (masking password)
-mail_username = os.getenv('MAIL_USERNAME')
-mail_server = os.getenv('MAIL_SERVER')
-mail_port = os.getenv('MAIL_PORT')
-log_debug(f"Email Config: User={mail_username}, Server={mail_server}, Port={mail_port}")
-
-conf = ConnectionConfig(
-    MAIL_USERNAME = os.getenv('MAIL_USERNAME'),
-    MAIL_PASSWORD = os.getenv('MAIL_PASSWORD'),
-    MAIL_FROM = os.getenv('MAIL_FROM'),
-    MAIL_PORT = int(os.getenv('MAIL_PORT', 587)),
-    MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com'),
-    MAIL_STARTTLS = True,
-    MAIL_SSL_TLS = False,
-    USE_CREDENTIALS = True,
-    VALIDATE_CERTS = True
-)
+def get_mail_client():
+    global mail_client
+    if mail_client is None:
+        from fastapi_mail import FastMail, ConnectionConfig
+
+        # Log loaded configuration (masking password)
+        mail_username = os.getenv('MAIL_USERNAME')
+        mail_server = os.getenv('MAIL_SERVER')
+        mail_port = os.getenv('MAIL_PORT')
+        log_debug(f"Email Config: User={mail_username}, Server={mail_server}, Port={mail_port}")
+
+        conf = ConnectionConfig(
+            MAIL_USERNAME = os.getenv('MAIL_USERNAME'),
+            MAIL_PASSWORD = os.getenv('MAIL_PASSWORD'),
+            MAIL_FROM = os.getenv('MAIL_FROM'),
+            MAIL_PORT = int(os.getenv('MAIL_PORT', 587)),
+            MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com'),
+            MAIL_STARTTLS = True,
+            MAIL_SSL_TLS = False,
+            USE_CREDENTIALS = True,
+            VALIDATE_CERTS = True
+        )
+        mail_client = FastMail(conf)
+    return mail_client
 
 class ContactSchema(BaseModel):
     name: str
@@ -242,6 +987,8 @@ async def send_contact_email(contact_data: ContactSchema):
             log_debug("Error: Missing MAIL_USERNAME or MAIL_PASSWORD in .env")
             raise HTTPException(status_code=500, detail="Server email configuration missing")
 
+        from fastapi_mail import MessageSchema, MessageType
+
         message = MessageSchema(
             subject=f"New Contact Form Submission: {contact_data.subject}",
             recipients=[os.getenv('MAIL_USERNAME')], 
@@ -256,8 +1003,7 @@ async def send_contact_email(contact_data: ContactSchema):
             subtype=MessageType.html
         )
 
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        await get_mail_client().send_message(message)
         log_debug("Email sent successfully")
         return JSONResponse(status_code=200, content={"message": "Email sent successfully"})
     except Exception as e:
@@ -272,11 +1018,13 @@ class AlertSchema(BaseModel):
     filename: str
     timestamp: str
 
-@app.post("/send-alert")
+@app.post("/send-alert", dependencies=[Depends(current_session)])
 async def send_alert_email(alert_data: AlertSchema):
     try:
         log_debug(f"Sending fire alert to {alert_data.email}")
         
+        from fastapi_mail import MessageSchema, MessageType
+
         message = MessageSchema(
             subject=f"🔥 CRITICAL ALERT: Fire Detected by Sentinel AI",
             recipients=[alert_data.email], 
@@ -310,18 +1058,19 @@ async def send_alert_email(alert_data: AlertSchema):
             subtype=MessageType.html
         )
 
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        await get_mail_client().send_message(message)
         return JSONResponse(status_code=200, content={"message": "Alert email sent"})
     except Exception as e:
         log_debug(f"Alert email failed: {str(e)}")
         return JSONResponse(status_code=500, content={"message": str(e)})
 
-@app.post("/send-report")
+@app.post("/send-report", dependencies=[Depends(current_session)])
 async def send_report_email(alert_data: AlertSchema):
     try:
         log_debug(f"Sending analysis report to {alert_data.email}")
         
+        from fastapi_mail import MessageSchema, MessageType
+
         message = MessageSchema(
             subject=f"📄 Analysis Report: {alert_data.filename}",
             recipients=[alert_data.email], 
@@ -355,22 +1104,37 @@ async def send_report_email(alert_data: AlertSchema):
             subtype=MessageType.html
         )
 
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        await get_mail_client().send_message(message)
         return JSONResponse(status_code=200, content={"message": "Report email sent"})
     except Exception as e:
         log_debug(f"Report email failed: {str(e)}")
         return JSONResponse(status_code=500, content={"message": str(e)})
 
-from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
+@app.get("/health")
+def health():
+    # Readiness probe: 503 until the model is loaded and warmed up.
+    status = {
+        "ready": app_ready,
+        "model_loaded": model is not None,
+        "model_version": model.version if model is not None else None,
+        "model_precision": MODEL_PRECISION,
+        "model_runtime": MODEL_RUNTIME,
+        "inference_backend": INFERENCE_BACKEND,
+        "startup_timings": startup_timings,
+        "db_pool": auth.pool_stats(),
+    }
+    return JSONResponse(status_code=200 if app_ready else 503, content=status)
+
 @app.get("/")
 async def read_index():
     return FileResponse('index.html')
 
 
 
+startup_timings['import'] = round(time.perf_counter() - _import_started, 3)
+
 if __name__ == "__main__":
     import uvicorn
     print("Starting server on http://127.0.0.1:8000")
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from memory import MemorySampler
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Local uvicorn serving api.app; USER_STORE and USER_DB_PATH come from the
+# environment.
+UVICORN = """import api, uvicorn
+uvicorn.run(api.app, host='127.0.0.1', port={port}, log_level='warning')
+"""
+
+# Distinct images per size, so the prediction cache (if enabled) sees repeats
+# only every IMAGES_PER_SIZE requests.
+IMAGES_PER_SIZE = 8
+
+
+def satellite_image(width, height, seed, fire=True):
+    """JPEG bytes of a synthetic aerial scene: blotchy vegetation and soil,
+    pixel noise, and optionally a few bright fire/smoke patches."""
+    rng = np.random.default_rng(seed)
+    palette = np.array([[34, 80, 34], [60, 110, 45], [95, 85, 55], [120, 105, 75], [45, 65, 40]], dtype=np.float32)
+    coarse = palette[rng.integers(0, len(palette), (max(1, height // 32), max(1, width // 32)))]
+    terrain = np.asarray(Image.fromarray(coarse.astype(np.uint8)).resize((width, height), Image.BICUBIC), dtype=np.float32)
+    terrain += rng.normal(0, 12, terrain.shape)
+    if fire:
+        for _ in range(rng.integers(1, 4)):
+            cx, cy = rng.integers(0, width), rng.integers(0, height)
+            radius = max(4, int(min(width, height) * rng.uniform(0.03, 0.12)))
+            ys, xs = np.ogrid[:height, :width]
+            mask = ((xs - cx) ** 2 + (ys - cy) ** 2) < radius ** 2
+            terrain[mask] = terrain[mask] * 0.3 + np.array([230, 110, 30]) * 0.7
+            smoke = ((xs - cx - radius) ** 2 + (ys - cy + radius) ** 2) < (2 * radius) ** 2
+            terrain[smoke] = terrain[smoke] * 0.5 + 170 * 0.5
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(terrain, 0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+async def drive(send, concurrency, requests):
+    """Run ``send(i)`` for i in range(requests) from ``concurrency`` clients."""
+    latencies = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async def client_loop():
+        for i in remaining:
+            start = time.perf_counter()
+            try:
+                status = (await send(i)).status_code
+            except httpx.HTTPError:
+                status = 'error'
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status != 200),
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "throughput": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_scenarios(client, server_pid, args):
+    results = []
+    run_id = f"{int(time.time())}-{os.getpid()}"
+
+    async def measure(name, send, **labels):
+        # Warm-up requests aren't counted.
+        await drive(send, args.concurrency, args.concurrency)
+        with MemorySampler(server_pid) as memory:
+            result = await drive(send, args.concurrency, args.requests)
+        results.append({"endpoint": name, **labels, **result, **memory.summary()})
+        print(f"{name:>10} {labels.get('image_size', ''):>11}  {result['throughput']:8.1f}  {result['p50_ms']:8.1f}"
+              f"  {result['p95_ms']:8.1f}  {result['p99_ms']:8.1f}  {result['errors']:>6}  {results[-1]['rss_peak_mb'] or 0:8.0f}")
+
+    # /predict needs a session token; logging in once also covers the
+    # token check in the measured requests.
+    account = {"username": f"bench-{run_id}-session", "password": "benchmark-password"}
+    await client.post('/register', json={**account, "fullname": "Load Test", "email": "load@example.com", "phone": "000"})
+    session = await client.post('/login', json=account)
+    session.raise_for_status()
+    client.headers['Authorization'] = f"Bearer {session.json()['access_token']}"
+
+    print(f"{'endpoint':>10} {'image':>11}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'errors':>6}  {'peak MB':>8}")
+    for width, height in args.sizes:
+        images = [satellite_image(width, height, seed) for seed in range(IMAGES_PER_SIZE)]
+
+        def predict(i, images=images):
+            return client.post('/predict', files={'file': ('scene.jpg', images[i % len(images)], 'image/jpeg')})
+
+        await measure('/predict', predict, image_size=f"{width}x{height}")
+
+    counter = iter(range(10 ** 9))
+
+    def register(i):
+        return client.post('/register', json={
+            "username": f"bench-{run_id}-{next(counter)}", "password": "benchmark-password",
+            "fullname": "Load Test", "email": "load@example.com", "phone": "000",
+        })
+
+    await measure('/register', register)
+
+    users = [f"bench-{run_id}-login-{i}" for i in range(args.users)]
+    for username in users:
+        await client.post('/register', json={
+            "username": username, "password": "benchmark-password",
+            "fullname": "Load Test", "email": "load@example.com", "phone": "000",
+        })
+
+    def login(i):
+        return client.post('/login', json={"username": users[i % len(users)], "password": "benchmark-password"})
+
+    await measure('/login', login)
+    return results
+
+
+async def run_in_process(args):
+    import api
+
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=300) as client:
+            return await run_scenarios(client, os.getpid(), args)
+
+
+async def wait_ready(client, process, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if (await client.get('/health')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+async def run_uvicorn(args):
+    code = UVICORN.format(port=args.port)
+    process = subprocess.Popen([sys.executable, '-c', code], env=os.environ.copy(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=300, limits=limits) as client:
+            await wait_ready(client, process)
+            return await run_scenarios(client, process.pid, args)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', '-C', BACKEND_DIR, 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', '-C', BACKEND_DIR, 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Load-test /predict, /register and /login (users in a scratch SQLite store unless "
+                    "USER_STORE=mysql); writes JSON results.")
+    parser.add_argument('--mode', choices=('in-process', 'uvicorn'), default='in-process',
+                        help="Drive api.app through an ASGI transport, or a local uvicorn process")
+    parser.add_argument('--sizes', default='224x224,640x480,1920x1080', help="Comma-separated WIDTHxHEIGHT image sizes")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument('--users', type=int, default=50, help="Accounts created up front for /login")
+    parser.add_argument('--port', type=int, default=8200)
+    parser.add_argument('--output', help="JSON results path (default: api_load-<commit>.json)")
+    args = parser.parse_args()
+    args.sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    commit, dirty = git_commit()
+    output = os.path.abspath(args.output or f"api_load-{(commit or 'unknown')[:10]}.json")
+
+    # Run from backend/ so api.py finds src/ and models/. Every /predict
+    # should reach the model unless the caller asks for the cache.
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+    os.environ.setdefault('LOG_PATH', os.path.join(tempfile.gettempdir(), 'api_load_log.jsonl'))
+
+    os.environ.setdefault('USER_STORE', 'sqlite')
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['USER_DB_PATH'] = os.path.join(root, 'users.db')
+        runner = run_in_process if args.mode == 'in-process' else run_uvicorn
+        results = asyncio.run(runner(args))
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "mode": args.mode,
+            "user_store": os.environ['USER_STORE'],
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import time
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from model import ForestFirePredictor
+from backends import OnnxRuntimeBackend, TorchBackend
+from onnx_export import export_onnx
+from optimize import fuse_for_inference
+
+LATENCY_ITERATIONS = 30
+THROUGHPUT_BATCH_SIZE = 32
+THROUGHPUT_ITERATIONS = 5
+
+
+def measure(backend):
+    single = torch.randn(1, 3, 224, 224)
+    batch = torch.randn(THROUGHPUT_BATCH_SIZE, 3, 224, 224)
+    backend.warm_up([1, THROUGHPUT_BATCH_SIZE], iterations=1)
+
+    latencies = []
+    for _ in range(LATENCY_ITERATIONS):
+        start = time.perf_counter()
+        backend.predict(single)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    start = time.perf_counter()
+    for _ in range(THROUGHPUT_ITERATIONS):
+        backend.predict(batch)
+    throughput = THROUGHPUT_BATCH_SIZE * THROUGHPUT_ITERATIONS / (time.perf_counter() - start)
+
+    return {
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p95_ms": 1000 * latencies[int(len(latencies) * 0.95) - 1],
+        "images_per_second": throughput,
+    }
+
+
+if __name__ == '__main__':
+    model_path = os.path.join('models', 'forest_fire_model.pth')
+    model = ForestFirePredictor()
+    if os.path.exists(model_path):
+        model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    else:
+        print(f"{model_path} not found, benchmarking randomly initialised weights")
+    model.eval()
+
+    onnx_path = export_onnx(model, os.path.join(tempfile.mkdtemp(), 'model.onnx'))
+    backends = {
+        "torch eager": TorchBackend(model),
+        "torch fused": TorchBackend(fuse_for_inference(model)),
+        "onnxruntime": OnnxRuntimeBackend(onnx_path),
+    }
+
+    print(f"torch {torch.__version__}, {torch.get_num_threads()} threads")
+    print(f"{'backend':<12}  {'p50 ms':>8}  {'p95 ms':>8}  {'img/s @' + str(THROUGHPUT_BATCH_SIZE):>10}")
+    for name, backend in backends.items():
+        result = measure(backend)
+        print(f"{name:<12}  {result['p50_ms']:>8.2f}  {result['p95_ms']:>8.2f}  {result['images_per_second']:>10.1f}")
@@ -0,0 +1,118 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_load import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src import auth
+
+
+class ConnectionCounter:
+    """Wraps a repository's ``connect`` to count connects and the peak
+    number of connections open at once (what MySQL's max_connections caps)."""
+
+    def __init__(self, connect, connect_latency):
+        self.connect = connect
+        self.connect_latency = connect_latency
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.open = 0
+        self.peak = 0
+
+    def __call__(self):
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+        conn = self.connect()
+        with self.lock:
+            self.opened += 1
+            self.open += 1
+            self.peak = max(self.peak, self.open)
+        return CountedConnection(conn, self)
+
+    def closed(self):
+        with self.lock:
+            self.open -= 1
+
+
+class CountedConnection:
+    # sqlite3 connections don't allow patching close(), so wrap instead.
+    def __init__(self, conn, counter):
+        self._conn = conn
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        self._counter.closed()
+        self._conn.close()
+
+
+def run(pool_size, args, users):
+    auth.DB_POOL_SIZE = pool_size
+    repository = auth.use_repository(auth.create_repository())
+    counter = ConnectionCounter(repository.connect, args.connect_latency_ms / 1000)
+    repository.connect = counter
+    latencies = []
+
+    def login(i):
+        username = users[i % len(users)]
+        start = time.perf_counter()
+        assert auth.login_user(username, 'benchmark-password'), f"login failed for {username}"
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(login, range(args.concurrency)))  # warm-up
+        latencies.clear()
+        start = time.perf_counter()
+        list(executor.map(login, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    stats = auth.pool_stats()
+    auth.close_pool()
+    latencies.sort()
+    return {
+        "throughput": args.requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "connects": counter.opened,
+        "peak_open": counter.peak,
+        "waited": stats['waited'] if stats else 0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Login throughput of src/auth.py with and without the connection pool.")
+    parser.add_argument('--backend', choices=tuple(auth.USER_STORES), default='sqlite',
+                        help="sqlite uses a scratch database file; mysql uses the DB_* settings")
+    parser.add_argument('--connect-latency-ms', type=float, default=0.0,
+                        help="Added to every new connection, to emulate a MySQL TCP and auth handshake with SQLite")
+    parser.add_argument('--concurrency', type=int, default=40, help="Threads calling login (FastAPI's threadpool has 40)")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--pool-size', type=int, default=auth.DB_POOL_SIZE or 10)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        auth.USER_STORE = args.backend
+        auth.USER_DB_PATH = os.path.join(root, 'users.db')
+        auth.DB_POOL_SIZE = 0
+        auth.init_db()
+        run_id = f"{int(time.time())}-{os.getpid()}"
+        users = [f"poolbench-{run_id}-{i}" for i in range(args.users)]
+        for username in users:
+            auth.add_user(username, 'benchmark-password', 'Pool Bench', 'pool@example.com', '000')
+
+        print(f"{args.backend}, {args.concurrency} threads, {args.requests} logins, "
+              f"+{args.connect_latency_ms:g} ms per connect")
+        print(f"{'mode':>14}  {'logins/s':>9}  {'p50 ms':>8}  {'p99 ms':>8}  {'connects':>8}  {'peak open':>9}  {'waited':>6}")
+        for name, size in (('no pool', 0), (f'pool of {args.pool_size}', args.pool_size)):
+            result = run(size, args, users)
+            print(f"{name:>14}  {result['throughput']:>9.0f}  {result['p50_ms']:>8.2f}  {result['p99_ms']:>8.2f}"
+                  f"  {result['connects']:>8}  {result['peak_open']:>9}  {result['waited']:>6}")
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from model import ForestFirePredictor
+from optimize import fuse_for_inference
+
+BATCH_SIZES = [1, 8]
+WARMUP = 3
+ITERATIONS = 20
+
+
+def per_image_latency(model, batch_size, iterations=ITERATIONS):
+    inputs = torch.randn(batch_size, 3, 224, 224)
+    with torch.no_grad():
+        for _ in range(WARMUP):
+            model(inputs)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            model(inputs)
+    return (time.perf_counter() - start) / (iterations * batch_size)
+
+
+if __name__ == '__main__':
+    model_path = os.path.join('models', 'forest_fire_model.pth')
+    model = ForestFirePredictor()
+    if os.path.exists(model_path):
+        model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    else:
+        print(f"{model_path} not found, benchmarking randomly initialised weights")
+    model.eval()
+    fused = fuse_for_inference(model)
+
+    print(f"torch {torch.__version__}, {torch.get_num_threads()} threads")
+    print(f"{'batch':>5}  {'eager ms/img':>12}  {'fused ms/img':>12}  {'speedup':>7}")
+    for batch_size in BATCH_SIZES:
+        eager = per_image_latency(model, batch_size)
+        folded = per_image_latency(fused, batch_size)
+        print(f"{batch_size:>5}  {eager * 1000:>12.2f}  {folded * 1000:>12.2f}  {eager / folded:>6.2f}x")
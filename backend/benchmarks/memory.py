@@ -0,0 +1,58 @@
+import ctypes
+import ctypes.util
+import threading
+
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class MemorySampler:
+    """Samples a process's RSS in the background to catch the peak."""
+
+    def __init__(self, pid, interval=0.02):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            rss = rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append(rss_mb(self.pid))
+
+    def summary(self):
+        samples = [sample for sample in self.samples if sample is not None]
+        if not samples:
+            return {"rss_start_mb": None, "rss_peak_mb": None, "rss_end_mb": None}
+        return {"rss_start_mb": samples[0], "rss_peak_mb": max(samples), "rss_end_mb": samples[-1]}
+
+
+def release_memory():
+    """Hand freed heap back to the OS (glibc only) so RSS deltas start level."""
+    libc = ctypes.util.find_library('c')
+    if libc:
+        try:
+            ctypes.CDLL(libc).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
@@ -0,0 +1,291 @@
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import torch
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'src'))
+
+from model import ForestFirePredictor
+from data_preprocessing import data_transforms, load_image
+from optimize import fuse_for_inference, script_for_inference
+from weights import load_state_dict
+from memory import MemorySampler, release_memory
+
+BASELINE_PATH = os.path.join(BACKEND_DIR, 'benchmarks', 'baselines', 'model.json')
+
+VARIANTS = ('eager', 'fused', 'torchscript', 'int8', 'onnx', 'compile')
+DEFAULT_VARIANTS = ('eager', 'fused', 'torchscript', 'int8', 'onnx')
+MEMORY_FORMATS = {'contiguous': torch.contiguous_format, 'channels_last': torch.channels_last}
+TRANSFORM_SIZES = ((224, 224), (640, 480), (1920, 1080))
+
+# Memory growth below this is treated as noise when comparing.
+MEMORY_NOISE_MB = 16
+
+
+def load_model():
+    for path in (os.path.join('models', 'forest_fire_model.safetensors'), os.path.join('models', 'forest_fire_model.pth')):
+        if os.path.exists(path):
+            model = ForestFirePredictor()
+            model.load_state_dict(load_state_dict(path))
+            return model.eval(), path
+    torch.manual_seed(0)
+    return ForestFirePredictor().eval(), None
+
+
+def build_variant(model, variant, memory_format, threads):
+    """Return ``predict(batch)`` for one variant, or None if it doesn't apply."""
+    if variant == 'onnx':
+        if memory_format != 'contiguous':
+            return None
+        try:
+            from backends import OnnxRuntimeBackend
+            from onnx_export import export_onnx
+        except ImportError:
+            return None
+        path = os.path.join(tempfile.mkdtemp(), 'model.onnx')
+        backend = OnnxRuntimeBackend(export_onnx(model, path), intra_op_threads=threads)
+        return backend.predict
+
+    if variant == 'eager':
+        module = model
+    elif variant == 'fused':
+        module = fuse_for_inference(model)
+    elif variant == 'torchscript':
+        module = script_for_inference(fuse_for_inference(model).to(memory_format=MEMORY_FORMATS[memory_format]))
+    elif variant == 'int8':
+        from quantization import quantize_model
+        torch.manual_seed(0)
+        module = quantize_model(model, [torch.randn(8, 3, 224, 224) for _ in range(4)])
+    elif variant == 'compile':
+        module = torch.compile(fuse_for_inference(model), dynamic=True)
+    else:
+        raise ValueError(f"Unknown variant '{variant}', expected one of {VARIANTS}")
+    if variant != 'torchscript':
+        module = module.to(memory_format=MEMORY_FORMATS[memory_format])
+
+    def predict(batch):
+        with torch.no_grad():
+            return module(batch)
+    return predict
+
+
+def time_calls(call, warmup, min_iterations, min_seconds):
+    for _ in range(warmup):
+        call()
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < min_iterations or time.perf_counter() - start < min_seconds:
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies
+
+
+def measure(call, items_per_call, args):
+    """Latency percentiles, items/s and peak RSS growth for ``call``."""
+    gc.collect()
+    release_memory()
+    with MemorySampler(os.getpid(), interval=0.005) as memory:
+        latencies = time_calls(call, args.warmup, args.min_iterations, args.min_seconds)
+    rss = memory.summary()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "items_per_second": items_per_call * len(latencies) / sum(latencies),
+        "peak_rss_growth_mb": rss['rss_peak_mb'] - rss['rss_start_mb'] if rss['rss_start_mb'] is not None else None,
+        "iterations": len(latencies),
+    }
+
+
+def sample_image(width, height):
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def run_sweep(args, only=None):
+    """Run every benchmark selected by ``args`` (or just the keys in ``only``)."""
+    results = {}
+    model, weights = load_model()
+    print(f"weights: {weights or 'random init'}, torch {torch.__version__}, {os.cpu_count()} cpus")
+
+    def wanted(key):
+        return only is None or key in only
+
+    print(f"{'benchmark':<46}  {'p50 ms':>8}  {'p95 ms':>8}  {'items/s':>9}  {'+MB':>6}")
+
+    def report(key, result):
+        results[key] = result
+        growth = result['peak_rss_growth_mb']
+        print(f"{key:<46}  {result['p50_ms']:>8.2f}  {result['p95_ms']:>8.2f}  {result['items_per_second']:>9.1f}"
+              f"  {growth if growth is not None else float('nan'):>6.1f}")
+
+    torch.set_num_threads(max(args.threads))
+    for width, height in TRANSFORM_SIZES:
+        contents = sample_image(width, height)
+        image = load_image(io.BytesIO(contents))
+        if wanted(f"transform/{width}x{height}"):
+            report(f"transform/{width}x{height}", measure(lambda: data_transforms(image), 1, args))
+        if wanted(f"decode+transform/{width}x{height}"):
+            report(f"decode+transform/{width}x{height}",
+                   measure(lambda: data_transforms(load_image(io.BytesIO(contents))), 1, args))
+
+    for variant in args.variants:
+        for memory_format in args.formats:
+            for threads in args.threads:
+                keys = {batch_size: f"model/{variant}/{memory_format}/t{threads}/b{batch_size}"
+                        for batch_size in args.batch_sizes}
+                keys = {batch_size: key for batch_size, key in keys.items() if wanted(key)}
+                torch.set_num_threads(threads)
+                predict = build_variant(model, variant, memory_format, threads) if keys else None
+                if predict is None:
+                    continue
+                for batch_size, key in keys.items():
+                    batch = torch.randn(batch_size, 3, 224, 224).contiguous(memory_format=MEMORY_FORMATS[memory_format])
+                    report(key, measure(lambda: predict(batch), batch_size, args))
+                del predict
+    return results
+
+
+def environment():
+    return {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "torch": torch.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def best_of(first, second):
+    """Merge two runs of the same benchmarks, keeping each one's best numbers."""
+    merged = dict(first)
+    for key, result in second.items():
+        old = merged.get(key)
+        if old is None:
+            merged[key] = result
+            continue
+        merged[key] = dict(
+            old,
+            p50_ms=min(old['p50_ms'], result['p50_ms']),
+            p95_ms=min(old['p95_ms'], result['p95_ms']),
+            items_per_second=max(old['items_per_second'], result['items_per_second']),
+        )
+        growth = [mb for mb in (old['peak_rss_growth_mb'], result['peak_rss_growth_mb']) if mb is not None]
+        merged[key]['peak_rss_growth_mb'] = min(growth) if growth else None
+    return merged
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """Return ``{key: [messages]}`` for throughput or latency worse than the
+    baseline by more than ``threshold`` percent, or memory growth by more
+    than ``memory_threshold`` percent (and MEMORY_NOISE_MB)."""
+    regressions = {}
+    for key, old in sorted(baseline['results'].items()):
+        new = results.get(key)
+        if new is None:
+            continue
+        throughput = (old['items_per_second'] - new['items_per_second']) / old['items_per_second'] * 100
+        latency = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+        messages = []
+        if throughput > threshold:
+            messages.append(f"{key}: throughput {old['items_per_second']:.1f} -> {new['items_per_second']:.1f} items/s (-{throughput:.1f}%)")
+        if latency > threshold:
+            messages.append(f"{key}: p50 {old['p50_ms']:.2f} -> {new['p50_ms']:.2f} ms (+{latency:.1f}%)")
+        old_mb, new_mb = old.get('peak_rss_growth_mb'), new.get('peak_rss_growth_mb')
+        if old_mb is not None and new_mb is not None and new_mb - old_mb > MEMORY_NOISE_MB \
+                and new_mb > old_mb * (1 + memory_threshold / 100):
+            messages.append(f"{key}: peak memory growth {old_mb:.1f} -> {new_mb:.1f} MB")
+        if messages:
+            regressions[key] = messages
+    return regressions
+
+
+def parse_list(text, cast=str):
+    return [cast(item) for item in text.split(',') if item.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark ForestFirePredictor and data_transforms, and compare against a stored baseline.")
+    parser.add_argument('--variants', default=','.join(DEFAULT_VARIANTS), help=f"Comma-separated, from {', '.join(VARIANTS)}")
+    parser.add_argument('--formats', default=','.join(MEMORY_FORMATS), help="contiguous,channels_last")
+    parser.add_argument('--batch-sizes', default='1,8,32')
+    parser.add_argument('--threads', default=','.join(str(n) for n in sorted({1, os.cpu_count() or 1})))
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--min-iterations', type=int, default=5)
+    parser.add_argument('--min-seconds', type=float, default=1.0, help="Minimum timed seconds per benchmark")
+    parser.add_argument('--output', help="Write this run's results as JSON")
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PATH, help="Store this run as the baseline")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, help="Compare this run against a baseline")
+    parser.add_argument('--threshold', type=float, default=15.0, help="Percent slowdown flagged as a regression")
+    parser.add_argument('--memory-threshold', type=float, default=25.0, help="Percent memory growth flagged as a regression")
+    args = parser.parse_args()
+    args.variants = parse_list(args.variants)
+    args.formats = parse_list(args.formats)
+    args.batch_sizes = parse_list(args.batch_sizes, int)
+    args.threads = parse_list(args.threads, int)
+    for variant in args.variants:
+        if variant not in VARIANTS:
+            parser.error(f"unknown variant '{variant}'")
+
+    # Output paths are relative to where the command was run; models/ is
+    # read from backend/.
+    paths = {name: os.path.abspath(getattr(args, name)) if getattr(args, name) else None
+             for name in ('output', 'save_baseline', 'compare')}
+    os.chdir(BACKEND_DIR)
+    # torch.jit deprecation notices from the torchscript/int8 variants.
+    warnings.filterwarnings('ignore', category=FutureWarning)
+
+    baseline = None
+    if paths['compare']:
+        with open(paths['compare']) as f:
+            baseline = json.load(f)
+        # Skip variants the baseline doesn't cover.
+        keys = baseline['results']
+        args.variants = [v for v in args.variants if any(k.startswith(f"model/{v}/") for k in keys)]
+
+    report = {"meta": environment(), "results": run_sweep(args)}
+    for path in (paths['output'], paths['save_baseline']):
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            print(f"Results written to {path}")
+
+    if baseline is not None:
+        for field in ('torch', 'processor', 'cpus'):
+            if baseline['meta'].get(field) != report['meta'][field]:
+                print(f"warning: baseline {field} is {baseline['meta'].get(field)!r}, this machine has {report['meta'][field]!r}")
+        regressions = compare(report['results'], baseline, args.threshold, args.memory_threshold)
+        if regressions:
+            # A single slow run on a busy machine isn't a regression: measure
+            # the flagged benchmarks again and keep the better numbers.
+            print(f"Re-running {len(regressions)} flagged benchmarks to rule out noise")
+            report['results'] = best_of(report['results'], run_sweep(args, only=set(regressions)))
+            regressions = compare(report['results'], baseline, args.threshold, args.memory_threshold)
+        missing = sorted(set(baseline['results']) - set(report['results']))
+        if missing:
+            print(f"{len(missing)} baseline benchmarks were not run (different --threads/--batch-sizes/--formats?)")
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0f}%:")
+            for messages in regressions.values():
+                for line in messages:
+                    print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0f}% against {paths['compare']}")
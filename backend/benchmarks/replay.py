@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import uuid
+
+import httpx
+
+from api_load import percentile, satellite_image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from tracing import REDACTED
+
+# Routes with side effects outside the server (email) or on its state
+# (model activation) are skipped unless asked for.
+SKIPPED_PREFIXES = ('/admin', '/contact', '/send-alert', '/send-report')
+
+# Traces never hold passwords. Replay registers its own accounts with
+# REPLAY_PASSWORD, and sends WRONG_PASSWORD for logins the trace recorded as
+# failed.
+REPLAY_PASSWORD = 'replay-password'
+WRONG_PASSWORD = 'replay-wrong-password'
+
+
+def load_trace(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                if record.get('level') == 'trace' and record.get('route'):
+                    records.append(record)
+    records.sort(key=lambda record: record['started_at'])
+    return records
+
+
+def materialize(value, suffix='', password=REPLAY_PASSWORD):
+    """Turn an anonymized JSON body back into something the API accepts:
+    each ``anon:<token>:<len>`` string becomes the token repeated to the
+    original length (a valid address for emails), and a redacted password
+    becomes ``password``. ``suffix`` is appended to usernames so each replay
+    run registers fresh accounts. Redacted session tokens are sent as they
+    are; the server rejects them, as it would an expired recorded token."""
+    if isinstance(value, dict):
+        return {
+            key: password if key == 'password' and item == REDACTED
+            else materialize(item, suffix if key == 'username' else '', password)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [materialize(item, password=password) for item in value]
+    if isinstance(value, str) and value.startswith('anon:'):
+        _, token, length, *kind = value.split(':')
+        if kind == ['email']:
+            return f"u{token}@example.com"
+        return (token * math.ceil(int(length) / len(token)))[:int(length)] + suffix
+    return value
+
+
+class Payloads:
+    """Upload bodies for replay: the recorded sample when the trace has one,
+    otherwise a synthetic aerial image close to the recorded size."""
+
+    def __init__(self, sample_dir):
+        self.sample_dir = sample_dir
+        self._synthetic = {}
+
+    def file(self, part):
+        if part.get('sample') and self.sample_dir:
+            path = os.path.join(self.sample_dir, part['sample'])
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+        # Bucket sizes to ~10% so a long trace needs few distinct images.
+        bucket = round(math.log(max(part['bytes'], 1024), 1.1))
+        if bucket not in self._synthetic:
+            self._synthetic[bucket] = self.image_near(int(1.1 ** bucket))
+        return self._synthetic[bucket]
+
+    @staticmethod
+    def image_near(target_bytes):
+        side = 256
+        image = satellite_image(side, side, seed=0)
+        for _ in range(3):
+            side = max(32, min(8192, int(side * math.sqrt(target_bytes / len(image)))))
+            image = satellite_image(side, side, seed=0)
+        return image
+
+
+def build_request(record, payloads, suffix):
+    request = {"method": record['method'], "url": record['path'] + (f"?{record['query']}" if record.get('query') else '')}
+    password = WRONG_PASSWORD if record['route'] == '/login' and record['status'] == 401 else REPLAY_PASSWORD
+    if 'json' in record:
+        request['json'] = materialize(record['json'], suffix, password)
+    elif 'parts' in record:
+        files, data = [], {}
+        for part in record['parts']:
+            if 'value' in part:
+                data[part['name']] = materialize(part['value'])
+            else:
+                filename = f"upload{part.get('extension') or '.jpg'}"
+                files.append((part['name'], (filename, payloads.file(part), part.get('content_type') or 'application/octet-stream')))
+        request['files'] = files
+        request['data'] = data
+    return request
+
+
+async def seed_users(client, records, suffix):
+    """Register, with REPLAY_PASSWORD, the accounts behind recorded logins
+    (failed ones too, so they fail on the password rather than a missing
+    user), except those the trace registers itself."""
+    accounts, registered = [], set()
+    for record in records:
+        if 'json' not in record:
+            continue
+        username = materialize(record['json'], suffix).get('username')
+        if record['route'] == '/register':
+            registered.add(username)
+        elif record['route'] == '/login' and username not in registered and username not in accounts:
+            accounts.append(username)
+    for username in accounts:
+        await client.post('/register', json={
+            "username": username, "password": REPLAY_PASSWORD,
+            "fullname": "Replay", "email": "replay@example.com", "phone": "000",
+        })
+    return len(accounts)
+
+
+async def replay(records, args):
+    payloads = Payloads(args.sample_dir)
+    suffix = f"-{uuid.uuid4().hex[:6]}"
+    limits = httpx.Limits(max_connections=args.concurrency)
+    results = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        if args.login:
+            # Traces don't record credentials; send one account's access token
+            # (valid for the server's SESSION_ACCESS_TTL) with every request.
+            username, _, password = args.login.partition(':')
+            session = await client.post('/login', json={"username": username, "password": password})
+            session.raise_for_status()
+            client.headers['Authorization'] = f"Bearer {session.json()['access_token']}"
+        seeded = await seed_users(client, records, suffix) if args.seed_users else 0
+        requests = [(record, build_request(record, payloads, suffix)) for record in records]
+        origin = records[0]['started_at'] if records else 0
+
+        async def send(record, request, due):
+            if args.speed > 0:
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    status = (await client.request(**request)).status_code
+                except httpx.HTTPError:
+                    status = None
+                results.append({
+                    "route": f"{record['method']} {record['route']}",
+                    "status": status,
+                    "recorded_status": record['status'],
+                    "latency_ms": (time.perf_counter() - start) * 1000,
+                    "lag_ms": (start - due) * 1000 if args.speed > 0 else 0.0,
+                })
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            send(record, request, start + (record['started_at'] - origin) / args.speed if args.speed > 0 else start)
+            for record, request in requests
+        ))
+        elapsed = time.perf_counter() - start
+    return results, elapsed, seeded
+
+
+def summarize(results):
+    routes = {}
+    for result in results:
+        routes.setdefault(result['route'], []).append(result)
+    summary = {}
+    for route, rows in sorted(routes.items()):
+        latencies = sorted(row['latency_ms'] for row in rows)
+        lags = sorted(row['lag_ms'] for row in rows)
+        summary[route] = {
+            "requests": len(rows),
+            "errors": sum(1 for row in rows if row['status'] is None or row['status'] >= 500),
+            "status_mismatches": sum(1 for row in rows if row['status'] != row['recorded_status']),
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "p99_lag_ms": percentile(lags, 0.99),
+        }
+    return summary
+
+
+def run(args):
+    records = load_trace(args.trace)
+    if not args.include_side_effects:
+        records = [record for record in records if not record['route'].startswith(SKIPPED_PREFIXES)]
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        raise SystemExit(f"No replayable requests in {args.trace}")
+
+    span = records[-1]['started_at'] - records[0]['started_at']
+    pace = f"{args.speed:g}x" if args.speed > 0 else "as fast as possible"
+    print(f"Replaying {len(records)} requests ({span:.1f}s of traffic) against {args.url} at {pace}")
+    results, elapsed, seeded = asyncio.run(replay(records, args))
+    summary = summarize(results)
+
+    print(f"{'route':<28}  {'count':>6}  {'errors':>6}  {'status!=':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}")
+    for route, row in summary.items():
+        print(f"{route:<28}  {row['requests']:>6}  {row['errors']:>6}  {row['status_mismatches']:>8}"
+              f"  {row['p50_ms']:>8.1f}  {row['p95_ms']:>8.1f}  {row['p99_ms']:>8.1f}")
+    print(f"{elapsed:.1f}s elapsed, {len(results) / elapsed:.1f} req/s, {seeded} accounts seeded")
+
+    if args.output:
+        report = {
+            "meta": {"label": args.label or args.url, "url": args.url, "trace": os.path.abspath(args.trace),
+                     "speed": args.speed, "concurrency": args.concurrency, "elapsed_seconds": elapsed,
+                     "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z')},
+            "routes": summary,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+def delta(old, new):
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+def compare(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print(f"before: {before['meta']['label']}  after: {after['meta']['label']}")
+    print(f"{'route':<28}  {'p50 ms':>17}  {'p95 ms':>17}  {'p99 ms':>17}  {'error rate':>15}")
+    for route in sorted(set(before['routes']) | set(after['routes'])):
+        old, new = before['routes'].get(route), after['routes'].get(route)
+        if old is None or new is None:
+            print(f"{route:<28}  only in {'after' if old is None else 'before'}")
+            continue
+        columns = [f"{new[key]:>8.1f} {delta(old[key], new[key]):>8}" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        errors = f"{old['errors'] / old['requests']:>6.1%} -> {new['errors'] / new['requests']:<6.1%}"
+        print(f"{route:<28}  {'  '.join(columns)}  {errors:>15}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a TRACE_PATH request trace against a server and compare runs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Replay a trace against a running server")
+    run_parser.add_argument('trace')
+    run_parser.add_argument('--url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--speed', type=float, default=1.0,
+                            help="1 replays in real time, N is N times faster, 0 sends as fast as possible")
+    run_parser.add_argument('--concurrency', type=int, default=64, help="Maximum requests in flight")
+    run_parser.add_argument('--timeout', type=float, default=300)
+    run_parser.add_argument('--sample-dir', help="TRACE_SAMPLE_DIR of a trace recorded with TRACE_PAYLOADS=sample")
+    run_parser.add_argument('--login', metavar='USER:PASSWORD',
+                            help="Log in first and send the session token, for servers with AUTH_REQUIRED=1")
+    run_parser.add_argument('--seed-users', action='store_true', help="Register the accounts behind recorded logins first")
+    run_parser.add_argument('--include-side-effects', action='store_true',
+                            help=f"Also replay {', '.join(SKIPPED_PREFIXES)} (sends email, changes models)")
+    run_parser.add_argument('--limit', type=int, help="Only replay the first N requests")
+    run_parser.add_argument('--label', help="Name for this build in compare output")
+    run_parser.add_argument('--output', help="Write per-route results as JSON, for compare")
+
+    compare_parser = commands.add_parser('compare', help="Latency and error deltas between two replay results")
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
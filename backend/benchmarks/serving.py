@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each mode is the Python that starts the server. /predict never touches the
+# database, so --skip-db-init lets this run without MySQL.
+SINGLE_PROCESS = "import uvicorn, api\n{db}uvicorn.run(api.app, host='127.0.0.1', port={port}, log_level='warning')"
+PRE_FORK = "import sys, api, serve\n{db}sys.argv = ['serve.py', '--port', '{port}'] + {extra}\nserve.main()"
+SKIP_DB_INIT = "api.auth.init_db = lambda: None\n"
+
+
+def sample_image(size=(640, 480)):
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+async def wait_ready(url, process, timeout=300):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+async def drive(url, image, concurrency, requests):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client_loop(client):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post(f"{url}/predict", files={'file': ('scene.jpg', image, 'image/jpeg')})
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+def run_mode(code, port, args):
+    env = dict(os.environ, PREDICTION_CACHE_SIZE='0')  # every request must reach the model
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=os.getcwd(), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(url, process))
+        image = sample_image()
+        # Warm the connection pool and any lazily started workers.
+        asyncio.run(drive(url, image, args.concurrency, args.concurrency))
+        return asyncio.run(drive(url, image, args.concurrency, args.requests))
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare /predict throughput of api.py against serve.py.")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--skip-db-init', action='store_true', help="Don't connect to MySQL at startup")
+    parser.add_argument('--serve-args', default='', help="Extra serve.py arguments, e.g. '--workers 4 --pin'")
+    args = parser.parse_args()
+
+    # The servers run from backend/ so api.py finds src/ and models/.
+    if not os.path.exists('api.py'):
+        os.chdir(BACKEND_DIR)
+    db = SKIP_DB_INIT if args.skip_db_init else ''
+    modes = [
+        ('single process', SINGLE_PROCESS.format(db=db, port=args.port)),
+        ('pre-fork', PRE_FORK.format(db=db, port=args.port + 1, extra=args.serve_args.split())),
+    ]
+
+    print(f"{os.cpu_count()} cpus, concurrency {args.concurrency}, {args.requests} requests")
+    print(f"{'mode':>14}  {'req/s':>7}  {'p50 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+    for offset, (name, code) in enumerate(modes):
+        result = run_mode(code, args.port + offset, args)
+        print(f"{name:>14}  {result['throughput']:7.1f}  {result['p50_ms']:8.1f}  {result['p99_ms']:8.1f}  {result['errors']:>6}")
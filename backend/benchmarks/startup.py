@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports api, runs its lifespan to readiness and prints api.startup_timings.
+STARTUP = """
+import asyncio, json, api
+{db}
+async def main():
+    async with api.app.router.lifespan_context(api.app):
+        pass
+asyncio.run(main())
+print('STARTUP ' + json.dumps(api.startup_timings))
+"""
+SKIP_DB_INIT = "api.auth.init_db = lambda: None"
+
+# Top-level packages whose import cost is broken out.
+PACKAGES = ('torch', 'torchvision', 'fastapi', 'fastapi_mail', 'pydantic', 'mysql', 'numpy', 'PIL', 'src')
+
+
+def run_startup(skip_db_init):
+    code = STARTUP.format(db=SKIP_DB_INIT if skip_db_init else '')
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('STARTUP '))
+    return json.loads(line[len('STARTUP '):])
+
+
+def import_breakdown():
+    # -X importtime prints cumulative microseconds per module to stderr;
+    # keep the first-level imports of api.
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import api'],
+                            capture_output=True, text=True, check=True).stderr
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('   ') and not name.startswith('    '):
+            package = name.strip().split('.')[0]
+            if package in PACKAGES:
+                totals[package] = totals.get(package, 0) + int(cumulative) / 1e6
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure API import time and time-to-ready per startup step.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--skip-db-init', action='store_true', help="Don't connect to MySQL at startup")
+    args = parser.parse_args()
+
+    # Run from backend/ so api.py finds src/ and models/.
+    if not os.path.exists('api.py'):
+        os.chdir(BACKEND_DIR)
+
+    runs = [run_startup(args.skip_db_init) for _ in range(args.runs)]
+    print(f"Startup over {args.runs} runs (median seconds)")
+    for step in runs[0]:
+        print(f"  {step:>14}: {statistics.median(run[step] for run in runs):.3f}")
+
+    print("Import time of api's direct dependencies (seconds, one run)")
+    for package, seconds in sorted(import_breakdown().items(), key=lambda item: -item[1]):
+        print(f"  {package:>14}: {seconds:.3f}")
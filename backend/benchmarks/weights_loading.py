@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+WORKERS = int(os.getenv('BENCH_WORKERS', 4))
+PTH_PATH = os.path.join('models', 'forest_fire_model.pth')
+
+
+def memory_kb():
+    # Rss counts shared pages in full for every process; Pss splits them
+    # between the processes mapping them, so its sum is the real footprint.
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1])
+    return values
+
+
+def worker(method, path, barrier, results):
+    import torch
+    from model import ForestFirePredictor
+    from optimize import fuse_for_inference
+    from weights import load_state_dict
+
+    torch.set_num_threads(1)
+    baseline = memory_kb()
+    start = time.perf_counter()
+    if method == 'torch.load':
+        model = ForestFirePredictor()
+        model.load_state_dict(torch.load(path, map_location='cpu', weights_only=True))
+    else:
+        with torch.device('meta'):
+            model = ForestFirePredictor()
+        model.load_state_dict(load_state_dict(path), assign=True)
+    model = fuse_for_inference(model.eval())
+    with torch.no_grad():
+        model(torch.randn(1, 3, 224, 224))
+    load_seconds = time.perf_counter() - start
+
+    # Measure while every worker is alive and holding its model.
+    barrier.wait()
+    after = memory_kb()
+    results.put((load_seconds, after['Rss'] - baseline['Rss'], after['Pss'] - baseline['Pss']))
+    barrier.wait()
+
+
+def run(method, path):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(WORKERS)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(method, path, barrier, results)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+
+if __name__ == '__main__':
+    from weights import WEIGHTS_PATH
+
+    if not os.path.exists(PTH_PATH) or not os.path.exists(WEIGHTS_PATH):
+        print(f"Needs {PTH_PATH} and {WEIGHTS_PATH} (python src/weights.py converts one to the other)")
+        sys.exit(1)
+
+    cases = [('torch.load', PTH_PATH), ('torch.load mmap', PTH_PATH), ('safetensors mmap', WEIGHTS_PATH)]
+    print(f"{WORKERS} workers, model load + fuse + one forward each")
+    print(f"{'method':>16}  {'load s':>7}  {'RSS MB/worker':>13}  {'PSS MB total':>12}")
+    for method, path in cases:
+        rows = run(method, path)
+        load = sum(row[0] for row in rows) / len(rows)
+        rss = sum(row[1] for row in rows) / len(rows) / 1024
+        pss = sum(row[2] for row in rows) / 1024
+        print(f"{method:>16}  {load:7.3f}  {rss:13.1f}  {pss:12.1f}")
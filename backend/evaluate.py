@@ -1,3 +1,5 @@
+import argparse
+import time
 import torch
 import os
 import sys
@@ -5,7 +7,8 @@ import sys
 sys.path.insert(0, './src')
 
 from model import ForestFirePredictor
-from data_preprocessing import ForestFireDataset, data_transforms
+from data_preprocessing import ForestFireDataset, data_transforms, load_and_split_data
+from quantization import QUANTIZED_MODEL_PATH, calibration_loader, quantize_model, save_quantized_model, load_quantized_model
 
 def evaluate_model(model, test_loader, device='cpu'):
     model.to(device)
@@ -26,7 +29,51 @@ def evaluate_model(model, test_loader, device='cpu'):
     print(f"Accuracy of the model on the test images: {100 * accuracy:.2f}%")
     return accuracy
 
+def decode_batches(test_loader):
+    # Decode and transform the images once, so both models see identical
+    # tensors and the timing below covers only the forward passes.
+    return [(inputs, labels) for inputs, labels in test_loader if inputs.size(0) > 0]
+
+def timed_evaluate(model, batches, device='cpu'):
+    """Accuracy and forward-pass seconds per image over pre-decoded ``batches``."""
+    accuracy = evaluate_model(model, batches, device)
+    images = 0
+    elapsed = 0.0
+    with torch.no_grad():
+        model(batches[0][0].to(device))  # warm-up
+        for inputs, _ in batches:
+            inputs = inputs.to(device)
+            start = time.perf_counter()
+            model(inputs)
+            elapsed += time.perf_counter() - start
+            images += inputs.size(0)
+    return accuracy, elapsed / images
+
+def compare_quantized(model, quantized_model, batches, max_drop):
+    # Both run on CPU: that is where the int8 model is meant to be served.
+    print("Evaluating fp32 model...")
+    fp32_accuracy, fp32_time = timed_evaluate(model, batches, 'cpu')
+    print("Evaluating int8 model...")
+    int8_accuracy, int8_time = timed_evaluate(quantized_model, batches, 'cpu')
+
+    drop = fp32_accuracy - int8_accuracy
+    print(f"fp32: accuracy {100 * fp32_accuracy:.2f}%, {1000 * fp32_time:.2f} ms/image forward")
+    print(f"int8: accuracy {100 * int8_accuracy:.2f}%, {1000 * int8_time:.2f} ms/image forward")
+    print(f"Accuracy delta: {100 * (int8_accuracy - fp32_accuracy):+.2f} points, speedup: {fp32_time / int8_time:.2f}x")
+
+    if drop > max_drop:
+        print(f"FAIL: accuracy drop {100 * drop:.2f} points exceeds the allowed {100 * max_drop:.2f}")
+        return False
+    print("PASS: int8 model is within the accuracy budget")
+    return True
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate the forest fire model.")
+    parser.add_argument('--int8', action='store_true', help="Also evaluate the quantized model and gate on its accuracy drop")
+    parser.add_argument('--max-drop', type=float, default=0.01, help="Largest allowed accuracy drop for --int8 (fraction, default 0.01)")
+    parser.add_argument('--requantize', action='store_true', help="Recalibrate the int8 model even if an artifact exists")
+    args = parser.parse_args()
+
     DATA_DIR = 'data'
     MODEL_PATH = os.path.join('models', 'forest_fire_model.pth')
     BATCH_SIZE = 32
@@ -50,5 +97,37 @@ if __name__ == '__main__':
             print(f"Error: Model file not found at {MODEL_PATH}")
             sys.exit(1)
 
-        print("Evaluating model on all images...")
-        evaluate_model(model, all_loader, device)
+        if not args.int8:
+            print("Evaluating model on all images...")
+            evaluate_model(model, all_loader, device)
+            sys.exit(0)
+
+        model.eval()
+        candidate_path = None
+        if os.path.exists(QUANTIZED_MODEL_PATH) and not args.requantize:
+            print(f"Loading quantized model from {QUANTIZED_MODEL_PATH}")
+            quantized_model = load_quantized_model(QUANTIZED_MODEL_PATH)
+        else:
+            print("Calibrating quantized model...")
+            # Written beside the served artifact and only moved into place if
+            # it passes the accuracy gate; MODEL_PRECISION=int8 serves
+            # whatever is at QUANTIZED_MODEL_PATH.
+            candidate_path = f"{QUANTIZED_MODEL_PATH}.{os.getpid()}.tmp"
+            save_quantized_model(quantize_model(model, calibration_loader(DATA_DIR)), candidate_path)
+            # Gate the artifact exactly as it will be served.
+            quantized_model = load_quantized_model(candidate_path)
+
+        # Gate on the held-out test split only: calibration samples the
+        # training split, and scoring on images it saw would flatter int8.
+        print("Loading the held-out test split...")
+        _, _, test_loader = load_and_split_data(DATA_DIR, BATCH_SIZE, shuffle=False)
+        passed = compare_quantized(model, quantized_model, decode_batches(test_loader), args.max_drop)
+        if candidate_path is not None:
+            if passed:
+                os.replace(candidate_path, QUANTIZED_MODEL_PATH)
+                print(f"Quantized model saved to {QUANTIZED_MODEL_PATH}")
+            else:
+                os.remove(candidate_path)
+                print(f"Quantized model discarded; {QUANTIZED_MODEL_PATH} left unchanged")
+        if not passed:
+            sys.exit(1)
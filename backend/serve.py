@@ -0,0 +1,172 @@
+"""Pre-fork multi-worker launcher for the API.
+
+    python serve.py                      # auto-size from the available cores
+    python serve.py --workers 4 --threads 2 --pin
+
+The parent process loads the model once, binds the listening socket and then
+forks the workers, so the weights and the imported libraries stay shared
+copy-on-write between them. Each worker gets its own slice of the CPUs and
+sets ``torch.set_num_threads`` to the size of that slice; without this every
+worker would start one intra-op thread per core and N workers would run
+N x cores threads on cores CPUs. With ``--pin`` each worker is also bound to
+its slice with ``sched_setaffinity``. The API's inference pool
+(INFERENCE_WORKERS) is sized to the slice too, unless set explicitly.
+
+By default a worker gets 1 core on machines with fewer than 4 cores, and 2
+cores otherwise, so the micro-batches still use some intra-op parallelism.
+A worker that crashes is restarted; one that fails during startup stops the
+launcher. SIGINT/SIGTERM stop all workers.
+
+Throughput against the single-process ``python api.py`` can be measured
+with ``python benchmarks/serving.py``.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import torch
+
+# A worker that exits sooner than this after being forked is treated as a
+# startup failure rather than a crash to recover from.
+WORKER_MIN_UPTIME = 10
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_workers(cpus, workers=None, threads=None):
+    """Split ``cpus`` into one CPU set per worker.
+
+    Either count may be given; the other is derived so that
+    ``workers * threads`` covers the CPUs. If both are given and oversubscribe
+    the machine, the CPU sets wrap around and overlap.
+    """
+    count = len(cpus)
+    if workers is None and threads is None:
+        threads = 1 if count < 4 else 2
+    if workers is None:
+        workers = max(1, count // threads)
+    if threads is None:
+        threads = max(1, count // workers)
+    return [[cpus[(i * threads + j) % count] for j in range(threads)] for i in range(workers)]
+
+
+def run_worker(index, cpu_set, sock, args):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if args.pin and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpu_set)
+    torch.set_num_threads(len(cpu_set))
+
+    import api
+    import uvicorn
+    config = uvicorn.Config(api.app, log_level=args.log_level)
+    server = uvicorn.Server(config)
+    print(f"Worker {index} (pid {os.getpid()}): {len(cpu_set)} threads, cpus {cpu_set}{' pinned' if args.pin else ''}")
+    server.run(sockets=[sock])
+    # uvicorn returns normally when the app's startup fails.
+    return 0 if server.started else 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API from several pre-forked worker processes.")
+    parser.add_argument('--host', default=os.getenv('SERVE_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('SERVE_PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVE_WORKERS', 0)) or None,
+                        help="Worker processes (default: derived from the available cores)")
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SERVE_THREADS_PER_WORKER', 0)) or None,
+                        help="Torch intra-op threads per worker (default: derived from the available cores)")
+    parser.add_argument('--pin', action='store_true', default=os.getenv('SERVE_PIN_CPUS', '0') == '1',
+                        help="Pin each worker to its CPU slice")
+    parser.add_argument('--log-level', default='warning')
+    args = parser.parse_args()
+
+    plan = plan_workers(available_cpus(), args.workers, args.threads)
+    print(f"Starting {len(plan)} workers x {len(plan[0])} threads on http://{args.host}:{args.port}")
+
+    # api builds its inference thread pool at import, sized to every core
+    # unless INFERENCE_WORKERS is set, and the forked workers inherit it.
+    os.environ.setdefault('INFERENCE_WORKERS', str(len(plan[0])))
+    import api
+
+    if api.INFERENCE_BACKEND == 'torch':
+        # The parent never runs inference; one thread keeps it from starting
+        # an OpenMP pool that the forked workers would inherit half-alive.
+        torch.set_num_threads(1)
+        api.load_model_logic(warm_up=False)
+    # ONNX Runtime sessions own threads that don't survive fork(), so with
+    # that backend each worker loads the model in its own lifespan.
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = {}
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = run_worker(index, plan[index], sock, args)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                # Skip the parent's atexit handlers and buffers.
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(len(plan)):
+        spawn(index)
+
+    exit_code = 0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+        index, started = children.pop(pid)
+        if stopping:
+            continue
+        if time.monotonic() - started < WORKER_MIN_UPTIME:
+            # Failing during startup (e.g. database unreachable) would fail
+            # again; stop instead of restarting in a loop.
+            print(f"Worker {index} (pid {pid}) failed during startup (exit code {os.waitstatus_to_exitcode(status)}), shutting down")
+            exit_code = 1
+            stop(None, None)
+            continue
+        print(f"Worker {index} (pid {pid}) exited with code {os.waitstatus_to_exitcode(status)}, restarting")
+        spawn(index)
+    sock.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,40 @@
-import mysql.connector
-import hashlib
 import os
 from dotenv import load_dotenv
 
-# Robust .env loading
+try:
+    from db_pool import PoolTimeout
+    from user_store import USER_STORES, MySQLUserRepository, SQLiteUserRepository, make_hashes, check_hashes
+except ImportError:
+    from src.db_pool import PoolTimeout
+    from src.user_store import USER_STORES, MySQLUserRepository, SQLiteUserRepository, make_hashes, check_hashes
+
+# backend/.env; as in api.py, variables already set in the process
+# environment take precedence.
 from pathlib import Path
 env_path = Path(__file__).resolve().parent.parent / '.env'
-load_dotenv(dotenv_path=env_path, override=True)
+load_dotenv(dotenv_path=env_path)
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "forest_fire_db")
 
+# Where users live (see src/user_store.py): "mysql" for deployments sharing
+# one database across nodes, "sqlite" for a single node with no database
+# server, in the file at USER_DB_PATH.
+USER_STORE = os.getenv("USER_STORE", "mysql").lower()
+USER_DB_PATH = os.getenv("USER_DB_PATH", str(Path(__file__).resolve().parent.parent / 'users.db'))
+
+# Connection pool (see src/db_pool.py). DB_POOL_SIZE=0 opens a connection per
+# query as before.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))
+DB_POOL_CHECK_AFTER = float(os.getenv("DB_POOL_CHECK_AFTER", 30))
+
 def get_db_connection():
+    # Raw MySQL connection for maintenance scripts (test_db_boot.py etc.).
+    import mysql.connector
     return mysql.connector.connect(
         host=DB_HOST,
         user=DB_USER,
@@ -21,81 +42,73 @@ def get_db_connection():
         database=DB_NAME
     )
 
+def create_repository():
+    options = dict(
+        pool_size=DB_POOL_SIZE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        idle_timeout=DB_POOL_IDLE_TIMEOUT,
+        check_after=DB_POOL_CHECK_AFTER,
+        on_wait=lambda seconds: pool_wait_observer and pool_wait_observer(seconds),
+    )
+    if USER_STORE == 'sqlite':
+        return SQLiteUserRepository(USER_DB_PATH, **options)
+    if USER_STORE == 'mysql':
+        return MySQLUserRepository(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, **options)
+    raise ValueError(f"Unknown USER_STORE {USER_STORE!r}, expected one of {', '.join(USER_STORES)}")
+
+_repository = None
+_repository_pid = None
+# Set by the API to record how long each query waited for a connection.
+pool_wait_observer = None
+
+def get_repository():
+    # One repository (and pool) per process: a pre-forked worker must not
+    # reuse connections inherited from its parent.
+    global _repository, _repository_pid
+    if _repository is None or _repository_pid != os.getpid():
+        _repository = create_repository()
+        _repository_pid = os.getpid()
+    return _repository
+
+def use_repository(repository):
+    """Swap in another repository, e.g. a SQLite file in tests and benchmarks."""
+    global _repository, _repository_pid
+    close_pool()
+    _repository = repository
+    _repository_pid = os.getpid()
+    return repository
+
+def pool_stats():
+    return get_repository().pool_stats()
+
+def close_pool():
+    global _repository
+    if _repository is not None and _repository_pid == os.getpid():
+        _repository.close()
+    _repository = None
+
 def init_db():
-    conn = get_db_connection()
-    c = conn.cursor()
-    try:
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                fullname VARCHAR(255),
-                email VARCHAR(255),
-                phone VARCHAR(255),
-                profile_image LONGTEXT
-            )
-        ''')
-        conn.commit()
-    except mysql.connector.Error as e:
-        print(f"DB Init Error: {e}")
-    finally:
-        c.close()
-        conn.close()
-
-def make_hashes(password):
-    return hashlib.sha256(str.encode(password)).hexdigest()
-
-def check_hashes(password, hashed_text):
-    if make_hashes(password) == hashed_text:
-        return hashed_text
-    return False
+    get_repository().init_schema()
 
 def add_user(username, password, fullname, email, phone):
-    conn = get_db_connection()
-    c = conn.cursor()
-    try:
-        c.execute(
-            'INSERT INTO users(username, password, fullname, email, phone) VALUES (%s,%s,%s,%s,%s)', 
-            (username, make_hashes(password), fullname, email, phone)
-        )
-        conn.commit()
-    except mysql.connector.Error:
-        return False
-    finally:
-        c.close()
-        conn.close()
-    return True
+    return get_repository().add_user(username, password, fullname, email, phone)
 
 def login_user(username, password):
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT * FROM users WHERE username =%s AND password = %s', (username, make_hashes(password)))
-    data = c.fetchall()
-    c.close()
-    conn.close()
-    return data
+    # Rows are (id, username, fullname, email, phone, profile_image) whichever
+    # store is configured; the password hash is never read back.
+    return get_repository().login(username, password)
 
 def update_user_profile(username, email, phone, profile_image=None):
-    conn = get_db_connection()
-    c = conn.cursor()
-    try:
-        if profile_image:
-            # Update image as well if provided
-            c.execute(
-                'UPDATE users SET email=%s, phone=%s, profile_image=%s WHERE username=%s',
-                (email, phone, profile_image, username)
-            )
-        else:
-            c.execute(
-                'UPDATE users SET email=%s, phone=%s WHERE username=%s',
-                (email, phone, username)
-            )
-        conn.commit()
-        return True
-    except mysql.connector.Error as e:
-        print(f"Error updating profile: {e}")
-        return False
-    finally:
-        c.close()
-        conn.close()
+    return get_repository().update_profile(username, email, phone, profile_image)
+
+def set_profile_image(username, profile_image):
+    return get_repository().set_profile_image(username, profile_image)
+
+def revoke_token(jti, expires_at):
+    return get_repository().revoke_token(jti, expires_at)
+
+def revoked_tokens(now):
+    return get_repository().revoked_tokens(now)
+
+def purge_revoked_tokens(now):
+    get_repository().purge_revoked_tokens(now)
@@ -0,0 +1,109 @@
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+AVATAR_DIR = 'avatars'
+# Square renditions generated at upload, by name and edge in pixels.
+AVATAR_SIZES = {'64': 64, '256': 256, '512': 512}
+DEFAULT_SIZE = '256'
+AVATAR_REF = re.compile(r'^[0-9a-f]{64}$')
+DATA_URL = re.compile(r'^data:image/[\w.+-]+;base64,', re.IGNORECASE)
+
+
+class AvatarError(ValueError):
+    pass
+
+
+def decode_data_url(value):
+    """Bytes of a ``data:image/...;base64,`` URL, as the old profile form sent."""
+    match = DATA_URL.match(value)
+    if not match:
+        raise AvatarError("Not an image data URL")
+    try:
+        return base64.b64decode(value[match.end():], validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise AvatarError(f"Invalid base64 image data: {e}")
+
+
+def render(image, edge):
+    # Centre-crop to a square, then encode as WebP. Transparent images are
+    # flattened onto white.
+    square = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+    if square.mode in ('RGBA', 'LA', 'P'):
+        square = square.convert('RGBA')
+        background = Image.new('RGB', square.size, (255, 255, 255))
+        background.paste(square, mask=square.getchannel('A'))
+        square = background
+    elif square.mode != 'RGB':
+        square = square.convert('RGB')
+    out = io.BytesIO()
+    square.save(out, format='WEBP', quality=85, method=4)
+    return out.getvalue()
+
+
+class AvatarStore:
+    """Content-addressed avatar images on local disk.
+
+    An upload is keyed by the SHA-256 of its bytes, so the same picture is
+    stored once however many accounts use it, and a reference never changes
+    meaning: its renditions can be cached by clients forever. Only the small
+    reference goes in the users table. Each upload is decoded once and
+    written as one square WebP per AVATAR_SIZES entry under
+    ``directory/<ref[:2]>/<ref>/<size>.webp``; the original is not kept.
+    """
+
+    def __init__(self, directory=AVATAR_DIR, max_bytes=5 * 1024 * 1024, max_pixels=40_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+
+    def _dir(self, ref):
+        return os.path.join(self.directory, ref[:2], ref)
+
+    def path(self, ref, size=DEFAULT_SIZE):
+        if not AVATAR_REF.match(ref or '') or size not in AVATAR_SIZES:
+            return None
+        return os.path.join(self._dir(ref), f"{size}.webp")
+
+    def exists(self, ref):
+        path = self.path(ref, DEFAULT_SIZE)
+        return path is not None and os.path.exists(path)
+
+    def save(self, data):
+        """Store an uploaded image and return its reference."""
+        if len(data) > self.max_bytes:
+            raise AvatarError(f"Image larger than {self.max_bytes // (1024 * 1024)} MB")
+        ref = hashlib.sha256(data).hexdigest()
+        if self.exists(ref):
+            return ref
+        try:
+            image = Image.open(io.BytesIO(data))
+            if image.width * image.height > self.max_pixels:
+                raise AvatarError("Image has too many pixels")
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            raise AvatarError(f"Not a readable image: {e}")
+        renditions = {size: render(image, edge) for size, edge in AVATAR_SIZES.items()}
+
+        directory = self._dir(ref)
+        os.makedirs(directory, exist_ok=True)
+        # The default size is written last: exists() treats it as the marker
+        # that every rendition is complete.
+        for size in sorted(renditions, key=lambda size: size == DEFAULT_SIZE):
+            path = os.path.join(directory, f"{size}.webp")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(renditions[size])
+            os.replace(tmp_path, path)
+        return ref
+
+    @staticmethod
+    def etag(ref, size):
+        # Content addressed, so the reference and size identify the bytes.
+        return f'"{ref[:32]}-{size}"'
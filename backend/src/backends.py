@@ -0,0 +1,67 @@
+import time
+
+import torch
+
+INFERENCE_BACKENDS = ('torch', 'onnx')
+
+
+class InferenceBackend:
+    """Runs the classifier on a preprocessed batch.
+
+    Every backend takes the same ``(N, 3, 224, 224)`` float tensor produced by
+    ``data_transforms`` and returns an ``(N, num_classes)`` CPU tensor of
+    class probabilities, so the API formats responses identically whichever
+    backend is serving.
+    """
+
+    name = None
+    # Set by whoever loads the artifact: registry version and file sha256.
+    version = None
+    fingerprint = None
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+    def warm_up(self, batch_sizes, input_size=224, iterations=2):
+        """Run a few batches per size so kernels are compiled/tuned and the
+        allocator is primed before real traffic. Returns seconds per size."""
+        timings = {}
+        for batch_size in batch_sizes:
+            inputs = torch.randn(batch_size, 3, input_size, input_size)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                self.predict(inputs)
+            timings[batch_size] = time.perf_counter() - start
+        return timings
+
+
+class TorchBackend(InferenceBackend):
+    name = 'torch'
+
+    def __init__(self, module, device='cpu'):
+        self.module = module
+        self.device = torch.device(device)
+
+    def predict(self, batch):
+        with torch.no_grad():
+            logits = self.module(batch.to(self.device))
+            return torch.softmax(logits, dim=1).cpu()
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    name = 'onnx'
+
+    def __init__(self, path, intra_op_threads=None):
+        # Optional dependency: only needed when this backend is selected.
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        logits = self.session.run(None, {self.input_name: batch.cpu().numpy()})[0]
+        return torch.softmax(torch.from_numpy(logits), dim=1)
@@ -0,0 +1,59 @@
+import os
+import zipfile
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+ZIP_CONTENT_TYPES = ('application/zip', 'application/x-zip-compressed', 'application/x-zip')
+
+
+def is_zip_upload(upload):
+    return upload.content_type in ZIP_CONTENT_TYPES or (upload.filename or '').lower().endswith('.zip')
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def open_zip_images(fileobj, max_total_bytes):
+    """Open a ZIP upload and list its image members.
+
+    Returns ``(archive, members)``. Only the central directory is read here;
+    members are inflated one at a time by ``read_zip_member``. Directories,
+    hidden files (e.g. macOS ``__MACOSX`` metadata) and non-image members are
+    skipped. Raises ArchiveError when the images would inflate to more than
+    ``max_total_bytes`` in total.
+    """
+    archive = zipfile.ZipFile(fileobj)
+    members = []
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        basename = os.path.basename(info.filename)
+        if basename.startswith('.') or info.filename.startswith('__MACOSX/'):
+            continue
+        if not basename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        members.append(info)
+    total = sum(info.file_size for info in members)
+    if total > max_total_bytes:
+        archive.close()
+        raise ArchiveError(f"Archive images inflate to {total} bytes, more than the {max_total_bytes} allowed")
+    return archive, members
+
+
+def read_zip_member(archive, info, max_member_bytes):
+    # zipfile stops inflating at the declared file_size (and fails the CRC
+    # check if the data runs longer), so checking it bounds the memory used.
+    if info.file_size > max_member_bytes:
+        raise ArchiveError(f"Member inflates to {info.file_size} bytes, more than the {max_member_bytes} allowed")
+    return archive.read(info)
+
+
+async def chunked(aiterable, size):
+    chunk = []
+    async for item in aiterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
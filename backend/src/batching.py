@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import Counter
+
+
+class BatchingEngine:
+    """Collects concurrent inference requests and runs them as one batch.
+
+    Callers ``await engine.submit(item)`` and get back their own result. The
+    queued items are flushed through ``run_batch`` as soon as ``max_batch_size``
+    items are waiting or the oldest item has waited ``max_wait_ms``.
+
+    ``run_batch`` receives a list of items and must return a list of results
+    in the same order. It is run in ``executor`` (the loop's default executor
+    when None) so the event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=5.0, executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+
+        self._queue = None
+        self._worker = None
+        self._batch_sizes = Counter()
+        self._items_processed = 0
+        self._batches_failed = 0
+
+    async def start(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # Fail anything still waiting so callers don't hang on shutdown.
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batching engine stopped"))
+
+    async def submit(self, item):
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        batches = sum(self._batch_sizes.values())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self.queue_depth(),
+            "batches": batches,
+            "batches_failed": self._batches_failed,
+            "items": self._items_processed,
+            "mean_batch_size": self._items_processed / batches if batches else 0.0,
+            "batch_size_distribution": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+        }
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Drop callers that went away (e.g. client disconnected) before running.
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            self._batch_sizes[len(items)] += 1
+            self._items_processed += len(items)
+            try:
+                results = await loop.run_in_executor(self.executor, self.run_batch, items)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Batching engine stopped"))
+                raise
+            except Exception as e:
+                self._batches_failed += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -1,9 +1,16 @@
+import io
 import os
+import time
+import numpy as np
 import torch
-from torchvision import transforms
 from torch.utils.data import Dataset, DataLoader, random_split
 from PIL import Image
 
+try:
+    from raster import RASTER_EXTENSIONS, open_raster
+except ImportError:
+    from src.raster import RASTER_EXTENSIONS, open_raster
+
 class ForestFireDataset(Dataset):
     def __init__(self, root_dir, transform=None):
         self.root_dir = root_dir
@@ -30,7 +37,7 @@ class ForestFireDataset(Dataset):
     def __getitem__(self, idx):
         img_path = self.image_paths[idx]
         try:
-            image = Image.open(img_path).convert('RGB')
+            image = load_image(img_path)
         except OSError as e:
             print(f"Warning: Could not load image {img_path}. Skipping. Error: {e}")
             return None, None
@@ -49,11 +56,57 @@ def collate_fn_with_filter(batch):
     
     return torch.utils.data.dataloader.default_collate(batch)
 
-data_transforms = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-])
+IMAGE_SIZE = 224
+NORMALIZE_MEAN = [0.485, 0.456, 0.406]
+NORMALIZE_STD = [0.229, 0.224, 0.225]
+
+def load_image(source, size=IMAGE_SIZE):
+    # Open an image as RGB, letting the decoder downscale when it can.
+    # For JPEGs, draft() decodes at 1/2, 1/4 or 1/8 scale in the DCT, picking
+    # the smallest scale that is still at least size x size, so the final
+    # Resize in data_transforms only has a little left to do. Other formats
+    # ignore draft() and are decoded at full resolution as before.
+    # Raster files on disk (uncompressed TIFF, raw bands) are memory-mapped
+    # and box-filtered down a band of rows at a time instead of being loaded.
+    if isinstance(source, (str, os.PathLike)) and os.fspath(source).lower().endswith(RASTER_EXTENSIONS):
+        return open_raster(source).thumbnail(size)
+    image = Image.open(source)
+    image.draft('RGB', (size, size))
+    return image.convert('RGB')
+
+class ImageTransform:
+    # Resize((size, size)) -> ToTensor() -> Normalize(mean, std), computed the
+    # same way torchvision does it so outputs are bit-identical. Importing
+    # torchvision.transforms pulls in torchvision.models and torch._dynamo,
+    # which roughly doubles the API's import time for three simple steps.
+    def __init__(self, size=IMAGE_SIZE, mean=NORMALIZE_MEAN, std=NORMALIZE_STD):
+        self.size = size
+        self.mean = torch.tensor(mean).view(-1, 1, 1)
+        self.std = torch.tensor(std).view(-1, 1, 1)
+
+    def __call__(self, image):
+        if image.size != (self.size, self.size):
+            image = image.resize((self.size, self.size), Image.BILINEAR)
+        array = np.array(image, dtype=np.uint8, copy=True)
+        tensor = torch.from_numpy(array).view(self.size, self.size, -1).permute(2, 0, 1).contiguous()
+        return tensor.float().div(255).sub_(self.mean).div_(self.std)
+
+data_transforms = ImageTransform()
+
+def preprocess_image_bytes(contents):
+    # Decode an uploaded image and turn it into a model-ready tensor.
+    # Kept at module level so it can be shipped to a process pool.
+    image = load_image(io.BytesIO(contents))
+    return data_transforms(image)
+
+def preprocess_image_bytes_timed(contents):
+    # preprocess_image_bytes, also returning (decode, transform) seconds for
+    # the API's stage metrics; timed here because it may run in another process.
+    start = time.perf_counter()
+    image = load_image(io.BytesIO(contents))
+    decoded = time.perf_counter()
+    tensor = data_transforms(image)
+    return tensor, decoded - start, time.perf_counter() - decoded
 
 def load_and_split_data(data_dir, batch_size=32, train_split=0.7, val_split=0.15, test_split=0.15, shuffle=True):
     dataset = ForestFireDataset(root_dir=data_dir, transform=data_transforms)
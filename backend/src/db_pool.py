@@ -0,0 +1,166 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections.
+
+    At most ``max_size`` connections exist at once; callers wait up to
+    ``timeout`` seconds for one to be returned, then get PoolTimeout.
+    Connections idle for more than ``idle_timeout`` seconds are closed
+    instead of reused (MySQL drops them after ``wait_timeout`` anyway), and
+    ones idle for more than ``check_after`` seconds are health-checked with
+    ``check(conn)`` before being handed out. ``reset(conn)`` runs on every
+    return so no open transaction (and its stale snapshot) leaks into the
+    next caller. A connection whose ``with pool.connection()`` block raised
+    is closed rather than reused.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=5.0, idle_timeout=300.0, check_after=30.0,
+                 check=None, reset=None, on_wait=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.check = check or (lambda conn: conn.is_connected())
+        self.reset = reset or _rollback
+        # Called with the seconds each acquire waited (0 when a connection
+        # was free), e.g. to feed a latency histogram.
+        self.on_wait = on_wait
+        self._idle = []  # (connection, returned_at), most recently used last
+        self._size = 0
+        self._lock = threading.Condition()
+        self.counters = {"acquired": 0, "waited": 0, "timeouts": 0, "created": 0,
+                         "closed_idle": 0, "closed_unhealthy": 0, "closed_broken": 0}
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, broken=True)
+            raise
+        self.release(conn)
+
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            with self._lock:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise PoolTimeout(f"No database connection free after {self.timeout:g}s ({self.max_size} in use)")
+                    waited = True
+                    self._lock.wait(remaining)
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    # Reserve the slot; connecting happens outside the lock.
+                    self._size += 1
+                    conn = returned_at = None
+
+            if conn is None:
+                try:
+                    conn = self.connect()
+                except BaseException:
+                    self._forget()
+                    raise
+                self._count('created')
+                break
+            # Expiry and health checks talk to the server, so they also run
+            # outside the lock; a bad connection frees its slot and we retry.
+            idle_for = time.monotonic() - returned_at
+            if idle_for > self.idle_timeout:
+                self._close(conn, 'closed_idle')
+            elif idle_for > self.check_after and not self._healthy(conn):
+                self._close(conn, 'closed_unhealthy')
+            else:
+                break
+
+        wait = time.perf_counter() - start
+        with self._lock:
+            self.counters['acquired'] += 1
+            if waited:
+                self.counters['waited'] += 1
+                self.wait_seconds_total += wait
+                self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        if self.on_wait is not None:
+            self.on_wait(wait)
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _healthy(self, conn):
+        try:
+            return bool(self.check(conn))
+        except Exception:
+            return False
+
+    def _forget(self, reason=None):
+        # Give up a connection's slot and wake one waiter.
+        with self._lock:
+            self._size -= 1
+            if reason:
+                self.counters[reason] += 1
+            self._lock.notify()
+
+    def _close(self, conn, reason):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._forget(reason)
+
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                self.reset(conn)
+            except Exception:
+                broken = True
+        if broken:
+            self._close(conn, 'closed_broken')
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+    def close(self):
+        """Close the idle connections, e.g. at shutdown."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn, None)
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._idle)
+            size = self._size
+        return {
+            "max_size": self.max_size,
+            "open": size,
+            "idle": idle,
+            "in_use": size - idle,
+            **self.counters,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+def _rollback(conn):
+    # Only talk to the server if a transaction is actually open.
+    if getattr(conn, 'in_transaction', True):
+        conn.rollback()
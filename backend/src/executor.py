@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class InferenceExecutor:
+    """Bounded worker pools that keep CPU-bound inference off the event loop.
+
+    Decoding and ``data_transforms`` run in ``preprocess_pool``; the model
+    forward pass runs in ``forward_pool``. In ``thread`` mode both share one
+    thread pool (PIL and torch release the GIL for the heavy parts). In
+    ``process`` mode decoding moves to a process pool so pure-Python image work
+    can't contend for the GIL, while the forward pass stays on a thread in this
+    process where the model lives.
+    """
+
+    def __init__(self, kind="thread", max_workers=None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        if kind == "process":
+            # spawn rather than fork: forking after torch has started its
+            # thread pools can deadlock the children.
+            self.preprocess_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self.forward_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference-forward")
+        else:
+            self.preprocess_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            self.forward_pool = self.preprocess_pool
+
+    def shutdown(self, wait=True):
+        self.preprocess_pool.shutdown(wait=wait)
+        if self.forward_pool is not self.preprocess_pool:
+            self.forward_pool.shutdown(wait=wait)
+
+
+def create_inference_executor():
+    kind = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+    workers = os.getenv("INFERENCE_WORKERS")
+    return InferenceExecutor(kind, int(workers) if workers else None)
@@ -0,0 +1,145 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+
+class LogPipeline:
+    """Buffered JSON-lines log file written from a background thread.
+
+    ``log()`` only puts a record on a bounded queue, so callers never wait
+    on the filesystem. The writer thread drains the queue in batches and
+    writes each batch with a single ``os.write`` on an ``O_APPEND`` file, at
+    least every ``flush_interval`` seconds. If the queue is full, records are
+    dropped and counted rather than blocking the request.
+
+    The file is rotated to ``<path>.1`` ... ``<path>.<backup_count>`` once it
+    exceeds ``max_bytes`` or, if ``rotate_seconds`` is set, once it is that
+    old. Several processes can share one file. Each writer reopens the path
+    when another process has rotated it.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, rotate_seconds=0,
+                 flush_interval=0.2, max_batch=1000, queue_size=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_seconds = rotate_seconds
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._pid = None
+        self._lock = threading.Lock()
+        self._fd = None
+        self._inode = None
+        self._opened_at = 0.0
+
+    def _ensure_started(self):
+        # Started on first use, and again in a forked child, where the
+        # parent's writer thread doesn't exist.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # SimpleQueue is much cheaper per put than Queue; the bound is
+            # enforced by checking its size instead.
+            self._queue = queue.SimpleQueue()
+            self._fd = None
+            self._thread = threading.Thread(target=self._run, name='log-pipeline', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def log(self, message, level='debug', **fields):
+        self._ensure_started()
+        record = {"ts": round(time.time(), 3), "level": level, "pid": os.getpid(), "message": message}
+        record.update(fields)
+        if self._queue.qsize() >= self.queue_size:
+            self.dropped += 1
+            return
+        self._queue.put(record)
+
+    @staticmethod
+    def sampled(rate):
+        """True for roughly ``rate`` of calls; guard expensive log calls with it."""
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def flush(self, timeout=5.0):
+        """Block until everything logged so far is written (or ``timeout``)."""
+        if self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._pid == os.getpid() else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+        }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch and not isinstance(batch[-1], threading.Event):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            events = [item for item in batch if isinstance(item, threading.Event)]
+            records = [item for item in batch if not isinstance(item, threading.Event)]
+            if records:
+                try:
+                    self._write(''.join(json.dumps(record, default=str) + '\n' for record in records).encode())
+                    self.written += len(records)
+                except OSError:
+                    self.dropped += len(records)
+            for event in events:
+                event.set()
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._inode = os.fstat(self._fd).st_ino
+        # Age for time-based rotation counts from when this writer opened the
+        # file; POSIX has no portable creation time to go by.
+        self._opened_at = time.time()
+
+    def _write(self, data):
+        try:
+            if self._fd is None or os.stat(self.path).st_ino != self._inode:
+                self._open()
+        except FileNotFoundError:
+            self._open()
+
+        size = os.fstat(self._fd).st_size
+        too_big = self.max_bytes and size > 0 and size + len(data) > self.max_bytes
+        too_old = self.rotate_seconds and size > 0 and time.time() - self._opened_at >= self.rotate_seconds
+        if too_big or too_old:
+            self._rotate()
+        os.write(self._fd, data)
+
+    def _rotate(self):
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.truncate(self.path, 0)
+        self.rotations += 1
+        self._open()
@@ -0,0 +1,226 @@
+import bisect
+import math
+import threading
+import time
+
+# Seconds; spans sub-millisecond stages up to slow uploads and big batches.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ThreadShards:
+    """One private dict per recording thread, merged when scraped.
+
+    Writers only ever touch their own thread's dict, so recording takes no
+    lock; the lock is only taken the first time a thread records. The set of
+    threads is small (event loop plus executor workers) and long-lived.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+
+    def get(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def all(self):
+        with self._lock:
+            return list(self._shards)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        """Yield ``(suffix, labels dict, value)`` for the exposition format."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._shards = _ThreadShards()
+
+    def inc(self, *labels, amount=1):
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self):
+        totals = {}
+        for shard in self._shards.all():
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        for labels, value in sorted(totals.items()):
+            yield '_total', dict(zip(self.labelnames, labels)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._shards = _ThreadShards()
+
+    def observe(self, value, *labels):
+        shard = self._shards.get()
+        row = shard.get(labels)
+        if row is None:
+            # One count per bucket plus +Inf, then the running sum.
+            row = shard[labels] = [0] * (len(self.buckets) + 2)
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        totals = {}
+        for shard in self._shards.all():
+            for labels, row in list(shard.items()):
+                merged = totals.setdefault(labels, [0] * len(row))
+                for i, value in enumerate(row):
+                    merged[i] += value
+        for labels, row in sorted(totals.items()):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), row[:-1]):
+                cumulative += count
+                yield '_bucket', {**base, 'le': format_value(bound)}, cumulative
+            yield '_sum', base, row[-1]
+            yield '_count', base, cumulative
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge(Metric):
+    """A value read at scrape time from ``callback``.
+
+    The callback returns a number, or a dict mapping label-value tuples to
+    numbers for labelled gauges.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        value = self.callback()
+        if isinstance(value, dict):
+            for labels, number in sorted(value.items()):
+                yield '', dict(zip(self.labelnames, labels)), number
+        elif value is not None:
+            yield '', {}, value
+
+
+class MetricsRegistry:
+    def __init__(self, namespace=''):
+        self.namespace = namespace
+        self.metrics = []
+
+    def _register(self, metric):
+        if self.namespace:
+            metric.name = f"{self.namespace}_{metric.name}"
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        return self._register(Gauge(name, documentation, callback, labelnames))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them per route.
+
+    Requests are labelled with the matched route's path template (e.g.
+    ``/admin/models/{version}/activate``) rather than the raw path, so label
+    cardinality stays bounded. The arrival time is left in
+    ``request.state.request_started`` for handlers timing their own stages.
+    """
+
+    def __init__(self, app, requests, latency):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault('state', {})['request_started'] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            method = scope.get('method', '')
+            self.requests.inc(method, path, str(status))
+            self.latency.observe(time.perf_counter() - start, method, path)
@@ -0,0 +1,49 @@
+import os
+import sys
+import warnings
+
+import torch
+
+from model import ForestFirePredictor
+
+ONNX_MODEL_PATH = os.path.join('models', 'forest_fire_model.onnx')
+
+
+def export_onnx(model, path=ONNX_MODEL_PATH, input_size=224, opset=17):
+    """Write ``model`` to ONNX with a dynamic batch dimension.
+
+    BatchNorm folding and conv+relu fusion are left to ONNX Runtime's graph
+    optimizer, so the plain eval-mode model is exported.
+
+    The legacy TorchScript-based exporter is pinned on purpose: the dynamo
+    exporter needs ``onnxscript``, which is not in requirements.txt, and this
+    straight conv stack has no control flow it would handle better.
+    """
+    example = torch.randn(1, 3, input_size, input_size)
+    with warnings.catch_warnings():
+        # Deprecated since PyTorch 2.9, but still supported without onnxscript.
+        warnings.simplefilter('ignore', DeprecationWarning)
+        torch.onnx.export(
+            model.cpu().eval(),
+            (example,),
+            path,
+            input_names=['input'],
+            output_names=['logits'],
+            dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=opset,
+            dynamo=False,
+        )
+    return path
+
+
+if __name__ == '__main__':
+    MODEL_PATH = os.path.join('models', 'forest_fire_model.pth')
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: Model file not found at {MODEL_PATH}")
+        sys.exit(1)
+
+    model = ForestFirePredictor()
+    model.load_state_dict(torch.load(MODEL_PATH, map_location='cpu'))
+    export_onnx(model)
+    print(f"ONNX model saved to {ONNX_MODEL_PATH}")
@@ -0,0 +1,118 @@
+import copy
+import os
+import sys
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+
+class FusedForestFirePredictor(nn.Module):
+    """Inference-only ForestFirePredictor with BatchNorm folded into the convs.
+
+    In eval mode each ``bnN`` is a fixed per-channel scale and shift, so it is
+    folded into ``convN``'s weights and bias; the ReLU then runs in place on
+    the conv output. That removes five BN passes and five intermediate
+    activation tensors per forward. Outputs match the original within float
+    rounding. Not trainable: the BN statistics are baked in.
+    """
+
+    def __init__(self, model):
+        super(FusedForestFirePredictor, self).__init__()
+        for i in range(1, 6):
+            # Only the small conv/bn pairs are copied. The fc layers (most of
+            # the weights) are shared with ``model``, so memory-mapped weights
+            # stay mapped rather than being duplicated.
+            conv, bn = copy.deepcopy((getattr(model, f'conv{i}'), getattr(model, f'bn{i}')))
+            setattr(self, f'conv{i}', fuse_conv_bn_eval(conv.eval(), bn.eval()))
+            setattr(self, f'pool{i}', getattr(model, f'pool{i}'))
+        self.flatten = model.flatten
+        self.fc1 = model.fc1
+        self.fc2 = model.fc2
+
+    def forward(self, x):
+        x = self.pool1(F.relu(self.conv1(x), inplace=True))
+        x = self.pool2(F.relu(self.conv2(x), inplace=True))
+        x = self.pool3(F.relu(self.conv3(x), inplace=True))
+        x = self.pool4(F.relu(self.conv4(x), inplace=True))
+        x = self.pool5(F.relu(self.conv5(x), inplace=True))
+
+        x = self.flatten(x)
+
+        # Dropout is the identity in eval mode, so it is dropped here.
+        x = F.relu(self.fc1(x), inplace=True)
+        return self.fc2(x)
+
+
+def fuse_for_inference(model):
+    return FusedForestFirePredictor(model).eval()
+
+
+MODEL_RUNTIMES = ('eager', 'torchscript', 'compile')
+
+# Written by ``python src/optimize.py``; MODEL_RUNTIME=torchscript serves it
+# instead of re-tracing the weights on every load.
+TORCHSCRIPT_FILENAME = 'forest_fire_model_ts.pt'
+
+
+def script_for_inference(model, input_size=224, optimize=True):
+    """Trace and freeze ``model`` into a TorchScript program.
+
+    Freezing inlines the weights as constants, which lets the JIT fold and
+    fuse ops (e.g. conv+relu) that eager mode runs one by one.
+    ``optimize_for_inference`` adds backend-specific rewrites that can't be
+    serialized, so exports skip it.
+    """
+    example = torch.randn(1, 3, input_size, input_size, device=next(model.parameters()).device)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model.eval(), example))
+    return torch.jit.optimize_for_inference(scripted) if optimize else scripted
+
+
+def compile_for_inference(model):
+    # dynamic=True so the batching engine's varying batch sizes reuse one
+    # graph instead of recompiling per size.
+    return torch.compile(model.eval(), dynamic=True)
+
+
+def prepare_runtime(model, runtime):
+    if runtime not in MODEL_RUNTIMES:
+        raise ValueError(f"Unknown model runtime '{runtime}', expected one of {MODEL_RUNTIMES}")
+    if runtime == 'torchscript':
+        return script_for_inference(model)
+    if runtime == 'compile':
+        return compile_for_inference(model)
+    return model
+
+
+def export_torchscript(model, path):
+    torch.jit.save(script_for_inference(model, optimize=False), path)
+    return path
+
+
+def load_torchscript(path, device='cpu'):
+    """Load an ``export_torchscript`` file, ready to serve.
+
+    Skips tracing and freezing; only the unserializable
+    ``optimize_for_inference`` rewrites are applied here.
+    """
+    scripted = torch.jit.load(path, map_location=device)
+    return torch.jit.optimize_for_inference(scripted.eval())
+
+
+if __name__ == '__main__':
+    from model import ForestFirePredictor
+
+    MODEL_PATH = os.path.join('models', 'forest_fire_model.pth')
+    EXPORT_PATH = os.path.join('models', TORCHSCRIPT_FILENAME)
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: Model file not found at {MODEL_PATH}")
+        sys.exit(1)
+
+    model = ForestFirePredictor()
+    model.load_state_dict(torch.load(MODEL_PATH, map_location='cpu'))
+    export_torchscript(fuse_for_inference(model.eval()), EXPORT_PATH)
+    print(f"Frozen TorchScript model saved to {EXPORT_PATH}; re-export after retraining, "
+          f"or register it with the weights in the model registry")
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Content-addressed cache for prediction results.
+
+    Entries are keyed by ``make_key(contents, model_fingerprint)``, so the same
+    upload served by a different model never hits a stale result. A bounded
+    in-memory LRU sits in front of an optional on-disk tier (one JSON file per
+    entry under ``disk_dir``) that survives restarts. Both tiers honour
+    ``ttl_seconds``. Disk reads and writes run in the loop's default executor.
+
+    ``get_or_compute`` coalesces concurrent lookups for the same key: only the
+    first caller runs ``compute``, the others await its result.
+
+    Must be used from a single event loop; it is not thread safe.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @staticmethod
+    def make_key(contents, model_fingerprint):
+        digest = hashlib.sha256(contents)
+        digest.update(b"\0")
+        digest.update(str(model_fingerprint).encode())
+        return digest.hexdigest()
+
+    def _expired(self, created):
+        return self.ttl is not None and self.ttl > 0 and time.time() - created > self.ttl
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        """Return ``(entry, expired)``; runs in an executor thread."""
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None, False
+        if self._expired(entry["created"]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, True
+        return entry, False
+
+    def _write_disk(self, key, created, value):
+        # Runs in an executor thread.
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"created": created, "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Prediction cache: could not write {path}: {e}")
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if self._expired(created):
+            del self._entries[key]
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return value
+
+    async def _get_disk(self, key):
+        if self.disk_dir:
+            entry, expired = await asyncio.get_running_loop().run_in_executor(None, self._read_disk, key)
+            if expired:
+                self.counters["expirations"] += 1
+            if entry is not None:
+                self.counters["disk_hits"] += 1
+                self._store_memory(key, entry["created"], entry["value"])
+                return entry["value"]
+        self.counters["misses"] += 1
+        return None
+
+    async def get(self, key):
+        value = self._get_memory(key)
+        if value is None:
+            value = await self._get_disk(key)
+        return value
+
+    def _store_memory(self, key, created, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def put(self, key, value):
+        created = time.time()
+        self._store_memory(key, created, value)
+        if self.disk_dir:
+            # Not awaited: the caller needn't wait for the file to land.
+            asyncio.get_running_loop().run_in_executor(None, self._write_disk, key, created, value)
+
+    async def get_or_compute(self, key, compute):
+        """Return the value cached under ``key``, or compute and cache it.
+
+        ``compute`` is awaited and returns ``(value, store_key)``. The value
+        is cached under ``store_key``, which can differ from ``key`` if what
+        the key was derived from (e.g. the serving model) changed while it
+        was computed; callers waiting on ``key`` still get the value.
+        """
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            # Run as its own task so one caller disconnecting doesn't cancel
+            # the computation the other callers are waiting on.
+            task = asyncio.ensure_future(self._load_or_compute(key, compute))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load_or_compute(self, key, compute):
+        # The disk lookup is part of the coalesced task, so concurrent
+        # callers share one file read as well as one computation.
+        try:
+            value = await self._get_disk(key)
+            if value is None:
+                value, store_key = await compute()
+                self.put(store_key, value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "disk_dir": self.disk_dir,
+            "inflight": len(self._inflight),
+            **self.counters,
+        }
@@ -0,0 +1,173 @@
+import copy
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import torch
+from torch.profiler import ProfilerActivity, profile, record_function
+
+PROFILE_DIR = 'profiles'
+
+# ForestFirePredictor layers broken out in every profile.
+MODEL_LAYERS = ('conv1', 'conv2', 'conv3', 'conv4', 'conv5', 'fc1', 'fc2')
+
+PROFILE_ID = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$')
+
+
+def instrument_layers(module, timings, layer_names=MODEL_LAYERS):
+    """Return a copy of ``module`` whose named layers record their time.
+
+    Only the module objects are copied; parameters are shared. Each layer
+    gets a ``record_function`` range (so it shows up in the profiler trace)
+    and its wall time in ms is added to ``timings[name]``. The served model
+    is untouched, so concurrent requests are not slowed by the hooks.
+    Returns ``module`` itself for models without these layers (TorchScript,
+    torch.compile wrappers).
+    """
+    children = getattr(module, '_modules', None)
+    if not isinstance(module, torch.nn.Module) or isinstance(module, torch.jit.ScriptModule) \
+            or not children or not any(name in children for name in layer_names):
+        return module
+
+    clone = copy.copy(module)
+    clone._modules = OrderedDict(children)
+    for name in layer_names:
+        if name not in children:
+            continue
+        layer = copy.copy(children[name])
+        layer._forward_pre_hooks = OrderedDict()
+        layer._forward_hooks = OrderedDict()
+
+        def before(layer, inputs, name=name):
+            layer._profile_range = record_function(name)
+            layer._profile_range.__enter__()
+            layer._profile_start = time.perf_counter()
+
+        def after(layer, inputs, output, name=name):
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - layer._profile_start) * 1000
+            layer._profile_range.__exit__(None, None, None)
+
+        layer.register_forward_pre_hook(before)
+        layer.register_forward_hook(after)
+        clone._modules[name] = layer
+    return clone
+
+
+# torch.profiler supports one active session per process.
+_profile_lock = threading.Lock()
+
+
+def profile_prediction(backend, contents, load_image, transform):
+    """Decode, transform and run one upload under ``torch.profiler``.
+
+    Runs outside the batching engine so the trace covers exactly this
+    request; concurrent profiled requests take turns. Returns
+    ``(probabilities, stages_ms, layers_ms, profiler)``.
+    """
+    stages, layers = {}, {}
+    with _profile_lock, profile(activities=[ProfilerActivity.CPU], record_shapes=True) as profiler:
+        start = time.perf_counter()
+        with record_function('decode'):
+            image = load_image(io.BytesIO(contents))
+        stages['decode'] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with record_function('transform'):
+            batch = transform(image).unsqueeze(0)
+        stages['transform'] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with record_function('forward'):
+            module = getattr(backend, 'module', None)
+            if module is not None:
+                with torch.no_grad():
+                    logits = instrument_layers(module, layers)(batch.to(backend.device))
+                probabilities = torch.softmax(logits, dim=1).cpu()[0]
+            else:
+                probabilities = backend.predict(batch)[0]
+        stages['forward'] = (time.perf_counter() - start) * 1000
+    return probabilities, stages, layers, profiler
+
+
+class ProfileStore:
+    """Keeps the newest ``max_profiles`` profiles in ``directory``.
+
+    Each profile is ``<id>.json`` (stage and layer timings plus the top
+    operators) and ``<id>.trace.json`` (Chrome trace, open in Perfetto or
+    chrome://tracing).
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, summary, profiler, top_ops=20):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        summary = dict(summary, id=profile_id, created=time.time())
+        summary['top_ops'] = [
+            {
+                "name": event.key,
+                "calls": event.count,
+                "self_cpu_ms": event.self_cpu_time_total / 1000,
+                "cpu_total_ms": event.cpu_time_total / 1000,
+            }
+            for event in sorted(profiler.key_averages(), key=lambda event: -event.self_cpu_time_total)[:top_ops]
+        ]
+        profiler.export_chrome_trace(os.path.join(self.directory, f"{profile_id}.trace.json"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+        self.prune()
+        return profile_id
+
+    def prune(self):
+        ids = self._ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_profiles)]:
+            for suffix in ('.json', '.trace.json'):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def _ids(self):
+        """Stored profile ids, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        ids = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json') and not entry.name.endswith('.trace.json'):
+                try:
+                    ids.append((entry.stat().st_mtime, entry.name[:-len('.json')]))
+                except FileNotFoundError:
+                    pass
+        return [profile_id for _, profile_id in sorted(ids)]
+
+    def list(self):
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            summary = self.load(profile_id)
+            if summary is not None:
+                profiles.append({key: summary.get(key) for key in ('id', 'created', 'model_version', 'total_ms')})
+        return profiles
+
+    def path(self, profile_id, trace=False):
+        """Path of a stored profile file, or None for unknown/invalid ids."""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + ('.trace.json' if trace else '.json'))
+        return path if os.path.exists(path) else None
+
+    def load(self, profile_id):
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
@@ -0,0 +1,121 @@
+import copy
+import os
+import random
+import sys
+import warnings
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.ao.quantization import DeQuantStub, QuantStub, convert, fuse_modules, get_default_qconfig, prepare, quantize_dynamic
+
+from model import ForestFirePredictor
+from data_preprocessing import collate_fn_with_filter, load_and_split_data
+
+QUANTIZED_MODEL_PATH = os.path.join('models', 'forest_fire_model_int8.pt')
+
+
+class QuantizableForestFirePredictor(nn.Module):
+    """ForestFirePredictor rearranged for post-training quantization.
+
+    The five conv blocks become one ``features`` stack between quant/dequant
+    stubs so they can be fused (conv+bn+relu) and statically quantized with
+    calibrated activation ranges. ``fc1``/``fc2`` stay outside the stubs and
+    are dynamically quantized, which suits the large, activation-light fc1.
+    """
+
+    def __init__(self, model):
+        super(QuantizableForestFirePredictor, self).__init__()
+        blocks = []
+        for i in range(1, 6):
+            blocks += [getattr(model, f'conv{i}'), getattr(model, f'bn{i}'), nn.ReLU(), getattr(model, f'pool{i}')]
+        self.quant = QuantStub()
+        self.features = nn.Sequential(*blocks)
+        self.dequant = DeQuantStub()
+        self.flatten = model.flatten
+        self.fc1 = model.fc1
+        self.fc2 = model.fc2
+
+    def forward(self, x):
+        x = self.dequant(self.features(self.quant(x)))
+        x = self.flatten(x)
+        x = F.relu(self.fc1(x))
+        return self.fc2(x)
+
+
+def calibration_loader(data_dir, num_samples=128, batch_size=16, seed=0):
+    # Sampled from the training split of load_and_split_data only, so the
+    # held-out test split evaluate.py gates the int8 model on stays unseen.
+    train_loader, _, _ = load_and_split_data(data_dir, batch_size, shuffle=False)
+    dataset = train_loader.dataset
+    indices = list(range(len(dataset)))
+    random.Random(seed).shuffle(indices)
+    subset = torch.utils.data.Subset(dataset, indices[:num_samples])
+    return torch.utils.data.DataLoader(subset, batch_size=batch_size, collate_fn=collate_fn_with_filter)
+
+
+def quantize_model(model, calibration_batches, backend='x86'):
+    """Return an int8 copy of an eval-mode ForestFirePredictor (CPU only).
+
+    ``calibration_batches`` is an iterable of input tensors (or
+    ``(inputs, labels)`` pairs) used to observe activation ranges.
+    """
+    # Work on a copy: fusion and observers modify modules in place.
+    model = QuantizableForestFirePredictor(copy.deepcopy(model).cpu().eval()).eval()
+    torch.backends.quantized.engine = backend
+
+    fuse_modules(model.features, [[str(i), str(i + 1), str(i + 2)] for i in range(0, 20, 4)], inplace=True)
+    qconfig = get_default_qconfig(backend)
+    for module in (model.quant, model.features, model.dequant):
+        module.qconfig = qconfig
+
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao, but it is
+        # what ships with torch itself.
+        warnings.simplefilter('ignore')
+        prepare(model, inplace=True)
+        with torch.no_grad():
+            for batch in calibration_batches:
+                inputs = batch[0] if isinstance(batch, (list, tuple)) else batch
+                if inputs.size(0) == 0:
+                    continue
+                model(inputs)
+        convert(model, inplace=True)
+        model = quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def save_quantized_model(model, path=QUANTIZED_MODEL_PATH, input_size=224):
+    # Quantized modules can't be rebuilt from a plain state dict, so the
+    # artifact is a frozen TorchScript program.
+    example = torch.randn(1, 3, input_size, input_size)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model, example))
+    torch.jit.save(scripted, path)
+    return path
+
+
+def load_quantized_model(path=QUANTIZED_MODEL_PATH):
+    return torch.jit.load(path, map_location='cpu').eval()
+
+
+if __name__ == '__main__':
+    DATA_DIR = 'data'
+    MODEL_PATH = os.path.join('models', 'forest_fire_model.pth')
+    NUM_CALIBRATION_SAMPLES = int(os.getenv('CALIBRATION_SAMPLES', 128))
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: Model file not found at {MODEL_PATH}")
+        sys.exit(1)
+    if not os.path.exists(DATA_DIR):
+        print(f"Error: Data directory '{DATA_DIR}' not found. Calibration needs sample images.")
+        sys.exit(1)
+
+    model = ForestFirePredictor()
+    model.load_state_dict(torch.load(MODEL_PATH, map_location='cpu'))
+    model.eval()
+
+    print(f"Calibrating on up to {NUM_CALIBRATION_SAMPLES} training images from {DATA_DIR}...")
+    quantized = quantize_model(model, calibration_loader(DATA_DIR, NUM_CALIBRATION_SAMPLES))
+    save_quantized_model(quantized)
+    print(f"Quantized model saved to {QUANTIZED_MODEL_PATH}")
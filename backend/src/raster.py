@@ -0,0 +1,338 @@
+import json
+import os
+import struct
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+# Formats open_raster() will try to memory-map before falling back to PIL.
+RASTER_EXTENSIONS = ('.tif', '.tiff', '.raw', '.bip', '.bil', '.bsq')
+
+# TIFF tags we need to locate pixel data.
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+PHOTOMETRIC_INTERPRETATION = 262
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+ROWS_PER_STRIP = 278
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+SAMPLE_FORMAT = 339
+
+# Photometric interpretations whose samples are already the pixel values we
+# want: BlackIsZero greyscale and RGB (plus any extra bands). Palette, CMYK,
+# WhiteIsZero, YCbCr and the rest need PIL's conversion.
+MEMMAP_PHOTOMETRICS = (1, 2)
+
+# TIFF field type -> (struct code, size in bytes)
+TIFF_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 16: ('Q', 8)}
+
+
+class Raster:
+    """Windowed access to an image that may be far larger than RAM.
+
+    Exposes the small part of the PIL API the inference code uses: ``size``
+    and ``crop(box)`` returning an RGB PIL image, so a raster can be passed
+    anywhere a PIL image is tiled. ``thumbnail(min_size)`` returns an RGB image
+    at least ``min_size`` pixels on each side, box-filtered from the source
+    one band of rows at a time.
+    """
+
+    size = (0, 0)
+
+    def read(self, left, top, right, bottom, step=1):
+        """Return an (H, W, C) uint8 array for the window, every ``step``-th pixel."""
+        raise NotImplementedError
+
+    def crop(self, box):
+        left, top, right, bottom = box
+        return to_rgb_image(self.read(left, top, right, bottom))
+
+    def thumbnail(self, min_size):
+        width, height = self.size
+        factor = max(1, min(width // min_size, height // min_size))
+        if factor == 1:
+            return self.crop((0, 0, width, height))
+
+        out_w, out_h = width // factor, height // factor
+        # Read enough rows to average ``factor`` rows into one output row,
+        # a few output rows at a time, so memory stays at one band.
+        band_rows = max(1, (1 << 24) // max(1, width * factor))
+        bands = []
+        for out_top in range(0, out_h, band_rows):
+            out_bottom = min(out_h, out_top + band_rows)
+            block = self.read(0, out_top * factor, out_w * factor, out_bottom * factor)
+            block = block.reshape(out_bottom - out_top, factor, out_w, factor, block.shape[2])
+            bands.append(block.mean(axis=(1, 3), dtype=np.float32).round().astype(np.uint8))
+        return to_rgb_image(np.concatenate(bands, axis=0))
+
+
+class PILRaster(Raster):
+    """Fallback for compressed formats: decodes through PIL as before."""
+
+    def __init__(self, image):
+        self.image = image
+        self.size = image.size
+
+    def read(self, left, top, right, bottom, step=1):
+        array = np.asarray(self.image.crop((left, top, right, bottom)).convert('RGB'))
+        return array[::step, ::step]
+
+    def crop(self, box):
+        return self.image.crop(box).convert('RGB')
+
+    def thumbnail(self, min_size):
+        self.image.draft('RGB', (min_size, min_size))
+        return self.image.convert('RGB')
+
+
+class MemmapRaster(Raster):
+    """A raster whose pixels are one contiguous block of a file.
+
+    ``array`` is an (H, W, C) or, for band-sequential files, (C, H, W)
+    ``np.memmap``. Windows are views into the mapping; only the pages a
+    window touches are read from disk.
+    """
+
+    def __init__(self, array, band_sequential=False):
+        self.array = array
+        self.band_sequential = band_sequential
+        if band_sequential:
+            self.size = (array.shape[2], array.shape[1])
+        else:
+            self.size = (array.shape[1], array.shape[0])
+
+    def read(self, left, top, right, bottom, step=1):
+        if self.band_sequential:
+            window = self.array[:, top:bottom:step, left:right:step].transpose(1, 2, 0)
+        else:
+            window = self.array[top:bottom:step, left:right:step]
+        return to_uint8(window)
+
+
+class TiledMemmapRaster(Raster):
+    """A tiled TIFF: each tile is a view into one read-only mapping."""
+
+    def __init__(self, buffer, width, height, tile_width, tile_height, offsets, samples, dtype):
+        self.size = (width, height)
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.tiles_across = -(-width // tile_width)
+        self.samples = samples
+        self.dtype = dtype
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def _tile(self, index):
+        start = self.offsets[index]
+        length = self.tile_width * self.tile_height * self.samples * self.dtype.itemsize
+        tile = self.buffer[start:start + length].view(self.dtype)
+        return tile.reshape(self.tile_height, self.tile_width, self.samples)
+
+    def read(self, left, top, right, bottom, step=1):
+        out = np.empty(((bottom - top + step - 1) // step, (right - left + step - 1) // step, self.samples), dtype=self.dtype)
+        for tile_row in range(top // self.tile_height, (bottom - 1) // self.tile_height + 1):
+            for tile_col in range(left // self.tile_width, (right - 1) // self.tile_width + 1):
+                tile_left, tile_top = tile_col * self.tile_width, tile_row * self.tile_height
+                x0, x1 = max(left, tile_left), min(right, tile_left + self.tile_width)
+                y0, y1 = max(top, tile_top), min(bottom, tile_top + self.tile_height)
+                # Align to the sampling grid of the whole window.
+                x0 += (left - x0) % step
+                y0 += (top - y0) % step
+                if x0 >= x1 or y0 >= y1:
+                    continue
+                tile = self._tile(tile_row * self.tiles_across + tile_col)
+                out[(y0 - top) // step:(y1 - top + step - 1) // step, (x0 - left) // step:(x1 - left + step - 1) // step] = \
+                    tile[y0 - tile_top:y1 - tile_top:step, x0 - tile_left:x1 - tile_left:step]
+        return to_uint8(out)
+
+
+def to_uint8(array):
+    if array.dtype == np.uint8:
+        return array
+    if array.dtype == np.uint16:
+        return (array >> 8).astype(np.uint8)
+    raise ValueError(f"Unsupported raster sample type {array.dtype}")
+
+
+def to_rgb_image(array):
+    bands = array.shape[2]
+    if bands == 1:
+        return Image.fromarray(np.ascontiguousarray(array[:, :, 0]), 'L').convert('RGB')
+    # RGBA, or multispectral with the visible bands first.
+    return Image.fromarray(np.ascontiguousarray(array[:, :, :3]), 'RGB')
+
+
+def read_tiff_layout(fileobj):
+    """Parse the first IFD of a (Big)TIFF and return its tags, or None."""
+    fileobj.seek(0)
+    header = fileobj.read(16)
+    if header[:2] == b'II':
+        order = '<'
+    elif header[:2] == b'MM':
+        order = '>'
+    else:
+        return None
+
+    version = struct.unpack(order + 'H', header[2:4])[0]
+    if version == 42:
+        ifd_offset = struct.unpack(order + 'I', header[4:8])[0]
+        count_fmt, entry_size, value_size = 'H', 12, 4
+    elif version == 43:
+        ifd_offset = struct.unpack(order + 'Q', header[8:16])[0]
+        count_fmt, entry_size, value_size = 'Q', 20, 8
+    else:
+        return None
+
+    fileobj.seek(ifd_offset)
+    count_size = struct.calcsize(count_fmt)
+    entry_count = struct.unpack(order + count_fmt, fileobj.read(count_size))[0]
+    entries = fileobj.read(entry_count * entry_size)
+
+    tags = {}
+    for i in range(entry_count):
+        entry = entries[i * entry_size:(i + 1) * entry_size]
+        tag, field_type = struct.unpack(order + 'HH', entry[:4])
+        if field_type not in TIFF_TYPES:
+            continue
+        code, size = TIFF_TYPES[field_type]
+        count = struct.unpack(order + ('I' if version == 42 else 'Q'), entry[4:4 + value_size])[0]
+        raw = entry[4 + value_size:]
+        if count * size > value_size:
+            position = fileobj.tell()
+            fileobj.seek(struct.unpack(order + ('I' if version == 42 else 'Q'), raw)[0])
+            raw = fileobj.read(count * size)
+            fileobj.seek(position)
+        tags[tag] = list(struct.unpack(order + code * count, raw[:count * size]))
+    tags['byte_order'] = order
+    return tags
+
+
+def open_tiff_memmap(fileobj):
+    """Memory-map an uncompressed, chunky (interleaved) greyscale or RGB
+    TIFF; None if it isn't one."""
+    tags = read_tiff_layout(fileobj)
+    if tags is None or tags.get(COMPRESSION, [1])[0] != 1:
+        return None
+    if tags.get(PHOTOMETRIC_INTERPRETATION, [None])[0] not in MEMMAP_PHOTOMETRICS:
+        return None
+
+    samples = tags.get(SAMPLES_PER_PIXEL, [1])[0]
+    if samples > 1 and tags.get(PLANAR_CONFIGURATION, [1])[0] != 1:
+        return None
+    bits = set(tags.get(BITS_PER_SAMPLE, [1]))
+    sample_format = tags.get(SAMPLE_FORMAT, [1])[0]
+    if sample_format != 1 or bits not in ({8}, {16}):
+        return None
+    dtype = np.dtype(('u1' if bits == {8} else 'u2')).newbyteorder(tags['byte_order'])
+
+    width, height = tags[IMAGE_WIDTH][0], tags[IMAGE_LENGTH][0]
+
+    if TILE_OFFSETS in tags:
+        buffer = np.memmap(fileobj, dtype=np.uint8, mode='r')
+        return TiledMemmapRaster(
+            buffer, width, height, tags[TILE_WIDTH][0], tags[TILE_LENGTH][0],
+            tags[TILE_OFFSETS], samples, dtype,
+        )
+
+    offsets = tags.get(STRIP_OFFSETS)
+    if not offsets:
+        return None
+    # Strips are normally written back to back; map them as one block.
+    row_bytes = width * samples * dtype.itemsize
+    rows_per_strip = tags.get(ROWS_PER_STRIP, [height])[0]
+    for i in range(1, len(offsets)):
+        if offsets[i] != offsets[0] + i * rows_per_strip * row_bytes:
+            return None
+    array = np.memmap(fileobj, dtype=dtype, mode='r', offset=offsets[0], shape=(height, width, samples))
+    return MemmapRaster(array)
+
+
+def open_raw(path, width, height, bands=3, dtype='uint8', interleave='bip', offset=0):
+    """Memory-map a headerless band file (ENVI-style BIP, BIL or BSQ)."""
+    if interleave == 'bip':
+        array = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(height, width, bands))
+        return MemmapRaster(array)
+    if interleave == 'bsq':
+        array = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(bands, height, width))
+        return MemmapRaster(array, band_sequential=True)
+    if interleave == 'bil':
+        # (H, C, W) -> view as (H, W, C) without copying.
+        array = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(height, bands, width))
+        return MemmapRaster(array.transpose(0, 2, 1))
+    raise ValueError(f"Unknown interleave '{interleave}', expected bip, bil or bsq")
+
+
+def open_pil(source, max_pixels=None):
+    """``Image.open(source)``, but checked against ``max_pixels`` instead of
+    PIL's decompression-bomb limit if given.
+
+    That limit is a process-wide setting other threads rely on, so it is
+    never changed: the file is identified by PIL's format plugins directly,
+    which reads only its header, and the size is checked here before any
+    pixels are decoded.
+    """
+    if max_pixels is None:
+        return Image.open(source)
+    filename = ''
+    if isinstance(source, (str, os.PathLike)):
+        # Closed when the image (and with it this file object) is dropped.
+        filename = os.fspath(source)
+        source = open(filename, 'rb')
+    Image.init()
+    source.seek(0)
+    prefix = source.read(16)
+    for format_id in Image.ID:
+        factory, accept = Image.OPEN[format_id]
+        accepted = not accept or accept(prefix)
+        if not accepted or isinstance(accepted, str):
+            continue
+        source.seek(0)
+        try:
+            image = factory(source, filename)
+        except (SyntaxError, IndexError, TypeError, struct.error):
+            continue
+        pixels = image.size[0] * image.size[1]
+        if pixels > max_pixels:
+            raise Image.DecompressionBombError(f"Image size ({pixels} pixels) exceeds limit of {max_pixels} pixels")
+        if image.format == 'TIFF':
+            # The TIFF plugin repeats PIL's check when it allocates the
+            # decode buffer; allocating it here, as it would, skips that.
+            image.im = Image.core.new(image.mode, image.size)
+        return image
+    raise UnidentifiedImageError(f"cannot identify image file {filename or source!r}")
+
+
+def open_raster(source, max_pixels=None):
+    """Open ``source`` (a path or seekable binary file) for windowed reads.
+
+    Uncompressed TIFFs and raw band files (described by a ``<file>.json``
+    sidecar with width, height, bands, dtype, interleave and offset) are
+    memory-mapped; anything else falls back to a PIL-backed raster, opened
+    with ``max_pixels`` in place of PIL's decompression-bomb limit if given
+    (see ``open_pil``).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.raw', '.bip', '.bil', '.bsq'):
+            with open(path + '.json') as f:
+                return open_raw(path, **json.load(f))
+        if extension in ('.tif', '.tiff'):
+            with open(path, 'rb') as f:
+                # np.memmap keeps its own mapping; the file can be closed.
+                raster = open_tiff_memmap(f)
+            if raster is not None:
+                return raster
+        return PILRaster(open_pil(path, max_pixels))
+
+    raster = open_tiff_memmap(source)
+    if raster is not None:
+        return raster
+    source.seek(0)
+    return PILRaster(open_pil(source, max_pixels))
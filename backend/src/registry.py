@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+REGISTRY_DIR = os.path.join('models', 'registry')
+MANIFEST_NAME = 'manifest.json'
+
+
+class RegistryError(Exception):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """A directory of versioned model artifacts plus a JSON manifest.
+
+    Layout::
+
+        registry/
+            manifest.json
+            v1/forest_fire_model.pth
+            v2/forest_fire_model.pth
+            v2/forest_fire_model.onnx
+
+    The manifest records every version (files and their sha256), which one is
+    ``active`` and the activation ``history`` used for rollback. It is
+    rewritten atomically, so a server polling ``manifest_mtime()`` never sees
+    a half-written file.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def manifest_mtime(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        if not self.exists():
+            return {"active": None, "history": [], "versions": {}}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def active_version(self):
+        return self.load()["active"]
+
+    def list_versions(self):
+        manifest = self.load()
+        return [
+            {"version": version, "active": version == manifest["active"], **info}
+            for version, info in manifest["versions"].items()
+        ]
+
+    def artifact_path(self, version, filename):
+        manifest = self.load()
+        if version not in manifest["versions"]:
+            raise RegistryError(f"Unknown model version '{version}'")
+        if filename not in manifest["versions"][version]["files"]:
+            raise RegistryError(f"Model version '{version}' has no {filename}")
+        return os.path.join(self.root, version, filename)
+
+    def verified_artifact_path(self, version, filename):
+        """``(path, sha256)`` of an artifact whose bytes still match the hash
+        recorded at registration; raises RegistryError otherwise."""
+        path = self.artifact_path(version, filename)
+        expected = self.load()["versions"][version]["files"][filename]["sha256"]
+        try:
+            actual = file_sha256(path)
+        except FileNotFoundError:
+            raise RegistryError(f"Model version '{version}' is missing {filename}")
+        if actual != expected:
+            raise RegistryError(f"Model version '{version}' {filename} does not match its recorded sha256")
+        return path, actual
+
+    def register(self, version, artifact_paths, notes=None):
+        """Copy artifacts into ``<root>/<version>/`` and record them (inactive)."""
+        manifest = self.load()
+        if version in manifest["versions"]:
+            raise RegistryError(f"Model version '{version}' already exists")
+
+        version_dir = os.path.join(self.root, version)
+        os.makedirs(version_dir, exist_ok=True)
+        files = {}
+        for path in artifact_paths:
+            target = os.path.join(version_dir, os.path.basename(path))
+            shutil.copyfile(path, target)
+            files[os.path.basename(path)] = {"sha256": file_sha256(target)}
+
+        manifest["versions"][version] = {"files": files, "created": time.time(), "notes": notes}
+        self._save(manifest)
+        return manifest["versions"][version]
+
+    def activate(self, version):
+        manifest = self.load()
+        if version not in manifest["versions"]:
+            raise RegistryError(f"Unknown model version '{version}'")
+        if manifest["active"] != version:
+            manifest["active"] = version
+            manifest["history"].append(version)
+            self._save(manifest)
+        return version
+
+    def previous_version(self):
+        """The version rollback() would re-activate."""
+        history = self.load()["history"]
+        if len(history) < 2:
+            raise RegistryError("No previous model version to roll back to")
+        return history[-2]
+
+    def rollback(self, expected=None):
+        """Re-activate the version that was active before the current one.
+        With ``expected``, fail if that is no longer the version it would pick."""
+        manifest = self.load()
+        history = manifest["history"]
+        if len(history) < 2:
+            raise RegistryError("No previous model version to roll back to")
+        if expected is not None and history[-2] != expected:
+            raise RegistryError(f"Model history changed; rollback would activate '{history[-2]}', not '{expected}'")
+        history.pop()
+        manifest["active"] = history[-1]
+        self._save(manifest)
+        return manifest["active"]
+
+
+if __name__ == '__main__':
+    usage = (
+        "Usage:\n"
+        "  python src/registry.py list\n"
+        "  python src/registry.py register <version> <artifact> [<artifact> ...]\n"
+        "  python src/registry.py activate <version>\n"
+        "  python src/registry.py rollback"
+    )
+    registry = ModelRegistry(os.getenv('MODEL_REGISTRY_DIR', REGISTRY_DIR))
+    args = sys.argv[1:]
+    try:
+        if args[:1] == ['list']:
+            for entry in registry.list_versions():
+                marker = '*' if entry['active'] else ' '
+                print(f"{marker} {entry['version']}: {', '.join(entry['files'])}")
+        elif args[:1] == ['register'] and len(args) >= 3:
+            registry.register(args[1], args[2:])
+            print(f"Registered {args[1]}")
+        elif args[:1] == ['activate'] and len(args) == 2:
+            print(f"Activated {registry.activate(args[1])}")
+        elif args[:1] == ['rollback']:
+            print(f"Rolled back to {registry.rollback()}")
+        else:
+            print(usage)
+            sys.exit(1)
+    except RegistryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
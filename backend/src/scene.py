@@ -0,0 +1,95 @@
+import heapq
+
+from data_preprocessing import IMAGE_SIZE, data_transforms
+
+
+def tile_offsets(length, tile, stride):
+    """Start offsets of tiles covering ``length`` pixels.
+
+    Tiles step by ``stride``; the last tile is pulled back so it ends exactly
+    on the border instead of running past it.
+    """
+    if length <= tile:
+        return [0]
+    offsets = list(range(0, length - tile + 1, stride))
+    if offsets[-1] != length - tile:
+        offsets.append(length - tile)
+    return offsets
+
+
+def iter_tiles(image, tile_size=IMAGE_SIZE, stride=IMAGE_SIZE // 2):
+    """Yield ``(row, col, box)`` for overlapping tiles of ``image``.
+
+    Only coordinates are produced here; pixels are cropped when a tile is
+    actually turned into a tensor, so at most one batch of tiles is held in
+    memory at a time.
+    """
+    width, height = image.size
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    for row, top in enumerate(tile_offsets(height, tile_h, stride)):
+        for col, left in enumerate(tile_offsets(width, tile_w, stride)):
+            yield row, col, (left, top, left + tile_w, top + tile_h)
+
+
+def predict_scene(image, run_batch, fire_index, tile_size=IMAGE_SIZE, stride=IMAGE_SIZE // 2,
+                  batch_size=32, top_k=5):
+    """Sliding-window fire detection over a large scene.
+
+    ``image`` only needs ``size`` and ``crop(box)``: a PIL image or a
+    ``raster.Raster``, which reads each tile window from a memory-mapped file.
+    ``run_batch`` takes a list of tile tensors and returns a probability row
+    per tile, e.g. the API's ``run_model_batch``. Returns the per-tile fire
+    probability grid and the ``top_k`` hottest tiles.
+    """
+    if stride < 1:
+        raise ValueError("stride must be at least 1")
+
+    width, height = image.size
+    tiles = iter_tiles(image, tile_size, stride)
+    rows = len(tile_offsets(height, min(tile_size, height), stride))
+    cols = len(tile_offsets(width, min(tile_size, width), stride))
+    grid = [[0.0] * cols for _ in range(rows)]
+    hottest = []
+
+    def flush(batch):
+        tensors = [data_transforms(image.crop(box).convert('RGB')) for _, _, box in batch]
+        for (row, col, box), probabilities in zip(batch, run_batch(tensors)):
+            fire_probability = float(probabilities[fire_index])
+            grid[row][col] = fire_probability
+            entry = (fire_probability, row, col, box)
+            if len(hottest) < top_k:
+                heapq.heappush(hottest, entry)
+            elif top_k > 0:
+                heapq.heappushpop(hottest, entry)
+
+    batch = []
+    for tile in tiles:
+        batch.append(tile)
+        if len(batch) == batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    hotspots = []
+    for fire_probability, row, col, (left, top, right, bottom) in sorted(hottest, reverse=True):
+        hotspots.append({
+            "row": row,
+            "col": col,
+            "box": [left, top, right, bottom],
+            "center": [(left + right) // 2, (top + bottom) // 2],
+            "fire_probability": fire_probability,
+        })
+
+    return {
+        "width": width,
+        "height": height,
+        "tile_size": tile_size,
+        "stride": stride,
+        "rows": rows,
+        "cols": cols,
+        "max_fire_probability": max(max(row) for row in grid),
+        "mean_fire_probability": sum(map(sum, grid)) / (rows * cols),
+        "grid": grid,
+        "hotspots": hotspots,
+    }
@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class TokenError(Exception):
+    """Why a token was rejected: ``reason`` is invalid, expired or revoked."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class TokenSigner:
+    """Issues and verifies HS256 JWTs without touching the database.
+
+    An access token is short-lived and proves the caller logged in as
+    ``sub``; a refresh token lives longer, is only accepted by the refresh
+    endpoint and is rotated on use. Both carry a random ``jti`` so a single
+    token can be revoked (see RevocationList).
+    """
+
+    def __init__(self, secret, access_ttl=900, refresh_ttl=14 * 24 * 3600, issuer='forest-fire-sentinel'):
+        self.key = secret.encode() if isinstance(secret, str) else secret
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.issuer = issuer
+        self._header = _b64encode(json.dumps(HEADER, separators=(',', ':')).encode())
+
+    def _sign(self, signing_input):
+        return hmac.new(self.key, signing_input.encode('ascii'), hashlib.sha256).digest()
+
+    def issue(self, subject, kind=ACCESS, now=None, **claims):
+        now = int(time.time() if now is None else now)
+        payload = {
+            "iss": self.issuer,
+            "sub": subject,
+            "typ": kind,
+            "iat": now,
+            "exp": now + (self.access_ttl if kind == ACCESS else self.refresh_ttl),
+            "jti": secrets.token_hex(12),
+            **claims,
+        }
+        signing_input = f"{self._header}.{_b64encode(json.dumps(payload, separators=(',', ':')).encode())}"
+        return f"{signing_input}.{_b64encode(self._sign(signing_input))}"
+
+    def verify(self, token, kind=ACCESS, now=None):
+        """Claims of a valid, unexpired token of ``kind``; raises TokenError."""
+        try:
+            header, payload, signature = token.split('.')
+        except (AttributeError, ValueError):
+            raise TokenError('invalid', "Malformed token")
+        if header != self._header:
+            raise TokenError('invalid', "Unsupported token header")
+        try:
+            valid = hmac.compare_digest(_b64decode(signature), self._sign(f"{header}.{payload}"))
+            claims = json.loads(_b64decode(payload)) if valid else None
+        except (ValueError, UnicodeError):
+            raise TokenError('invalid', "Malformed token")
+        if not valid:
+            raise TokenError('invalid', "Bad token signature")
+        if claims.get('typ') != kind or claims.get('iss') != self.issuer:
+            raise TokenError('invalid', f"Not an {kind} token")
+        if claims.get('exp', 0) <= (time.time() if now is None else now):
+            raise TokenError('expired', "Token expired")
+        return claims
+
+
+class RevocationList:
+    """Revoked token ids, kept in memory so checks cost no database access.
+
+    ``load()`` returns the shared list as ``(jti, expires_at)`` pairs and is
+    called by ``refresh()`` on a timer, so revocations made by other workers
+    or nodes apply within one refresh interval; revocations made here apply
+    at once. Entries are dropped once the token would have expired anyway,
+    which keeps the list small.
+    """
+
+    def __init__(self, load=None):
+        self.load = load
+        self._revoked = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def __contains__(self, jti):
+        return jti in self._revoked
+
+    def refresh(self, now=None):
+        now = time.time() if now is None else now
+        loaded = dict(self.load()) if self.load is not None else {}
+        with self._lock:
+            # Keep local entries the shared list may not have caught up with.
+            merged = {**self._revoked, **loaded}
+            self._revoked = {jti: expires for jti, expires in merged.items() if expires > now}
+        return len(self._revoked)
+
+    def __len__(self):
+        return len(self._revoked)
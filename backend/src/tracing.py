@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import random
+import time
+
+# What a trace keeps of request bodies:
+#   none   - sizes and content types; JSON bodies as anonymized shapes
+#   hash   - also the sha256 of each uploaded file
+#   sample - also a copy of uploaded files, stored by hash in sample_dir
+PAYLOAD_MODES = ('none', 'hash', 'sample')
+
+# Fields whose values are never hashed into a trace, only replaced by
+# REDACTED: a keyed hash of a password can still be brute-forced offline by
+# anyone holding the salt, and equal hashes would show shared passwords.
+CREDENTIAL_FIELDS = ('password', 'refresh_token', 'access_token')
+REDACTED = 'redacted'
+
+
+def anonymize(value, salt):
+    """Replace every string in a decoded JSON body with ``anon:<token>:<len>``.
+
+    Tokens are keyed hashes, so the same username maps to the same token
+    throughout a trace but can't be reversed or looked up. Strings that
+    look like email addresses get an ``:email`` suffix so replay can send
+    valid ones. Values of CREDENTIAL_FIELDS become REDACTED. Numbers,
+    booleans and nulls are kept.
+    """
+    if isinstance(value, dict):
+        return {key: REDACTED if str(key).lower() in CREDENTIAL_FIELDS else anonymize(item, salt)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [anonymize(item, salt) for item in value]
+    if isinstance(value, str):
+        token = hmac.new(salt, value.encode(), hashlib.sha256).hexdigest()[:12]
+        kind = ':email' if '@' in value and ' ' not in value else ''
+        return f"anon:{token}:{len(value)}{kind}"
+    return value
+
+
+def content_type_options(header):
+    base, *options = header.split(';')
+    params = {}
+    for option in options:
+        key, _, value = option.strip().partition('=')
+        params[key.lower()] = value.strip('"')
+    return base.strip().lower(), params
+
+
+def multipart_parts(body, boundary):
+    """Yield ``(name, filename, content_type, content)`` per form part."""
+    delimiter = b'--' + boundary.encode()
+    for section in body.split(delimiter)[1:]:
+        if section.startswith(b'--'):
+            break
+        head, _, content = section.partition(b'\r\n\r\n')
+        if content.endswith(b'\r\n'):
+            content = content[:-2]
+        headers = {}
+        for line in head.decode('latin-1').split('\r\n'):
+            key, _, value = line.partition(':')
+            if key:
+                headers[key.strip().lower()] = value.strip()
+        _, disposition = content_type_options(headers.get('content-disposition', ''))
+        yield disposition.get('name'), disposition.get('filename'), headers.get('content-type'), content
+
+
+class TraceRecorder:
+    """ASGI middleware appending one JSON line of metadata per request.
+
+    Records the route template and path, query string, status, latency and
+    body sizes. The body is buffered as it is received, and parsed into its
+    trace form after the response, in the default executor. Headers (and
+    with them cookies and the admin token) are never recorded. ``writer``
+    is a LogPipeline, so writes happen off the request path.
+    """
+
+    def __init__(self, app, writer, payloads='none', sample_dir=None, sample_rate=1.0,
+                 sample_max_bytes=10 * 1024 * 1024, max_body_bytes=32 * 1024 * 1024, salt=None):
+        if payloads not in PAYLOAD_MODES:
+            raise ValueError(f"Unknown trace payload mode '{payloads}', expected one of {PAYLOAD_MODES}")
+        self.app = app
+        self.writer = writer
+        self.payloads = payloads
+        self.sample_dir = sample_dir
+        self.sample_rate = sample_rate
+        self.sample_max_bytes = sample_max_bytes
+        self.max_body_bytes = max_body_bytes
+        # Without a fixed salt, tokens are only consistent within one process.
+        self.salt = salt.encode() if salt else os.urandom(16)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        start = time.perf_counter()
+        chunks = []
+        sizes = {'request': 0, 'response': 0}
+        status = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if message['type'] == 'http.request':
+                body = message.get('body', b'')
+                sizes['request'] += len(body)
+                if sizes['request'] <= self.max_body_bytes:
+                    chunks.append(body)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                sizes['response'] += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            route = scope.get('route')
+            headers = dict(scope.get('headers') or [])
+            record = {
+                "started_at": round(started_at, 6),
+                "method": scope.get('method', ''),
+                "route": getattr(route, 'path', None),
+                "path": scope.get('path'),
+                "query": scope.get('query_string', b'').decode('latin-1'),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "content_type": headers.get(b'content-type', b'').decode('latin-1'),
+                "request_bytes": sizes['request'],
+                "response_bytes": sizes['response'],
+            }
+            body = b''.join(chunks) if sizes['request'] <= self.max_body_bytes else None
+            asyncio.get_running_loop().run_in_executor(None, self.record, record, body)
+
+    def record(self, record, body):
+        try:
+            record.update(self.describe_body(record['content_type'], body))
+        except Exception as e:
+            record['body_error'] = str(e)
+        self.writer.log('request', level='trace', **record)
+
+    def describe_body(self, content_type, body):
+        if not body:
+            return {}
+        base, options = content_type_options(content_type)
+        if base == 'application/json':
+            try:
+                return {"json": anonymize(json.loads(body), self.salt)}
+            except ValueError:
+                return {}
+        if base == 'multipart/form-data' and options.get('boundary'):
+            parts = []
+            for name, filename, part_type, content in multipart_parts(body, options['boundary']):
+                if filename is None:
+                    value = REDACTED if (name or '').lower() in CREDENTIAL_FIELDS \
+                        else anonymize(content.decode('utf-8', 'replace'), self.salt)
+                    parts.append({"name": name, "value": value})
+                    continue
+                part = {"name": name, "content_type": part_type, "bytes": len(content),
+                        "extension": os.path.splitext(filename)[1].lower()[:10]}
+                if self.payloads != 'none':
+                    part['sha256'] = hashlib.sha256(content).hexdigest()
+                if self.payloads == 'sample' and self.sample_dir and len(content) <= self.sample_max_bytes \
+                        and random.random() < self.sample_rate:
+                    part['sample'] = self.save_sample(part['sha256'], part['extension'] or mimetypes.guess_extension(part_type or '') or '', content)
+                parts.append(part)
+            return {"parts": parts}
+        return {}
+
+    def save_sample(self, digest, extension, content):
+        name = digest + extension
+        path = os.path.join(self.sample_dir, name)
+        if not os.path.exists(path):
+            os.makedirs(self.sample_dir, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(content)
+            os.replace(temporary, path)
+        return name
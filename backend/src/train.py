@@ -4,6 +4,7 @@ import torch.optim as optim
 from torch.utils.data import DataLoader
 from src.model import ForestFirePredictor
 from src.data_preprocessing import load_and_split_data, ForestFireDataset, data_transforms
+from src.weights import WEIGHTS_PATH, model_metadata, save_weights
 import os
 
 def train_model(model, train_loader, val_loader, criterion, optimizer, num_epochs=10, device='cpu'):
@@ -115,3 +116,5 @@ if __name__ == '__main__':
         MODEL_SAVE_PATH = os.path.join('models', 'forest_fire_model.pth')
         torch.save(model.state_dict(), MODEL_SAVE_PATH)
         print(f"Model saved to {MODEL_SAVE_PATH}")
+        save_weights(model.state_dict(), WEIGHTS_PATH, model_metadata())
+        print(f"Memory-mappable weights saved to {WEIGHTS_PATH}")
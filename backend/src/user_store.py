@@ -0,0 +1,312 @@
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+try:
+    from db_pool import ConnectionPool
+except ImportError:
+    from src.db_pool import ConnectionPool
+
+# Columns added to the users table after its first version.
+OPTIONAL_COLUMNS = ('fullname', 'email', 'phone', 'profile_image')
+
+# Written with %s placeholders; SQLite's are substituted once per backend.
+# login returns (id, username, fullname, email, phone, profile_image), where
+# profile_image is an avatar reference (see src/avatars.py).
+STATEMENTS = {
+    'insert': 'INSERT INTO users(username, password, fullname, email, phone) VALUES (%s,%s,%s,%s,%s)',
+    'login': 'SELECT {id}, username, fullname, email, phone, profile_image '
+             'FROM users WHERE username = %s AND password = %s',
+    'update': 'UPDATE users SET email=%s, phone=%s WHERE username=%s',
+    'update_with_image': 'UPDATE users SET email=%s, phone=%s, profile_image=%s WHERE username=%s',
+    'set_image': 'UPDATE users SET profile_image=%s WHERE username=%s',
+    'revoke': 'INSERT INTO revoked_tokens(jti, expires_at) VALUES (%s,%s)',
+    'revoked': 'SELECT jti, expires_at FROM revoked_tokens WHERE expires_at > %s',
+    'purge_revoked': 'DELETE FROM revoked_tokens WHERE expires_at <= %s',
+}
+QUERIES = ('login', 'revoked')
+
+# Session tokens revoked before they expire (see src/sessions.py); rows can be
+# deleted once expires_at has passed.
+REVOCATION_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS revoked_tokens (
+        jti VARCHAR(64) PRIMARY KEY,
+        expires_at BIGINT NOT NULL
+    )
+'''
+
+
+def make_hashes(password):
+    return hashlib.sha256(str.encode(password)).hexdigest()
+
+
+def check_hashes(password, hashed_text):
+    if make_hashes(password) == hashed_text:
+        return hashed_text
+    return False
+
+
+class UserRepository:
+    """The users table, behind one API for every storage backend.
+
+    Backends supply ``connect()``, the schema and their placeholder and
+    error types; queries, pooling (see src/db_pool.py) and schema upgrades
+    are shared. ``pool_size=0`` opens a connection per call.
+    """
+
+    name = None
+    placeholder = '%s'
+    id_column = 'id'
+    schema = None
+    column_types = None
+
+    def __init__(self, pool_size=10, pool_timeout=5.0, idle_timeout=300.0, check_after=30.0, on_wait=None):
+        self.statements = {
+            name: sql.format(id=self.id_column).replace('%s', self.placeholder)
+            for name, sql in STATEMENTS.items()
+        }
+        self.pool = None
+        if pool_size > 0:
+            self.pool = ConnectionPool(
+                lambda: self.connect(), max_size=pool_size, timeout=pool_timeout,
+                idle_timeout=idle_timeout, check_after=check_after, check=self.check, on_wait=on_wait,
+            )
+
+    def connect(self):
+        raise NotImplementedError
+
+    def check(self, conn):
+        raise NotImplementedError
+
+    def cursor(self, conn, statement):
+        return conn.cursor()
+
+    def release_cursor(self, cursor):
+        cursor.close()
+
+    def columns(self, conn):
+        raise NotImplementedError
+
+    @contextmanager
+    def connection(self):
+        if self.pool is None:
+            conn = self.connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+        with self.pool.connection() as conn:
+            yield conn
+
+    def execute(self, conn, statement, params):
+        cursor = self.cursor(conn, statement)
+        try:
+            cursor.execute(self.statements[statement], params)
+            return cursor.fetchall() if statement in QUERIES else None
+        finally:
+            self.release_cursor(cursor)
+
+    def init_schema(self):
+        with self.connection() as conn:
+            c = conn.cursor()
+            try:
+                c.execute(self.schema)
+                c.execute(REVOCATION_SCHEMA)
+                # Tables created by older versions can lack later columns.
+                existing = self.columns(conn)
+                for column in OPTIONAL_COLUMNS:
+                    if column not in existing:
+                        c.execute(f'ALTER TABLE users ADD COLUMN {column} {self.column_types[column]}')
+                conn.commit()
+            except self.errors as e:
+                print(f"DB Init Error: {e}")
+            finally:
+                c.close()
+
+    def add_user(self, username, password, fullname, email, phone):
+        with self.connection() as conn:
+            try:
+                self.execute(conn, 'insert', (username, make_hashes(password), fullname, email, phone))
+                conn.commit()
+            except self.errors:
+                return False
+        return True
+
+    def login(self, username, password):
+        with self.connection() as conn:
+            return self.execute(conn, 'login', (username, make_hashes(password)))
+
+    def update_profile(self, username, email, phone, profile_image=None):
+        with self.connection() as conn:
+            try:
+                if profile_image:
+                    # Update image as well if provided
+                    self.execute(conn, 'update_with_image', (email, phone, profile_image, username))
+                else:
+                    self.execute(conn, 'update', (email, phone, username))
+                conn.commit()
+                return True
+            except self.errors as e:
+                print(f"Error updating profile: {e}")
+                return False
+
+    def set_profile_image(self, username, profile_image):
+        with self.connection() as conn:
+            try:
+                self.execute(conn, 'set_image', (profile_image, username))
+                conn.commit()
+                return True
+            except self.errors as e:
+                print(f"Error updating profile image: {e}")
+                return False
+
+    def revoke_token(self, jti, expires_at):
+        """Record a revoked token id. False if it was already revoked, which
+        makes revoking a refresh token a safe single-use check. Any other
+        database error is raised, so a failed write is never mistaken for a
+        reused token."""
+        with self.connection() as conn:
+            try:
+                self.execute(conn, 'revoke', (jti, int(expires_at)))
+                conn.commit()
+            except self.integrity_errors:
+                conn.rollback()
+                return False
+        return True
+
+    def revoked_tokens(self, now):
+        with self.connection() as conn:
+            return self.execute(conn, 'revoked', (int(now),))
+
+    def purge_revoked_tokens(self, now):
+        with self.connection() as conn:
+            self.execute(conn, 'purge_revoked', (int(now),))
+            conn.commit()
+
+    def pool_stats(self):
+        return self.pool.stats() if self.pool is not None else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+
+class MySQLUserRepository(UserRepository):
+    """MySQL, for deployments where several nodes share one user table.
+
+    Statements run as server-side prepared statements, and each pooled
+    connection keeps its prepared cursors, so repeated logins skip parsing.
+    """
+
+    name = 'mysql'
+    schema = '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            fullname VARCHAR(255),
+            email VARCHAR(255),
+            phone VARCHAR(255),
+            profile_image VARCHAR(64)
+        )
+    '''
+    # Older tables hold profile_image as LONGTEXT data URLs; those values are
+    # moved to the avatar store as their users log in.
+    column_types = {'fullname': 'VARCHAR(255)', 'email': 'VARCHAR(255)', 'phone': 'VARCHAR(255)', 'profile_image': 'VARCHAR(64)'}
+
+    def __init__(self, host, user, password, database, **pool_options):
+        import mysql.connector
+
+        self.mysql = mysql.connector
+        self.errors = (mysql.connector.Error,)
+        self.integrity_errors = (mysql.connector.IntegrityError,)
+        self.settings = dict(host=host, user=user, password=password, database=database)
+        super().__init__(**pool_options)
+
+    def connect(self):
+        return self.mysql.connect(**self.settings)
+
+    def check(self, conn):
+        return conn.is_connected()
+
+    def cursor(self, conn, statement):
+        cursors = getattr(conn, '_user_store_cursors', None)
+        if cursors is None:
+            cursors = conn._user_store_cursors = {}
+        if statement not in cursors:
+            cursors[statement] = conn.cursor(prepared=True)
+        return cursors[statement]
+
+    def release_cursor(self, cursor):
+        # Prepared cursors stay open with their connection.
+        pass
+
+    def columns(self, conn):
+        c = conn.cursor()
+        try:
+            c.execute('SHOW COLUMNS FROM users')
+            return {row[0] for row in c.fetchall()}
+        finally:
+            c.close()
+
+
+# WAL lets readers run alongside the single writer; NORMAL sync is durable
+# across application crashes (only a power loss can drop the last commits).
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'busy_timeout=5000',
+    'temp_store=MEMORY',
+    'cache_size=-16000',
+    'mmap_size=134217728',
+)
+
+
+class SQLiteUserRepository(UserRepository):
+    """SQLite in WAL mode, for single-node and edge deployments.
+
+    Needs nothing beyond the standard library. The sqlite3 module caches
+    compiled statements per connection, and pooled connections keep them.
+    Works with the users.db files written by the original SQLite auth
+    module. Their rowid stands in for the id column.
+    """
+
+    name = 'sqlite'
+    placeholder = '?'
+    id_column = 'rowid'
+    errors = (sqlite3.Error,)
+    integrity_errors = (sqlite3.IntegrityError,)
+    schema = '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            fullname TEXT,
+            email TEXT,
+            phone TEXT,
+            profile_image TEXT
+        )
+    '''
+    column_types = {column: 'TEXT' for column in OPTIONAL_COLUMNS}
+
+    def __init__(self, path='users.db', **pool_options):
+        self.path = path
+        super().__init__(**pool_options)
+
+    def connect(self):
+        # Pooled connections move between request threads.
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, cached_statements=64)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(f'PRAGMA {pragma}')
+        return conn
+
+    def check(self, conn):
+        conn.execute('SELECT 1')
+        return True
+
+    def columns(self, conn):
+        return {row[1] for row in conn.execute('PRAGMA table_info(users)')}
+
+
+USER_STORES = {'mysql': MySQLUserRepository, 'sqlite': SQLiteUserRepository}
@@ -0,0 +1,118 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+import torch
+
+try:
+    from data_preprocessing import IMAGE_SIZE, NORMALIZE_MEAN, NORMALIZE_STD
+except ImportError:
+    from src.data_preprocessing import IMAGE_SIZE, NORMALIZE_MEAN, NORMALIZE_STD
+
+WEIGHTS_PATH = os.path.join('models', 'forest_fire_model.safetensors')
+CLASS_NAMES = ["No Fire", "Fire"]
+
+# safetensors dtype names <-> torch dtypes.
+DTYPES = {
+    'F64': torch.float64, 'F32': torch.float32, 'F16': torch.float16, 'BF16': torch.bfloat16,
+    'I64': torch.int64, 'I32': torch.int32, 'I16': torch.int16, 'I8': torch.int8,
+    'U8': torch.uint8, 'BOOL': torch.bool,
+}
+DTYPE_NAMES = {dtype: name for name, dtype in DTYPES.items()}
+
+
+def model_metadata(class_names=CLASS_NAMES):
+    """What a server needs to use the weights, stored next to them."""
+    return {
+        "class_names": class_names,
+        "input_size": IMAGE_SIZE,
+        "normalize_mean": NORMALIZE_MEAN,
+        "normalize_std": NORMALIZE_STD,
+    }
+
+
+def save_weights(state_dict, path=WEIGHTS_PATH, metadata=None):
+    """Write ``state_dict`` in the safetensors layout.
+
+    The file is an 8-byte little-endian header length, a JSON header giving
+    each tensor's dtype, shape and byte range, then the raw tensor bytes, so
+    a reader can map it and point tensors straight at the file. ``metadata``
+    values are JSON-encoded into the header's ``__metadata__`` section.
+    """
+    header = {}
+    if metadata:
+        header["__metadata__"] = {key: json.dumps(value) for key, value in metadata.items()}
+    tensors = []
+    offset = 0
+    for name, tensor in state_dict.items():
+        tensor = tensor.detach().cpu().contiguous()
+        size = tensor.numel() * tensor.element_size()
+        header[name] = {
+            "dtype": DTYPE_NAMES[tensor.dtype],
+            "shape": list(tensor.shape),
+            "data_offsets": [offset, offset + size],
+        }
+        tensors.append(tensor)
+        offset += size
+
+    encoded = json.dumps(header, separators=(',', ':')).encode()
+    # Pad so the data section starts 8-byte aligned.
+    encoded += b' ' * (-(8 + len(encoded)) % 8)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        for tensor in tensors:
+            f.write(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """Memory-map a weights file; returns ``(state_dict, metadata)``.
+
+    Tensors are views into a copy-on-write mapping of the file: nothing is
+    read until a page is touched, and every process serving the same file
+    shares the same page-cache pages instead of holding a private copy.
+    """
+    with open(path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    metadata = {key: json.loads(value) for key, value in header.pop("__metadata__", {}).items()}
+    state_dict = {}
+    for name, info in header.items():
+        dtype = DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // dtype.itemsize
+        if count:
+            tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + start)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        state_dict[name] = tensor.reshape(info["shape"])
+    return state_dict, metadata
+
+
+def load_state_dict(path, map_location='cpu'):
+    """State dict from a ``.safetensors`` or ``.pth`` file, memory-mapped either way.
+
+    Pass the result to ``load_state_dict(..., assign=True)`` so the module
+    keeps the mapped tensors instead of copying them into fresh parameters.
+    """
+    if path.endswith('.safetensors'):
+        return load_weights(path)[0]
+    return torch.load(path, map_location=map_location, mmap=True, weights_only=True)
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join('models', 'forest_fire_model.pth')
+    target = sys.argv[2] if len(sys.argv) > 2 else WEIGHTS_PATH
+    if not os.path.exists(source):
+        print(f"Error: Model file not found at {source}")
+        sys.exit(1)
+    save_weights(torch.load(source, map_location='cpu', weights_only=True), target, model_metadata())
+    print(f"Weights with metadata saved to {target}")
@@ -0,0 +1,62 @@
+import base64
+import io
+import os
+import sys
+import tempfile
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from avatars import AVATAR_SIZES, AvatarError, AvatarStore, decode_data_url
+
+
+def image_bytes(size=(300, 200), mode='RGB', fmt='PNG'):
+    out = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(out, format=fmt)
+    return out.getvalue()
+
+
+def test_content_addressed_renditions():
+    with tempfile.TemporaryDirectory() as root:
+        store = AvatarStore(root)
+        data = image_bytes()
+        ref = store.save(data)
+        assert store.save(data) == ref and store.exists(ref)
+        for size, edge in AVATAR_SIZES.items():
+            with Image.open(store.path(ref, size)) as rendition:
+                assert rendition.format == 'WEBP' and rendition.size == (edge, edge)
+        assert store.save(image_bytes(mode='RGBA')) != ref
+        assert store.etag(ref, '64') != store.etag(ref, '256')
+
+
+def test_rejects_bad_input():
+    with tempfile.TemporaryDirectory() as root:
+        store = AvatarStore(root, max_bytes=50_000)
+        for data in (b'not an image', os.urandom(60_000)):
+            try:
+                store.save(data)
+                raise AssertionError("expected AvatarError")
+            except AvatarError:
+                pass
+        assert store.path('../../etc/passwd') is None
+        assert store.path('ab' * 32, size='huge') is None
+        assert not store.exists('ab' * 32)
+
+
+def test_decode_data_url():
+    data = image_bytes(fmt='JPEG')
+    assert decode_data_url('data:image/jpeg;base64,' + base64.b64encode(data).decode()) == data
+    for value in ('https://example.com/me.png', 'data:image/png;base64,@@@'):
+        try:
+            decode_data_url(value)
+            raise AssertionError("expected AvatarError")
+        except AvatarError:
+            pass
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,52 @@
+import io
+import os
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from batch_inputs import ArchiveError, open_zip_images, read_zip_member
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def raises_archive_error(call):
+    try:
+        call()
+    except ArchiveError:
+        return True
+    return False
+
+
+def test_lists_image_members_only():
+    upload = make_zip({'a.jpg': b'a' * 10, 'dir/b.PNG': b'b' * 20, 'notes.txt': b'x', '.hidden.jpg': b'h',
+                       '__MACOSX/a.jpg': b'm'})
+    archive, members = open_zip_images(upload, max_total_bytes=1000)
+    assert [info.filename for info in members] == ['a.jpg', 'dir/b.PNG']
+    assert read_zip_member(archive, members[1], max_member_bytes=20) == b'b' * 20
+
+
+def test_size_limits():
+    # Highly compressible, like a zip bomb: small on the wire, large inflated.
+    upload = make_zip({'bomb.png': b'\0' * 1_000_000, 'ok.jpg': b'ok'})
+    assert len(upload.getvalue()) < 10_000
+    assert raises_archive_error(lambda: open_zip_images(upload, max_total_bytes=999_999))
+
+    archive, members = open_zip_images(upload, max_total_bytes=2_000_000)
+    bomb, ok = members
+    assert raises_archive_error(lambda: read_zip_member(archive, bomb, max_member_bytes=100_000))
+    assert read_zip_member(archive, ok, max_member_bytes=100_000) == b'ok'
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def is_connected(self):
+        return self.healthy
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_reuses_connections_and_resets_transactions():
+    pool = ConnectionPool(FakeConnection, max_size=2)
+    with pool.connection() as first:
+        first.in_transaction = True
+    with pool.connection() as second:
+        pass
+    assert second is first and first.rollbacks == 1
+    assert pool.stats()['created'] == 1 and pool.stats()['idle'] == 1
+
+
+def test_bounded_with_wait_and_timeout():
+    waits = []
+    pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.1, on_wait=waits.append)
+    held = pool.acquire()
+    try:
+        pool.acquire()
+    except PoolTimeout:
+        pass
+    else:
+        raise AssertionError("expected PoolTimeout")
+
+    threading.Timer(0.05, pool.release, (held,)).start()
+    pool.timeout = 2
+    assert pool.acquire() is held
+    stats = pool.stats()
+    assert stats['timeouts'] == 1 and stats['waited'] == 1 and stats['created'] == 1
+    assert waits[-1] >= 0.04 and stats['wait_seconds_max'] >= 0.04
+
+
+def test_idle_timeout_health_check_and_broken_connections():
+    pool = ConnectionPool(FakeConnection, max_size=2, idle_timeout=60, check_after=0)
+    with pool.connection() as conn:
+        pass
+    conn.healthy = False
+    time.sleep(0.01)
+    with pool.connection() as replacement:
+        pass
+    assert conn.closed and replacement is not conn
+
+    pool.idle_timeout = 0
+    time.sleep(0.01)
+    with pool.connection() as fresh:
+        pass
+    assert replacement.closed and fresh is not replacement
+
+    pool.idle_timeout = 60
+    try:
+        with pool.connection() as broken:
+            raise RuntimeError("query failed")
+    except RuntimeError:
+        pass
+    assert broken.closed
+    stats = pool.stats()
+    assert stats['closed_unhealthy'] == 1 and stats['closed_idle'] == 1 and stats['closed_broken'] == 1
+    assert stats['open'] == 0
+
+
+def test_failed_connect_frees_its_slot():
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("connection refused")
+        return FakeConnection()
+
+    pool = ConnectionPool(connect, max_size=1, timeout=0.1)
+    try:
+        pool.acquire()
+    except OSError:
+        pass
+    assert isinstance(pool.acquire(), FakeConnection)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from model import ForestFirePredictor
+from optimize import export_torchscript, fuse_for_inference, load_torchscript
+
+
+def trained_like_model(seed=0):
+    # Random weights plus non-trivial BatchNorm statistics, so folding
+    # actually has something to fold.
+    torch.manual_seed(seed)
+    model = ForestFirePredictor()
+    for i in range(1, 6):
+        bn = getattr(model, f'bn{i}')
+        bn.running_mean.uniform_(-1, 1)
+        bn.running_var.uniform_(0.5, 2)
+        bn.weight.data.uniform_(0.5, 1.5)
+        bn.bias.data.uniform_(-0.5, 0.5)
+    return model.eval()
+
+
+def test_fused_model_matches_eager():
+    model = trained_like_model()
+    fused = fuse_for_inference(model)
+    inputs = torch.randn(4, 3, 224, 224)
+    with torch.no_grad():
+        expected = model(inputs)
+        actual = fused(inputs)
+    assert torch.allclose(expected, actual, rtol=1e-4, atol=1e-5), (expected - actual).abs().max()
+
+
+def test_fused_model_has_no_batchnorm():
+    fused = fuse_for_inference(trained_like_model())
+    assert not any(isinstance(m, torch.nn.BatchNorm2d) for m in fused.modules())
+
+
+def test_fusion_leaves_original_untouched():
+    model = trained_like_model()
+    before = {k: v.clone() for k, v in model.state_dict().items()}
+    fuse_for_inference(model)
+    for key, value in model.state_dict().items():
+        assert torch.equal(before[key], value), key
+
+
+def test_exported_torchscript_loads_and_matches_eager():
+    model = trained_like_model()
+    inputs = torch.randn(2, 3, 224, 224)
+    with tempfile.TemporaryDirectory() as root:
+        path = export_torchscript(fuse_for_inference(model), os.path.join(root, 'model_ts.pt'))
+        scripted = load_torchscript(path)
+    with torch.no_grad():
+        expected = model(inputs)
+        actual = scripted(inputs)
+    assert torch.allclose(expected, actual, rtol=1e-4, atol=1e-5), (expected - actual).abs().max()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from log_pipeline import LogPipeline
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_json_lines():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'log.txt')
+        pipeline = LogPipeline(path, flush_interval=0.01)
+        for i in range(100):
+            pipeline.log("Prediction", index=i, probabilities=[0.25, 0.75])
+        pipeline.flush()
+        records = read_records(path)
+        assert [record["index"] for record in records] == list(range(100))
+        assert records[0]["message"] == "Prediction" and records[0]["level"] == "debug"
+        assert pipeline.stats()["written"] == 100 and pipeline.stats()["dropped"] == 0
+
+
+def test_size_rotation_keeps_backups():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'log.txt')
+        pipeline = LogPipeline(path, max_bytes=2000, backup_count=2, flush_interval=0.01)
+        for i in range(200):
+            pipeline.log("x" * 50, index=i)
+            if i % 10 == 9:
+                pipeline.flush()
+        pipeline.flush()
+        assert pipeline.stats()["rotations"] > 2
+        assert sorted(os.listdir(root)) == ['log.txt', 'log.txt.1', 'log.txt.2']
+        assert all(os.path.getsize(os.path.join(root, name)) <= 2000 for name in os.listdir(root))
+        assert read_records(path)[-1]["index"] == 199
+
+
+def test_flush_on_idle_pipeline_returns_immediately():
+    with tempfile.TemporaryDirectory() as root:
+        pipeline = LogPipeline(os.path.join(root, 'log.txt'), flush_interval=3.0)
+        pipeline.log("Prediction")
+        pipeline.flush()
+        assert pipeline.stats()["written"] == 1
+        # The writer is now idle, so the flush marker is the first item it takes.
+        start = time.monotonic()
+        pipeline.flush()
+        assert time.monotonic() - start < 1.0
+
+
+def test_sampling():
+    assert LogPipeline.sampled(1.0) and not LogPipeline.sampled(0.0)
+    hits = sum(LogPipeline.sampled(0.1) for _ in range(10000))
+    assert 700 < hits < 1300
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from metrics import MetricsMiddleware, MetricsRegistry
+
+
+def sample_lines(registry):
+    return [line for line in registry.render().splitlines() if not line.startswith('#')]
+
+
+def test_counter_merges_thread_shards():
+    registry = MetricsRegistry('test')
+    requests = registry.counter('requests', "Requests.", ('path',))
+
+    def work():
+        for _ in range(1000):
+            requests.inc('/predict')
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests.inc('/login', amount=2)
+    assert sample_lines(registry) == [
+        'test_requests_total{path="/login"} 2',
+        'test_requests_total{path="/predict"} 8000',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', "Latency.", ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, 'forward')
+    assert sample_lines(registry) == [
+        'latency_seconds_bucket{stage="forward",le="0.1"} 2',
+        'latency_seconds_bucket{stage="forward",le="1"} 3',
+        'latency_seconds_bucket{stage="forward",le="+Inf"} 4',
+        'latency_seconds_sum{stage="forward"} 2.65',
+        'latency_seconds_count{stage="forward"} 4',
+    ]
+
+
+def test_gauge_callback_and_label_escaping():
+    registry = MetricsRegistry()
+    registry.gauge('model_info', "Model.", lambda: {('v"1',): 1}, ('version',))
+    registry.gauge('queue_depth', "Depth.", lambda: 3)
+    registry.gauge('absent', "Not reported.", lambda: None)
+    assert sample_lines(registry) == ['model_info{version="v\\"1"} 1', 'queue_depth 3']
+
+
+def test_middleware_labels_route_template():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests', "Requests.", ('method', 'path', 'status'))
+    latency = registry.histogram('latency', "Latency.", ('method', 'path'))
+
+    class Route:
+        path = '/models/{version}'
+
+    async def app(scope, receive, send):
+        scope['route'] = Route()
+        assert 'request_started' in scope['state']
+        await send({'type': 'http.response.start', 'status': 201})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(app, requests, latency)
+    asyncio.run(middleware({'type': 'http', 'method': 'POST', 'path': '/models/v2'}, None, send))
+    assert 'requests_total{method="POST",path="/models/{version}",status="201"} 1' in sample_lines(registry)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
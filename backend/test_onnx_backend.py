@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from model import ForestFirePredictor
+from backends import OnnxRuntimeBackend, TorchBackend
+from onnx_export import export_onnx
+
+
+def make_backends(seed=0):
+    torch.manual_seed(seed)
+    model = ForestFirePredictor().eval()
+    root = tempfile.mkdtemp()
+    path = export_onnx(model, os.path.join(root, 'model.onnx'))
+    return TorchBackend(model), OnnxRuntimeBackend(path)
+
+
+def test_backends_agree_across_batch_sizes():
+    torch_backend, onnx_backend = make_backends()
+    for batch_size in (1, 3, 16):
+        inputs = torch.randn(batch_size, 3, 224, 224)
+        expected = torch_backend.predict(inputs)
+        actual = onnx_backend.predict(inputs)
+        assert actual.shape == expected.shape == (batch_size, 2)
+        assert actual.dtype == expected.dtype == torch.float32
+        assert torch.allclose(expected, actual, atol=1e-5), (expected - actual).abs().max()
+        assert torch.equal(expected.argmax(dim=1), actual.argmax(dim=1))
+
+
+def test_probabilities_sum_to_one():
+    _, onnx_backend = make_backends()
+    probabilities = onnx_backend.predict(torch.randn(4, 3, 224, 224))
+    assert torch.allclose(probabilities.sum(dim=1), torch.ones(4), atol=1e-6)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from prediction_cache import PredictionCache
+
+
+async def settle():
+    # Disk writes are scheduled on the default executor and not awaited.
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, lambda: None)
+    await asyncio.sleep(0.05)
+
+
+def test_disk_tier_survives_a_new_cache():
+    async def run(root):
+        first = PredictionCache(max_entries=4, disk_dir=root)
+        key = PredictionCache.make_key(b'image', 'model-a')
+
+        async def compute():
+            return {"prediction": "Fire"}, key
+
+        assert await first.get_or_compute(key, compute) == {"prediction": "Fire"}
+        await settle()
+
+        second = PredictionCache(max_entries=4, disk_dir=root)
+        assert await second.get(key) == {"prediction": "Fire"}
+        assert second.stats()['disk_hits'] == 1
+        assert await second.get(key) == {"prediction": "Fire"}
+        assert second.stats()['hits'] == 1
+
+    with tempfile.TemporaryDirectory() as root:
+        asyncio.run(run(root))
+
+
+def test_value_is_stored_under_the_key_compute_returns():
+    # A reload landed while the request was queued: the result came from
+    # model-b, so it must not be served for model-a lookups.
+    async def run():
+        cache = PredictionCache(max_entries=4)
+        old_key = PredictionCache.make_key(b'image', 'model-a')
+        new_key = PredictionCache.make_key(b'image', 'model-b')
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"model_version": "b"}, new_key
+
+        results = await asyncio.gather(*(cache.get_or_compute(old_key, compute) for _ in range(3)))
+        assert results == [{"model_version": "b"}] * 3 and len(calls) == 1
+        assert await cache.get(old_key) is None
+        assert await cache.get(new_key) == {"model_version": "b"}
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,103 @@
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from data_preprocessing import ForestFireDataset, data_transforms, preprocess_image_bytes
+
+# Allowed drift between the reduced-resolution decode and the original
+# full-decode pipeline, in normalized tensor units (1.0 ~ 58 grey levels).
+MAX_MEAN_ABS_DRIFT = 0.02
+MAX_ABS_DRIFT = 0.25
+
+
+def make_scene(width=4000, height=3000, seed=0):
+    # Smooth terrain-like gradients plus low-frequency texture, roughly what
+    # a satellite tile looks like to the decoder.
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        (np.sin(x / 300) + 1) * 100 + 20,
+        (np.cos(y / 250) + 1) * 90 + 30,
+        (x + y) / (width + height) * 200,
+    ], axis=-1)
+    texture = rng.normal(128, 12, (height // 8, width // 8, 3)).clip(0, 255).astype(np.uint8)
+    texture = np.asarray(Image.fromarray(texture).resize((width, height), Image.BILINEAR), dtype=np.float64) - 128
+    return Image.fromarray(np.clip(base + texture, 0, 255).astype(np.uint8))
+
+
+def encode(image, fmt, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def reference_tensor(contents):
+    # The original pipeline: full-resolution decode, then Resize.
+    return data_transforms(Image.open(io.BytesIO(contents)).convert('RGB'))
+
+
+def test_jpeg_drift_is_bounded():
+    contents = encode(make_scene(), 'JPEG', quality=90)
+    drift = (preprocess_image_bytes(contents) - reference_tensor(contents)).abs()
+    assert drift.mean().item() < MAX_MEAN_ABS_DRIFT, drift.mean().item()
+    assert drift.max().item() < MAX_ABS_DRIFT, drift.max().item()
+
+
+def test_grayscale_jpeg_is_converted_to_rgb():
+    contents = encode(make_scene(1200, 900).convert('L'), 'JPEG', quality=90)
+    tensor = preprocess_image_bytes(contents)
+    assert tuple(tensor.shape) == (3, 224, 224)
+    assert (tensor - reference_tensor(contents)).abs().mean().item() < MAX_MEAN_ABS_DRIFT
+
+
+def test_small_jpeg_is_unchanged():
+    # Already close to 224 px: draft() has nothing to skip.
+    contents = encode(make_scene(300, 250), 'JPEG', quality=90)
+    assert (preprocess_image_bytes(contents) - reference_tensor(contents)).abs().max().item() == 0
+
+
+def test_png_is_unchanged():
+    contents = encode(make_scene(1000, 800), 'PNG')
+    assert (preprocess_image_bytes(contents) - reference_tensor(contents)).abs().max().item() == 0
+
+
+def test_dataset_uses_fast_path():
+    contents = encode(make_scene(), 'JPEG', quality=90)
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, 'Fire'))
+        with open(os.path.join(root, 'Fire', 'scene.jpg'), 'wb') as f:
+            f.write(contents)
+        image, label = ForestFireDataset(root, transform=data_transforms)[0]
+    assert label == 1
+    assert (image - preprocess_image_bytes(contents)).abs().max().item() == 0
+
+
+def test_transform_matches_torchvision():
+    # data_transforms re-implements torchvision's Resize/ToTensor/Normalize;
+    # skipped where torchvision isn't installed.
+    try:
+        from torchvision import transforms
+    except ImportError:
+        return
+    from data_preprocessing import NORMALIZE_MEAN, NORMALIZE_STD
+    reference = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=NORMALIZE_MEAN, std=NORMALIZE_STD),
+    ])
+    for size in [(1000, 800), (224, 224), (150, 400)]:
+        image = make_scene(*size)
+        assert data_transforms(image).equal(reference(image)), size
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
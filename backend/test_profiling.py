@@ -0,0 +1,72 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+import torch
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from backends import TorchBackend
+from data_preprocessing import data_transforms, load_image
+from model import ForestFirePredictor
+from optimize import fuse_for_inference
+from profiling import MODEL_LAYERS, ProfileStore, instrument_layers, profile_prediction
+
+
+def jpeg_bytes():
+    buffer = io.BytesIO()
+    Image.effect_noise((300, 200), 64).convert('RGB').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def test_instrumented_copy_times_layers_and_leaves_model_alone():
+    torch.manual_seed(0)
+    for model in (ForestFirePredictor().eval(), fuse_for_inference(ForestFirePredictor().eval())):
+        batch = torch.randn(2, 3, 224, 224)
+        timings = {}
+        with torch.no_grad():
+            expected = model(batch)
+            actual = instrument_layers(model, timings)(batch)
+        assert torch.equal(expected, actual)
+        assert set(timings) == set(MODEL_LAYERS) and all(ms > 0 for ms in timings.values())
+        for name in MODEL_LAYERS:
+            layer = getattr(model, name)
+            assert not layer._forward_hooks and not layer._forward_pre_hooks
+
+
+def test_profile_prediction_matches_backend():
+    backend = TorchBackend(ForestFirePredictor().eval())
+    contents = jpeg_bytes()
+    probabilities, stages, layers, profiler = profile_prediction(backend, contents, load_image, data_transforms)
+    expected = backend.predict(data_transforms(load_image(io.BytesIO(contents))).unsqueeze(0))[0]
+    assert torch.allclose(probabilities, expected)
+    assert set(stages) == {'decode', 'transform', 'forward'}
+    assert set(layers) == set(MODEL_LAYERS)
+    assert any(event.key == 'conv1' for event in profiler.key_averages())
+
+
+def test_store_keeps_newest_profiles():
+    backend = TorchBackend(ForestFirePredictor().eval())
+    contents = jpeg_bytes()
+    with tempfile.TemporaryDirectory() as root:
+        store = ProfileStore(root, max_profiles=2)
+        ids = []
+        for _ in range(3):
+            profiler = profile_prediction(backend, contents, load_image, data_transforms)[3]
+            ids.append(store.save({"total_ms": 1.0}, profiler))
+            time.sleep(0.01)
+        assert [entry['id'] for entry in store.list()] == ids[:0:-1]
+        assert store.path(ids[0]) is None and store.load(ids[2])['top_ops']
+        assert store.path(ids[2], trace=True).endswith('.trace.json')
+        assert store.path('../' + ids[2]) is None
+        assert len(os.listdir(root)) == 4
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,197 @@
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from data_preprocessing import data_transforms, load_image
+from raster import MemmapRaster, PILRaster, TiledMemmapRaster, open_raster
+
+
+def make_pixels(width, height, bands=3, dtype=np.uint8, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, np.iinfo(dtype).max, (height, width, bands), dtype=dtype)
+
+
+def write_tiled_tiff(path, pixels, tile=64):
+    # Minimal little-endian tiled TIFF writer; Pillow can only write strips.
+    height, width, bands = pixels.shape
+    tiles = []
+    for top in range(0, height, tile):
+        for left in range(0, width, tile):
+            block = np.zeros((tile, tile, bands), dtype=pixels.dtype)
+            part = pixels[top:top + tile, left:left + tile]
+            block[:part.shape[0], :part.shape[1]] = part
+            tiles.append(block.tobytes())
+
+    entries = 10
+    ifd_size = 2 + entries * 12 + 4
+    bits_offset = 8 + ifd_size
+    offsets_offset = bits_offset + 2 * bands
+    counts_offset = offsets_offset + 4 * len(tiles)
+    data_offset = counts_offset + 4 * len(tiles)
+    tile_offsets, position = [], data_offset
+    for data in tiles:
+        tile_offsets.append(position)
+        position += len(data)
+
+    def entry(tag, field_type, count, value):
+        code = {3: 'H', 4: 'I'}[field_type]
+        if count == 1:
+            return struct.pack('<HHI', tag, field_type, count) + struct.pack('<' + code, value).ljust(4, b'\0')
+        return struct.pack('<HHII', tag, field_type, count, value)
+
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, 8))
+        f.write(struct.pack('<H', entries))
+        f.write(entry(256, 4, 1, width))
+        f.write(entry(257, 4, 1, height))
+        f.write(entry(258, 3, bands, bits_offset) if bands > 2 else entry(258, 3, 1, pixels.dtype.itemsize * 8))
+        f.write(entry(259, 3, 1, 1))
+        f.write(entry(262, 3, 1, 2 if bands >= 3 else 1))
+        f.write(entry(277, 3, 1, bands))
+        f.write(entry(284, 3, 1, 1))
+        f.write(entry(322, 3, 1, tile))
+        f.write(entry(323, 3, 1, tile))
+        f.write(entry(324, 4, len(tiles), offsets_offset))
+        f.write(struct.pack('<I', 0))
+        f.write(struct.pack('<' + 'H' * bands, *[pixels.dtype.itemsize * 8] * bands))
+        f.write(struct.pack('<' + 'I' * len(tiles), *tile_offsets))
+        f.write(struct.pack('<' + 'I' * len(tiles), *[len(data) for data in tiles]))
+        for data in tiles:
+            f.write(data)
+
+
+def test_strip_tiff_windows_match_pixels():
+    pixels = make_pixels(700, 500)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'scene.tif')
+        Image.fromarray(pixels).save(path)
+        raster = open_raster(path)
+        assert isinstance(raster, MemmapRaster)
+        assert raster.size == (700, 500)
+        window = raster.read(13, 27, 250, 300)
+        assert np.shares_memory(window, raster.array)
+        assert np.array_equal(window, pixels[27:300, 13:250])
+        assert np.array_equal(np.asarray(raster.crop((600, 400, 700, 500))), pixels[400:, 600:])
+
+
+def test_tiled_tiff_windows_match_pixels():
+    pixels = make_pixels(300, 200)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'tiled.tif')
+        write_tiled_tiff(path, pixels)
+        raster = open_raster(path)
+        assert isinstance(raster, TiledMemmapRaster)
+        assert raster.size == (300, 200)
+        for left, top, right, bottom in [(0, 0, 300, 200), (50, 60, 190, 170), (250, 150, 300, 200)]:
+            assert np.array_equal(raster.read(left, top, right, bottom), pixels[top:bottom, left:right])
+        assert np.array_equal(raster.read(5, 7, 290, 199, step=3), pixels[7:199:3, 5:290:3])
+
+
+def test_raw_band_files():
+    pixels = make_pixels(120, 80)
+    layouts = {
+        'bip': pixels,
+        'bil': pixels.transpose(0, 2, 1),
+        'bsq': pixels.transpose(2, 0, 1),
+    }
+    with tempfile.TemporaryDirectory() as root:
+        for interleave, layout in layouts.items():
+            path = os.path.join(root, f'scene.{interleave}')
+            np.ascontiguousarray(layout).tofile(path)
+            with open(path + '.json', 'w') as f:
+                json.dump({'width': 120, 'height': 80, 'bands': 3, 'interleave': interleave}, f)
+            raster = open_raster(path)
+            assert np.array_equal(raster.read(10, 20, 100, 70), pixels[20:70, 10:100]), interleave
+
+
+def test_sixteen_bit_tiff_is_scaled():
+    pixels = make_pixels(100, 100, dtype=np.uint16)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'wide.tif')
+        write_tiled_tiff(path, pixels, tile=32)
+        window = open_raster(path).read(0, 0, 100, 100)
+        assert window.dtype == np.uint8
+        assert np.array_equal(window, (pixels >> 8).astype(np.uint8))
+
+
+def test_compressed_tiff_falls_back_to_pil():
+    pixels = make_pixels(200, 100)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'lzw.tif')
+        Image.fromarray(pixels).save(path, compression='tiff_lzw')
+        raster = open_raster(path)
+        assert isinstance(raster, PILRaster)
+        assert np.array_equal(np.asarray(raster.crop((10, 10, 50, 50))), pixels[10:50, 10:50])
+
+
+def test_palette_and_cmyk_tiffs_fall_back_to_pil():
+    with tempfile.TemporaryDirectory() as root:
+        palette = Image.new('P', (40, 30))
+        palette.putpalette([255, 0, 0, 0, 255, 0] + [0] * 762)
+        palette.paste(1, (20, 0, 40, 30))
+        cmyk = Image.new('CMYK', (40, 30), (0, 0, 0, 55))  # grey 200
+        inverted = Image.new('L', (40, 30), 200)
+        for name, image, save_options in (('palette.tif', palette, {}), ('cmyk.tif', cmyk, {}),
+                                          ('miniswhite.tif', inverted, {'tiffinfo': {262: 0}})):
+            path = os.path.join(root, name)
+            image.save(path, **save_options)
+            raster = open_raster(path)
+            expected = np.asarray(Image.open(path).convert('RGB'))
+            assert isinstance(raster, PILRaster), name
+            assert np.array_equal(raster.read(0, 0, 40, 30), expected), name
+        assert open_raster(os.path.join(root, 'palette.tif')).read(0, 0, 1, 1).tolist() == [[[255, 0, 0]]]
+        assert open_raster(os.path.join(root, 'cmyk.tif')).read(0, 0, 1, 1).tolist() == [[[200, 200, 200]]]
+
+
+def test_max_pixels_replaces_pil_limit_without_changing_it():
+    pixels = make_pixels(200, 100)
+    default = Image.MAX_IMAGE_PIXELS
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'lzw.tif')
+        Image.fromarray(pixels).save(path, compression='tiff_lzw')
+        Image.MAX_IMAGE_PIXELS = 5000
+        try:
+            try:
+                open_raster(path)
+                assert False, "expected DecompressionBombError"
+            except Image.DecompressionBombError:
+                pass
+            for source in (path, open(path, 'rb')):
+                raster = open_raster(source, max_pixels=20_000)
+                assert np.array_equal(np.asarray(raster.crop((10, 10, 50, 50))), pixels[10:50, 10:50])
+            try:
+                open_raster(path, max_pixels=19_999)
+                assert False, "expected DecompressionBombError"
+            except Image.DecompressionBombError:
+                pass
+            assert Image.MAX_IMAGE_PIXELS == 5000
+        finally:
+            Image.MAX_IMAGE_PIXELS = default
+
+
+def test_load_image_thumbnail_matches_full_decode():
+    # Smooth content: the box-filtered thumbnail should land very close to
+    # the original full-resolution decode + Resize.
+    y, x = np.mgrid[0:1800, 0:2400]
+    pixels = np.stack([x * 255 // 2400, y * 255 // 1800, (x + y) * 255 // 4200], axis=-1).astype(np.uint8)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'scene.tif')
+        Image.fromarray(pixels).save(path)
+        fast = data_transforms(load_image(path))
+        reference = data_transforms(Image.open(path).convert('RGB'))
+    assert tuple(fast.shape) == (3, 224, 224)
+    assert (fast - reference).abs().mean().item() < 0.02
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from registry import ModelRegistry, RegistryError, file_sha256
+
+
+def write_artifact(root, name, payload):
+    path = os.path.join(root, name)
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return path
+
+
+def test_register_activate_rollback():
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(os.path.join(root, 'registry'))
+        assert not registry.exists() and registry.active_version() is None
+
+        for version, payload in [('v1', b'one'), ('v2', b'two')]:
+            staging = os.path.join(root, version)
+            os.makedirs(staging)
+            registry.register(version, [write_artifact(staging, 'forest_fire_model.pth', payload)])
+        assert registry.active_version() is None
+
+        registry.activate('v1')
+        mtime = registry.manifest_mtime()
+        registry.activate('v2')
+        assert registry.active_version() == 'v2'
+        assert registry.manifest_mtime() != mtime
+
+        path = registry.artifact_path('v2', 'forest_fire_model.pth')
+        assert open(path, 'rb').read() == b'two'
+        entry = {e['version']: e for e in registry.list_versions()}['v2']
+        assert entry['active'] and entry['files']['forest_fire_model.pth']['sha256'] == file_sha256(path)
+
+        assert registry.previous_version() == 'v1'
+        assert registry.verified_artifact_path('v2', 'forest_fire_model.pth') == (path, file_sha256(path))
+        assert registry.rollback(expected='v1') == 'v1'
+        assert registry.active_version() == 'v1'
+
+
+def test_errors():
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        artifact = write_artifact(root, 'forest_fire_model.pth', b'weights')
+        registry.register('v1', [artifact])
+        registry.activate('v1')
+        for call in (
+            lambda: registry.activate('missing'),
+            lambda: registry.register('v1', [artifact]),
+            lambda: registry.artifact_path('v1', 'forest_fire_model.onnx'),
+            registry.rollback,
+            registry.previous_version,
+        ):
+            try:
+                call()
+            except RegistryError:
+                continue
+            raise AssertionError("expected RegistryError")
+
+
+def test_verified_artifact_detects_tampering():
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(os.path.join(root, 'registry'))
+        for version in ('v1', 'v2'):
+            registry.register(version, [write_artifact(root, 'forest_fire_model.pth', version.encode())])
+        registry.activate('v1')
+        registry.activate('v2')
+        write_artifact(os.path.join(root, 'registry', 'v1'), 'forest_fire_model.pth', b'corrupt')
+        os.remove(os.path.join(root, 'registry', 'v2', 'forest_fire_model.pth'))
+        for version in ('v1', 'v2'):
+            try:
+                registry.verified_artifact_path(version, 'forest_fire_model.pth')
+                raise AssertionError("expected RegistryError")
+            except RegistryError:
+                pass
+        try:
+            registry.rollback(expected='v2')
+            raise AssertionError("expected RegistryError")
+        except RegistryError:
+            pass
+        assert registry.active_version() == 'v2'
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from sessions import ACCESS, REFRESH, RevocationList, TokenError, TokenSigner
+
+
+def rejected(signer, token, kind=ACCESS, now=None):
+    try:
+        signer.verify(token, kind, now=now)
+    except TokenError as e:
+        return e.reason
+    return None
+
+
+def test_issue_and_verify():
+    signer = TokenSigner('secret', access_ttl=60, refresh_ttl=3600)
+    token = signer.issue('alice', uid=7, now=1000)
+    claims = signer.verify(token, now=1030)
+    assert (claims['sub'], claims['uid'], claims['typ'], claims['exp']) == ('alice', 7, ACCESS, 1060)
+    assert signer.issue('alice', now=1000) != token  # fresh jti each time
+
+    assert rejected(signer, token, now=1060) == 'expired'
+    assert rejected(signer, token, REFRESH, now=1030) == 'invalid'
+    refresh = signer.issue('alice', REFRESH, now=1000)
+    assert signer.verify(refresh, REFRESH, now=4000)['exp'] == 4600
+    assert rejected(signer, refresh, ACCESS, now=1030) == 'invalid'
+
+
+def test_rejects_forged_tokens():
+    signer = TokenSigner('secret')
+    token = signer.issue('alice')
+    header, payload, signature = token.split('.')
+    other = TokenSigner('other-secret').issue('alice')
+    for forged in (other, f"{header}.{other.split('.')[1]}.{signature}", token[:-3] + 'abc',
+                   'nope', 'a.b.c', f"{header}.!!!.{signature}", None):
+        assert rejected(signer, forged) == 'invalid', forged
+
+
+def test_revocation_list_refresh():
+    shared = [('remote', 2000)]
+    revoked = RevocationList(lambda: shared)
+    revoked.add('local', 1500)
+    revoked.add('stale', 900)
+    assert revoked.refresh(now=1000) == 2
+    assert 'remote' in revoked and 'local' in revoked and 'stale' not in revoked
+    shared.append(('later', 3000))
+    revoked.refresh(now=1600)
+    assert 'later' in revoked and 'local' not in revoked
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, File, UploadFile
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from tracing import REDACTED, TraceRecorder, anonymize, multipart_parts
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def log(self, message, level='debug', **fields):
+        self.records.append(fields)
+
+
+class Login(BaseModel):
+    username: str
+    password: str
+
+
+def traced_app(writer, **options):
+    app = FastAPI()
+
+    @app.post("/login")
+    def login(user: Login):
+        return {"ok": user.password == "right"}
+
+    @app.post("/upload/{name}")
+    async def upload(name: str, file: UploadFile = File(...)):
+        return {"bytes": len(await file.read())}
+
+    app.add_middleware(TraceRecorder, writer=writer, **options)
+    return app
+
+
+async def drive(app, writer, calls):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        for method, url, kwargs in calls:
+            await client.request(method, url, **kwargs)
+    # Records are written from the default executor after each response.
+    deadline = time.monotonic() + 5
+    while len(writer.records) < len(calls) and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return writer.records
+
+
+def test_anonymize_is_consistent_and_keeps_shape():
+    salt = b'salt'
+    body = {"username": "alice", "email": "alice@example.org", "age": 3, "tags": ["a", None]}
+    first, second = anonymize(body, salt), anonymize(dict(body), salt)
+    assert first == second
+    assert first['age'] == 3 and first['tags'][1] is None
+    assert first['username'].startswith('anon:') and first['username'].endswith(':5')
+    assert first['email'].endswith(':17:email')
+    assert 'alice' not in str(first)
+    assert anonymize(body, b'other')['username'] != first['username']
+
+
+def test_credentials_are_redacted_not_hashed():
+    body = {"username": "alice", "password": "hunter2", "Refresh_Token": "a.b.c", "nested": {"access_token": "x"}}
+    anonymized = anonymize(body, b'salt')
+    assert anonymized['password'] == anonymized['Refresh_Token'] == anonymized['nested']['access_token'] == REDACTED
+    assert 'hunter2' not in str(anonymized)
+
+
+def test_multipart_parts():
+    body = (b'--xyz\r\nContent-Disposition: form-data; name="note"\r\n\r\nhello\r\n'
+            b'--xyz\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n\x00\x01\r\n\x02\r\n--xyz--\r\n')
+    assert list(multipart_parts(body, 'xyz')) == [
+        ('note', None, None, b'hello'),
+        ('file', 'a.jpg', 'image/jpeg', b'\x00\x01\r\n\x02'),
+    ]
+
+
+def test_recorder_writes_anonymized_metadata():
+    writer = ListWriter()
+    with tempfile.TemporaryDirectory() as samples:
+        app = traced_app(writer, payloads='sample', sample_dir=samples, salt='fixed')
+        records = asyncio.run(drive(app, writer, [
+            ('POST', '/login', {"json": {"username": "alice", "password": "right"}}),
+            ('POST', '/upload/scene?tile=256', {"files": {"file": ("s.jpg", b"x" * 1000, "image/jpeg")}}),
+        ]))
+        login, upload = sorted(records, key=lambda record: record['started_at'])
+
+        assert login['route'] == '/login' and login['status'] == 200 and login['duration_ms'] > 0
+        assert login['json'] == {"username": anonymize("alice", b'fixed'), "password": REDACTED}
+        assert login['request_bytes'] > 0 and login['response_bytes'] == len(b'{"ok":true}')
+
+        assert upload['route'] == '/upload/{name}' and upload['path'] == '/upload/scene'
+        assert upload['query'] == 'tile=256'
+        part, = upload['parts']
+        assert part['name'] == 'file' and part['bytes'] == 1000 and part['extension'] == '.jpg'
+        with open(os.path.join(samples, part['sample']), 'rb') as f:
+            assert f.read() == b"x" * 1000
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from user_store import SQLiteUserRepository, make_hashes
+
+
+def sqlite_repository(root, **options):
+    repository = SQLiteUserRepository(os.path.join(root, 'users.db'), **options)
+    repository.init_schema()
+    return repository
+
+
+def test_register_login_and_update():
+    for pool_size in (0, 2):
+        with tempfile.TemporaryDirectory() as root:
+            repository = sqlite_repository(root, pool_size=pool_size)
+            assert repository.add_user('alice', 'pw', 'Alice', 'a@example.com', '111')
+            assert not repository.add_user('alice', 'other', 'Alice 2', 'b@example.com', '222')
+            assert repository.login('alice', 'wrong') == []
+
+            rows = repository.login('alice', 'pw')
+            assert len(rows) == 1
+            user_id, username, fullname, email, phone, image = rows[0]
+            assert (username, fullname, email, phone, image) == ('alice', 'Alice', 'a@example.com', '111', None)
+            assert isinstance(user_id, int)
+
+            ref = 'ab' * 32
+            assert repository.update_profile('alice', 'new@example.com', '333')
+            assert repository.update_profile('alice', 'new@example.com', '333', ref)
+            assert repository.login('alice', 'pw')[0][3:] == ('new@example.com', '333', ref)
+            assert repository.set_profile_image('alice', None)
+            assert repository.login('alice', 'pw')[0][5] is None
+            repository.close()
+
+
+def test_wal_mode_and_pooled_reuse():
+    with tempfile.TemporaryDirectory() as root:
+        repository = sqlite_repository(root, pool_size=2)
+        for i in range(5):
+            repository.add_user(f'user{i}', 'pw', 'User', 'u@example.com', '000')
+            assert repository.login(f'user{i}', 'pw')
+        assert repository.pool_stats()['created'] == 1
+        with repository.connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        repository.close()
+
+
+def test_revoked_tokens():
+    with tempfile.TemporaryDirectory() as root:
+        repository = sqlite_repository(root, pool_size=1)
+        assert repository.revoke_token('a', 1000)
+        assert not repository.revoke_token('a', 1000)  # already revoked
+        assert repository.revoke_token('b', 2000)
+        assert sorted(repository.revoked_tokens(500)) == [('a', 1000), ('b', 2000)]
+        repository.purge_revoked_tokens(1500)
+        assert repository.revoked_tokens(0) == [('b', 2000)]
+
+        # Only a duplicate id means "already revoked"; other failures raise.
+        with repository.connection() as conn:
+            conn.execute('DROP TABLE revoked_tokens')
+        try:
+            repository.revoke_token('c', 3000)
+            assert False, "expected sqlite3.OperationalError"
+        except sqlite3.OperationalError:
+            pass
+        repository.close()
+
+
+def test_upgrades_legacy_sqlite_table():
+    # The schema written by the original root src/auth.py: no id, no
+    # profile_image.
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'users.db')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE users (username TEXT NOT NULL UNIQUE, password TEXT NOT NULL, '
+                     'fullname TEXT, email TEXT, phone TEXT)')
+        conn.execute('INSERT INTO users VALUES (?,?,?,?,?)', ('old', make_hashes('pw'), 'Old', 'o@example.com', '9'))
+        conn.commit()
+        conn.close()
+
+        repository = sqlite_repository(root, pool_size=0)
+        assert repository.login('old', 'pw')[0][1:] == ('old', 'Old', 'o@example.com', '9', None)
+        assert repository.update_profile('old', 'o@example.com', '9', 'ab' * 32)
+        assert repository.add_user('new', 'pw', 'New', 'n@example.com', '8')
+        assert repository.login('new', 'pw')[0][0] == 2
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from model import ForestFirePredictor
+from weights import load_state_dict, load_weights, model_metadata, save_weights
+
+
+def test_round_trip_with_metadata():
+    torch.manual_seed(0)
+    state = ForestFirePredictor().state_dict()
+    state['extra_half'] = torch.randn(3, 5).half()
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'model.safetensors')
+        save_weights(state, path, model_metadata())
+        loaded, metadata = load_weights(path)
+        assert metadata['class_names'] == ['No Fire', 'Fire']
+        assert metadata['input_size'] == 224
+        assert loaded.keys() == state.keys()
+        for name, tensor in state.items():
+            assert loaded[name].dtype == tensor.dtype and loaded[name].shape == tensor.shape, name
+            assert torch.equal(loaded[name], tensor), name
+
+
+def test_assigned_model_matches_and_pth_is_mapped():
+    torch.manual_seed(0)
+    reference = ForestFirePredictor().eval()
+    inputs = torch.randn(2, 3, 224, 224)
+    with tempfile.TemporaryDirectory() as root:
+        safetensors_path = save_weights(reference.state_dict(), os.path.join(root, 'model.safetensors'))
+        pth_path = os.path.join(root, 'model.pth')
+        torch.save(reference.state_dict(), pth_path)
+        for path in (safetensors_path, pth_path):
+            with torch.device('meta'):
+                model = ForestFirePredictor()
+            model.load_state_dict(load_state_dict(path), assign=True)
+            model.eval()
+            with torch.no_grad():
+                assert torch.equal(model(inputs), reference(inputs)), path
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"PASS: {name}")
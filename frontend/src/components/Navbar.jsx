@@ -2,12 +2,14 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useTheme } from '../context/ThemeContext';
 import axios from 'axios';
+import { logout } from '../session';
 
 export default function Navbar({ isSidebarOpen, onMenuClick }) {
     const [showDropdown, setShowDropdown] = useState(false);
     const [showProfileModal, setShowProfileModal] = useState(false);
     const [username, setUsername] = useState('User');
     const [profileImage, setProfileImage] = useState(null);
+    const [avatarFile, setAvatarFile] = useState(null); // picked but not yet uploaded
     const [isEditing, setIsEditing] = useState(false);
     const [editData, setEditData] = useState({
         username: 'User',
@@ -48,14 +50,20 @@ export default function Navbar({ isSidebarOpen, onMenuClick }) {
 
     const handleSaveProfile = async () => {
         try {
-            const token = localStorage.getItem('token'); // Assuming you have a token or just username for now
-            // In this simple app, we are just sending username. In prod, use JWT.
+            // Upload a newly picked image first; the profile only stores its reference.
+            let profileImageRef = localStorage.getItem('profileImageRef');
+            if (avatarFile) {
+                const formData = new FormData();
+                formData.append('file', avatarFile);
+                const upload = await axios.post('http://127.0.0.1:8000/avatars', formData);
+                profileImageRef = upload.data.profile_image;
+            }
 
             const payload = {
                 username: editData.username,
                 email: editData.email,
                 phone: editData.phone,
-                profile_image: profileImage // This can be large (Base64), might need to handle size limits
+                profile_image: profileImageRef
             };
 
             await axios.put('http://127.0.0.1:8000/update-profile', payload);
@@ -64,11 +72,14 @@ export default function Navbar({ isSidebarOpen, onMenuClick }) {
             localStorage.setItem('userEmail', editData.email);
             localStorage.setItem('userPhone', editData.phone);
 
-            if (profileImage) {
-                localStorage.setItem('profileImage', profileImage);
+            if (profileImageRef) {
+                localStorage.setItem('profileImageRef', profileImageRef);
+                localStorage.setItem('profileImage', `http://127.0.0.1:8000/avatars/${profileImageRef}?size=256`);
             } else {
+                localStorage.removeItem('profileImageRef');
                 localStorage.removeItem('profileImage');
             }
+            setAvatarFile(null);
 
             // Dispatch event for other components (Sidebar) to update
             window.dispatchEvent(new Event('profileUpdated'));
@@ -85,6 +96,7 @@ export default function Navbar({ isSidebarOpen, onMenuClick }) {
     const handleImageUpload = (e) => {
         const file = e.target.files[0];
         if (file) {
+            setAvatarFile(file);
             const reader = new FileReader();
             reader.onloadend = () => {
                 setProfileImage(reader.result);
@@ -95,12 +107,13 @@ export default function Navbar({ isSidebarOpen, onMenuClick }) {
 
     const handleCancelEdit = () => {
         setIsEditing(false);
+        setAvatarFile(null);
         setProfileImage(localStorage.getItem('profileImage')); // Revert image
         setEditData(prev => ({ ...prev, username }));
     };
 
-    const handleLogout = () => {
-        localStorage.clear();
+    const handleLogout = async () => {
+        await logout();
         navigate('/');
     };
 
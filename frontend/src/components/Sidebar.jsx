@@ -1,5 +1,6 @@
 import { NavLink, useNavigate } from 'react-router-dom';
 import { useState, useEffect } from 'react';
+import { logout } from '../session';
 
 export default function Sidebar({ isOpen, onClose }) {
     const navigate = useNavigate();
@@ -20,8 +21,8 @@ export default function Sidebar({ isOpen, onClose }) {
         return () => window.removeEventListener('profileUpdated', updateUserData);
     }, []);
 
-    const handleLogout = () => {
-        localStorage.clear();
+    const handleLogout = async () => {
+        await logout();
         navigate('/login');
     };
 
@@ -1,6 +1,7 @@
 import { useState } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { saveSession } from '../session';
 
 const API_URL = "http://127.0.0.1:8000";
 
@@ -15,14 +16,18 @@ export default function Login() {
             const res = await axios.post(`${API_URL}/login`, { username, password });
             if (res.status === 200) {
                 const data = res.data;
+                saveSession(data);
                 localStorage.setItem('username', data.username);
                 localStorage.setItem('userEmail', data.email || '');
                 localStorage.setItem('userPhone', data.phone || '');
                 localStorage.setItem('userRole', 'Standard User'); // Backend doesn't return role yet, default ok.
 
+                // profile_image is a reference into the server's avatar store.
                 if (data.profile_image) {
-                    localStorage.setItem('profileImage', data.profile_image);
+                    localStorage.setItem('profileImageRef', data.profile_image);
+                    localStorage.setItem('profileImage', `${API_URL}/avatars/${data.profile_image}?size=256`);
                 } else {
+                    localStorage.removeItem('profileImageRef');
                     localStorage.removeItem('profileImage');
                 }
 
@@ -0,0 +1,57 @@
+import axios from 'axios';
+
+const API_URL = "http://127.0.0.1:8000";
+
+// Session tokens issued by /login. Every API call sends the access token;
+// when it has expired the refresh token is exchanged once for a new pair and
+// the call is retried.
+export function saveSession(data) {
+    localStorage.setItem('token', data.access_token);
+    localStorage.setItem('refreshToken', data.refresh_token);
+}
+
+let refreshing = null;
+
+function refreshSession() {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (!refreshToken) {
+        return Promise.reject(new Error('No refresh token'));
+    }
+    // Concurrent 401s share one refresh; refresh tokens are single use.
+    refreshing = refreshing || axios.post(`${API_URL}/token/refresh`, { refresh_token: refreshToken }, { skipAuth: true })
+        .then(res => saveSession(res.data))
+        .finally(() => { refreshing = null; });
+    return refreshing;
+}
+
+export async function logout() {
+    const refreshToken = localStorage.getItem('refreshToken');
+    try {
+        await axios.post(`${API_URL}/logout`, refreshToken ? { refresh_token: refreshToken } : null);
+    } catch (error) {
+        // Logging out locally is enough if the server can't be reached.
+    }
+    localStorage.clear();
+}
+
+axios.interceptors.request.use(config => {
+    const token = localStorage.getItem('token');
+    if (token && !config.skipAuth) {
+        config.headers.Authorization = `Bearer ${token}`;
+    }
+    return config;
+});
+
+axios.interceptors.response.use(null, async error => {
+    const config = error.config;
+    if (error.response?.status === 401 && config && !config.skipAuth && !config.retried && localStorage.getItem('refreshToken')) {
+        config.retried = true;
+        try {
+            await refreshSession();
+        } catch (refreshError) {
+            return Promise.reject(error);
+        }
+        return axios(config);
+    }
+    return Promise.reject(error);
+});
@@ -1,48 +1,18 @@
-import sqlite3
-import hashlib
+import os
+import sys
 
-def init_db():
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT NOT NULL UNIQUE, 
-            password TEXT NOT NULL,
-            fullname TEXT,
-            email TEXT,
-            phone TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# The users table is shared with the backend through its SQLite store
+# (backend/src/user_store.py), so both apps run the same queries.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'src'))
+from user_store import SQLiteUserRepository, make_hashes, check_hashes
 
-def make_hashes(password):
-    return hashlib.sha256(str.encode(password)).hexdigest()
+_repository = SQLiteUserRepository('users.db', pool_size=0)
 
-def check_hashes(password, hashed_text):
-    if make_hashes(password) == hashed_text:
-        return hashed_text
-    return False
+def init_db():
+    _repository.init_schema()
 
 def add_user(username, password, fullname, email, phone):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    try:
-        c.execute(
-            'INSERT INTO users(username, password, fullname, email, phone) VALUES (?,?,?,?,?)', 
-            (username, make_hashes(password), fullname, email, phone)
-        )
-        conn.commit()
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
-    return True
+    return _repository.add_user(username, password, fullname, email, phone)
 
 def login_user(username, password):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM users WHERE username =? AND password = ?', (username, make_hashes(password)))
-    data = c.fetchall()
-    conn.close()
-    return data
+    return _repository.login(username, password)